@@ -2,9 +2,13 @@
 領養申請 API 路由
 處理領養申請相關的端點
 """
-from fastapi import APIRouter, HTTPException
-from services.supabase_client import get_client
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from services.supabase_client import get_async_client
 from schemas.application import AdoptionApplication, AdoptionApplicationCreate
+from schemas.projection import APPLICATION_COLUMNS
+from .pets import pet_from_row
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, page_count, set_page_headers
 
 router = APIRouter(prefix="/applications", tags=["領養申請"])
 
@@ -21,13 +25,22 @@ STATUS_LABELS = {
 
 
 @router.get("", response_model=list[AdoptionApplication])
-async def get_applications() -> list[AdoptionApplication]:
+async def get_applications(
+    http_response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（取自上一頁的 X-Next-Cursor 標頭）"),
+) -> list[AdoptionApplication]:
     """
-    獲取用戶的所有領養申請
+    獲取用戶的領養申請，依時間由新到舊以游標分頁
     """
+    after = decode_cursor(cursor)
+    
     try:
-        client = get_client()
-        response = client.table("adoption_applications").select("*").eq("user_id", MOCK_USER_ID).order("created_at", desc=True).execute()
+        client = get_async_client()
+        query = client.table("adoption_applications").select(APPLICATION_COLUMNS, count=page_count(after)).eq("user_id", MOCK_USER_ID).order("created_at", desc=True).order("id", desc=True).limit(limit)
+        if after:
+            query = query.after(*after)
+        response = await query.execute()
         
         applications = []
         for item in response.data:
@@ -48,8 +61,10 @@ async def get_applications() -> list[AdoptionApplication]:
                 interview_date=item.get("interview_date"),
                 interview_time=item.get("interview_time"),
                 created_at=item.get("created_at"),
+                pet=pet_from_row(item["pet"]) if item.get("pet") else None,
             ))
         
+        set_page_headers(http_response, encode_cursor(query.next_keyset(response.data)), response.count)
         return applications
         
     except Exception as e:
@@ -65,16 +80,10 @@ async def create_application(data: AdoptionApplicationCreate) -> dict:
         raise HTTPException(status_code=400, detail="必須同意服務條款")
     
     try:
-        client = get_client()
-        
-        # 檢查是否已對該寵物提交過申請
-        existing = client.table("adoption_applications").select("id").eq("user_id", MOCK_USER_ID).eq("pet_id", data.pet_id).execute()
-        
-        if existing.data:
-            raise HTTPException(status_code=400, detail="您已經對這隻寵物提交過申請了")
+        client = get_async_client()
         
-        # 創建申請
-        response = client.table("adoption_applications").insert({
+        # 創建申請，已對該寵物提交過時由唯一鍵略過（不返回資料）
+        response = await client.table("adoption_applications").upsert({
             "user_id": MOCK_USER_ID,
             "pet_id": data.pet_id,
             "status": "pending",
@@ -86,7 +95,13 @@ async def create_application(data: AdoptionApplicationCreate) -> dict:
             "full_name": data.full_name,
             "phone": data.phone,
             "email": data.email,
-        }).execute()
+        }, on_conflict="user_id,pet_id", ignore_duplicates=True).execute()
+        
+        # 上游錯誤同樣返回空資料，需與略過的重複申請區分
+        if response.error:
+            raise HTTPException(status_code=502, detail=f"提交申請失敗: {response.error}")
+        if not response.data:
+            raise HTTPException(status_code=400, detail="您已經對這隻寵物提交過申請了")
         
         return {
             "message": "申請已成功提交",
@@ -106,8 +121,8 @@ async def get_application(application_id: str) -> AdoptionApplication:
     獲取單一申請詳情
     """
     try:
-        client = get_client()
-        response = client.table("adoption_applications").select("*").eq("id", application_id).eq("user_id", MOCK_USER_ID).single().execute()
+        client = get_async_client()
+        response = await client.table("adoption_applications").select(APPLICATION_COLUMNS).eq("id", application_id).eq("user_id", MOCK_USER_ID).single().execute()
         
         if not response.data:
             raise HTTPException(status_code=404, detail="找不到該申請")
@@ -130,6 +145,7 @@ async def get_application(application_id: str) -> AdoptionApplication:
             interview_date=item.get("interview_date"),
             interview_time=item.get("interview_time"),
             created_at=item.get("created_at"),
+            pet=pet_from_row(item["pet"]) if item.get("pet") else None,
         )
         
     except HTTPException:
@@ -4,8 +4,10 @@
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.supabase_client import get_client
+from services.supabase_client import get_async_client
 from schemas.pet import Pet
+from schemas.projection import PET_COLUMNS
+from .pets import pet_from_row
 
 router = APIRouter(prefix="/favorites", tags=["收藏"])
 
@@ -29,40 +31,12 @@ async def get_favorites() -> list[Pet]:
     獲取用戶收藏的寵物列表
     """
     try:
-        client = get_client()
+        client = get_async_client()
         
-        # 獲取用戶的收藏記錄
-        favorites_response = client.table("favorites").select("pet_id").eq("user_id", MOCK_USER_ID).execute()
+        # 以嵌入資源一次取得收藏的寵物詳情（!inner 排除已刪除的寵物）
+        response = await client.table("favorites").select(f"pets!inner({PET_COLUMNS})").eq("user_id", MOCK_USER_ID).flatten("pets").execute()
         
-        if not favorites_response.data:
-            return []
-        
-        pet_ids = [f["pet_id"] for f in favorites_response.data]
-        
-        # 獲取寵物詳情
-        pets_response = client.table("pets").select("*").in_("id", pet_ids).execute()
-        
-        pets = []
-        for item in pets_response.data:
-            pets.append(Pet(
-                id=str(item["id"]),
-                name=item["name"],
-                breed=item["breed"],
-                age=item["age"],
-                age_group=item["age_group"],
-                gender=item["gender"],
-                size=item["size"],
-                pet_type=item["pet_type"],
-                location=item["location"],
-                distance=item.get("distance"),
-                image_url=item["image_url"],
-                description=item.get("description"),
-                adoption_fee=float(item.get("adoption_fee", 0)),
-                is_vaccinated=item.get("is_vaccinated", False),
-                is_neutered=item.get("is_neutered", False),
-                is_featured=item.get("is_featured", False),
-                tags=item.get("tags", []),
-            ))
+        pets = [pet_from_row(item) for item in response.data]
         
         return pets
         
@@ -77,8 +51,8 @@ async def get_favorite_ids() -> FavoriteIds:
     用於前端快速檢查收藏狀態
     """
     try:
-        client = get_client()
-        response = client.table("favorites").select("pet_id").eq("user_id", MOCK_USER_ID).execute()
+        client = get_async_client()
+        response = await client.table("favorites").select("pet_id").eq("user_id", MOCK_USER_ID).execute()
         
         pet_ids = [f["pet_id"] for f in response.data] if response.data else []
         return FavoriteIds(pet_ids=pet_ids)
@@ -93,22 +67,24 @@ async def add_favorite(data: FavoriteCreate) -> dict:
     新增收藏
     """
     try:
-        client = get_client()
-        
-        # 檢查是否已收藏
-        existing = client.table("favorites").select("id").eq("user_id", MOCK_USER_ID).eq("pet_id", data.pet_id).execute()
+        client = get_async_client()
         
-        if existing.data:
-            return {"message": "已經收藏過了", "success": True}
-        
-        # 新增收藏 (必須調用 execute)
-        client.table("favorites").insert({
+        # 新增收藏，已收藏時由唯一鍵略過（不返回資料）
+        response = await client.table("favorites").upsert({
             "user_id": MOCK_USER_ID,
             "pet_id": data.pet_id,
-        }).execute()
+        }, on_conflict="user_id,pet_id", ignore_duplicates=True).execute()
+        
+        # 上游錯誤同樣返回空資料，需與略過的重複收藏區分
+        if response.error:
+            raise HTTPException(status_code=502, detail=f"新增收藏失敗: {response.error}")
+        if not response.data:
+            return {"message": "已經收藏過了", "success": True}
         
         return {"message": "收藏成功", "success": True}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"新增收藏失敗: {str(e)}")
 
@@ -119,10 +95,14 @@ async def remove_favorite(pet_id: str) -> dict:
     移除收藏
     """
     try:
-        client = get_client()
-        client.table("favorites").delete().eq("user_id", MOCK_USER_ID).eq("pet_id", pet_id).execute()
+        client = get_async_client()
+        response = await client.table("favorites").delete().eq("user_id", MOCK_USER_ID).eq("pet_id", pet_id).execute()
+        if response.error:
+            raise HTTPException(status_code=502, detail=f"移除收藏失敗: {response.error}")
         
         return {"message": "已取消收藏", "success": True}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"移除收藏失敗: {str(e)}")
@@ -2,9 +2,12 @@
 寵物刊登 API 路由
 處理用戶刊登寵物相關的端點
 """
-from fastapi import APIRouter, HTTPException
-from services.supabase_client import get_client
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from services.supabase_client import get_async_client
 from schemas.listing import PetListing, PetListingCreate
+from schemas.projection import LISTING_COLUMNS
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, page_count, set_page_headers
 
 router = APIRouter(prefix="/listings", tags=["寵物刊登"])
 
@@ -13,13 +16,22 @@ MOCK_USER_ID = "00000000-0000-0000-0000-000000000001"
 
 
 @router.get("", response_model=list[PetListing])
-async def get_listings() -> list[PetListing]:
+async def get_listings(
+    http_response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（取自上一頁的 X-Next-Cursor 標頭）"),
+) -> list[PetListing]:
     """
-    獲取用戶的所有寵物刊登
+    獲取用戶的寵物刊登，依時間由新到舊以游標分頁
     """
+    after = decode_cursor(cursor)
+    
     try:
-        client = get_client()
-        response = client.table("pet_listings").select("*").eq("user_id", MOCK_USER_ID).order("created_at", desc=True).execute()
+        client = get_async_client()
+        query = client.table("pet_listings").select(LISTING_COLUMNS, count=page_count(after)).eq("user_id", MOCK_USER_ID).order("created_at", desc=True).order("id", desc=True).limit(limit)
+        if after:
+            query = query.after(*after)
+        response = await query.execute()
         
         listings = []
         for item in response.data:
@@ -38,6 +50,7 @@ async def get_listings() -> list[PetListing]:
                 created_at=item.get("created_at"),
             ))
         
+        set_page_headers(http_response, encode_cursor(query.next_keyset(response.data)), response.count)
         return listings
         
     except Exception as e:
@@ -50,9 +63,9 @@ async def create_listing(data: PetListingCreate) -> dict:
     創建新的寵物刊登
     """
     try:
-        client = get_client()
+        client = get_async_client()
         
-        response = client.table("pet_listings").insert({
+        response = await client.table("pet_listings").insert({
             "user_id": MOCK_USER_ID,
             "name": data.name,
             "pet_type": data.pet_type,
@@ -81,8 +94,8 @@ async def delete_listing(listing_id: str) -> dict:
     刪除寵物刊登
     """
     try:
-        client = get_client()
-        client.table("pet_listings").delete().eq("id", listing_id).eq("user_id", MOCK_USER_ID).execute()
+        client = get_async_client()
+        await client.table("pet_listings").delete().eq("id", listing_id).eq("user_id", MOCK_USER_ID).execute()
         
         return {"message": "刊登已刪除", "success": True}
         
@@ -99,8 +112,8 @@ async def update_listing_status(listing_id: str, status: str) -> dict:
         raise HTTPException(status_code=400, detail="無效的狀態值")
     
     try:
-        client = get_client()
-        client.table("pet_listings").update({"status": status}).eq("id", listing_id).eq("user_id", MOCK_USER_ID).execute()
+        client = get_async_client()
+        await client.table("pet_listings").update({"status": status}).eq("id", listing_id).eq("user_id", MOCK_USER_ID).execute()
         
         return {"message": "狀態已更新", "success": True}
         
@@ -3,9 +3,12 @@
 處理訊息對話相關的端點
 """
 from datetime import datetime
-from fastapi import APIRouter, HTTPException
-from services.supabase_client import get_client
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from services.supabase_client import get_async_client
 from schemas.message import Message, MessageCreate, MessageThread
+from schemas.projection import MESSAGE_COLUMNS
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, page_count, set_page_headers
 
 router = APIRouter(prefix="/messages", tags=["訊息"])
 
@@ -43,28 +46,23 @@ async def get_message_threads() -> list[MessageThread]:
     獲取用戶的所有訊息對話
     """
     try:
-        client = get_client()
-        response = client.table("message_threads").select("*").eq("user_id", MOCK_USER_ID).order("created_at", desc=True).execute()
+        client = get_async_client()
+        # 最後一則訊息與未讀數量由資料庫函式一次算出
+        response = await client.rpc("get_message_threads", {"p_user_id": MOCK_USER_ID}).execute()
         
         threads = []
         for item in response.data:
-            # 獲取最後一則訊息
-            last_msg_response = client.table("messages").select("*").eq("thread_id", item["id"]).order("created_at", desc=True).limit(1).execute()
-            
             last_message = "尚無訊息"
             last_time = format_time(item.get("created_at"))
             
-            if last_msg_response.data:
-                msg = last_msg_response.data[0]
-                if msg.get("text"):
-                    last_message = msg["text"]
-                elif msg.get("image_url"):
+            if item.get("last_text") or item.get("last_image_url"):
+                if item.get("last_text"):
+                    last_message = item["last_text"]
+                else:
                     last_message = "傳送了一張相片"
-                last_time = format_time(msg.get("created_at"))
+                last_time = format_time(item.get("last_created_at"))
             
-            # 計算未讀數量
-            unread_response = client.table("messages").select("id", count="exact").eq("thread_id", item["id"]).eq("sender", "other").eq("is_read", False).execute()
-            unread_count = unread_response.count or 0
+            unread_count = item.get("unread_count") or 0
             
             threads.append(MessageThread(
                 id=str(item["id"]),
@@ -83,22 +81,30 @@ async def get_message_threads() -> list[MessageThread]:
 
 
 @router.get("/threads/{thread_id}", response_model=list[Message])
-async def get_thread_messages(thread_id: str) -> list[Message]:
+async def get_thread_messages(
+    thread_id: str,
+    http_response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（取自上一頁的 X-Next-Cursor 標頭）"),
+) -> list[Message]:
     """
-    獲取對話中的所有訊息
+    獲取對話中的訊息，依時間由舊到新以游標分頁
     """
+    after = decode_cursor(cursor)
+    
     try:
-        client = get_client()
+        client = get_async_client()
         
-        # 驗證對話歸屬
-        thread_response = client.table("message_threads").select("id").eq("id", thread_id).eq("user_id", MOCK_USER_ID).execute()
+        # 驗證對話歸屬與讀取訊息互不相依，並行送出；不屬於用戶的對話則丟棄訊息
+        thread_query = client.table("message_threads").select("id").eq("id", thread_id).eq("user_id", MOCK_USER_ID)
+        query = client.table("messages").select(MESSAGE_COLUMNS, count=page_count(after)).eq("thread_id", thread_id).order("created_at", asc=True).order("id", asc=True).limit(limit)
+        if after:
+            query = query.after(*after)
+        thread_response, response = await client.gather(thread_query, query)
         
         if not thread_response.data:
             raise HTTPException(status_code=404, detail="找不到該對話")
         
-        # 獲取訊息
-        response = client.table("messages").select("*").eq("thread_id", thread_id).order("created_at", asc=True).execute()
-        
         messages = []
         for item in response.data:
             messages.append(Message(
@@ -110,8 +116,10 @@ async def get_thread_messages(thread_id: str) -> list[Message]:
                 timestamp=format_time(item.get("created_at")),
             ))
         
+        set_page_headers(http_response, encode_cursor(query.next_keyset(response.data)), response.count)
+        
         # 標記為已讀
-        client.table("messages").update({"is_read": True}).eq("thread_id", thread_id).eq("sender", "other").execute()
+        await client.table("messages").update({"is_read": True}).eq("thread_id", thread_id).eq("sender", "other").execute()
         
         return messages
         
@@ -130,16 +138,16 @@ async def send_message(thread_id: str, data: MessageCreate) -> Message:
         raise HTTPException(status_code=400, detail="訊息內容不能為空")
     
     try:
-        client = get_client()
+        client = get_async_client()
         
         # 驗證對話歸屬
-        thread_response = client.table("message_threads").select("id").eq("id", thread_id).eq("user_id", MOCK_USER_ID).execute()
+        thread_response = await client.table("message_threads").select("id").eq("id", thread_id).eq("user_id", MOCK_USER_ID).execute()
         
         if not thread_response.data:
             raise HTTPException(status_code=404, detail="找不到該對話")
         
         # 發送訊息
-        response = client.table("messages").insert({
+        response = await client.table("messages").insert({
             "thread_id": thread_id,
             "sender": "user",
             "text": data.text,
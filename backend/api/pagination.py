@@ -0,0 +1,60 @@
+"""
+分頁工具
+提供列表端點共用的游標編碼與分頁回應標頭
+"""
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException, Response
+
+# 每頁預設與最大筆數
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 下一頁游標與總數的回應標頭（回應本體維持為列表）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(keyset: Optional[list]) -> Optional[str]:
+    """
+    將排序鍵編碼為不透明的游標字串
+    """
+    if keyset is None:
+        return None
+    raw = json.dumps(keyset, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    """
+    解析游標字串，格式錯誤時回應 400
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keyset = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="無效的分頁游標")
+    if not isinstance(keyset, list) or not keyset:
+        raise HTTPException(status_code=400, detail="無效的分頁游標")
+    return keyset
+
+
+def page_count(after: Optional[list], mode: str = "estimated") -> Optional[str]:
+    """
+    列表查詢的計數方式：只有第一頁計算總數
+    之後的頁面帶有鍵集條件，計數只會涵蓋游標之後的資料
+    """
+    return None if after else mode
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[int]) -> None:
+    """
+    寫入分頁回應標頭（總數只在第一頁提供）
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
@@ -2,78 +2,146 @@
 寵物 API 路由
 處理寵物列表和詳情的端點
 """
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
-from services.supabase_client import get_client
+import math
+import re
+from typing import Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from services.supabase_client import get_async_client, PreparedQuery
+from services import pet_search
 from schemas.pet import Pet, PetFilter
+from schemas.projection import PET_COLUMNS
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, set_page_headers
 
 router = APIRouter(prefix="/pets", tags=["寵物"])
 
+# 可篩選的欄位
+FILTER_COLUMNS = ("location", "age_group", "size", "gender", "pet_type")
+
+# 預先編譯的查詢形狀
+PETS_QUERY = PreparedQuery(
+    "pets",
+    PET_COLUMNS,
+    filters=FILTER_COLUMNS,
+    order=(("created_at", True), ("id", True)),
+    count="estimated",
+    cached=True,
+)
+PET_BY_ID_QUERY = PreparedQuery("pets", PET_COLUMNS, filters=("id",), single=True, cached=True)
+
+# 距離排序：distance 為文字欄位（例如「2.5 公里外」），資料庫無法依數值排序
+DISTANCE_SORT = "距離由近到遠"
+_DISTANCE_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def pet_from_row(item: dict) -> Pet:
+    """將 pets 資料列轉為回應模式，也用於其他資料表嵌入的寵物"""
+    return Pet(
+        id=str(item["id"]),
+        name=item["name"],
+        breed=item["breed"],
+        age=item["age"],
+        age_group=item["age_group"],
+        gender=item["gender"],
+        size=item["size"],
+        pet_type=item["pet_type"],
+        location=item["location"],
+        distance=item.get("distance"),
+        image_url=item["image_url"],
+        description=item.get("description"),
+        adoption_fee=float(item.get("adoption_fee", 0)),
+        is_vaccinated=item.get("is_vaccinated", False),
+        is_neutered=item.get("is_neutered", False),
+        is_featured=item.get("is_featured", False),
+        tags=item.get("tags", []),
+    )
+
+
+def distance_value(distance: Optional[str]) -> float:
+    """由距離描述取出數字，無法解析時排在最後"""
+    match = _DISTANCE_NUMBER.search(distance or "")
+    return float(match.group()) if match else math.inf
+
+
+def distance_offset(after: Optional[list]) -> int:
+    """距離排序的游標為 ["distance", 位移]"""
+    if after is None:
+        return 0
+    if len(after) != 2 or after[0] != "distance" or type(after[1]) is not int or after[1] < 0:
+        raise HTTPException(status_code=400, detail="無效的分頁游標")
+    return after[1]
+
+
+async def pets_by_distance(client: Any, filters: dict, limit: int, offset: int) -> tuple[list[dict], Optional[list], Optional[int]]:
+    """
+    依距離由近到遠分頁，同距離時較新刊登者在前
+    先逐頁讀取符合篩選的 id 與距離並排序整個結果，再以一次查詢取回當頁的完整資料
+    返回 (當頁資料列, 下一頁的游標鍵, 總數)；總數只在第一頁提供
+    """
+    query = client.table("pets").select("id,distance,created_at")
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    keys = []
+    async for rows in query.iter_pages(5000):
+        keys.extend((row.get("created_at") or "", str(row["id"]), distance_value(row.get("distance"))) for row in rows)
+    keys.sort(reverse=True)
+    keys.sort(key=lambda key: key[2])
+    
+    ids = [pet_id for _, pet_id, _ in keys[offset:offset + limit]]
+    next_keyset = ["distance", offset + limit] if offset + limit < len(keys) else None
+    total = len(keys) if offset == 0 else None
+    if not ids:
+        return [], next_keyset, total
+    
+    response = await client.table("pets").select(PET_COLUMNS).in_("id", ids).execute()
+    if response.error:
+        raise RuntimeError(response.error)
+    rows = {str(item["id"]): item for item in response.data}
+    return [rows[pet_id] for pet_id in ids if pet_id in rows], next_keyset, total
+
 
 @router.get("", response_model=list[Pet])
 async def get_pets(
+    http_response: Response,
     location: Optional[str] = Query(None, description="地點篩選"),
     age_group: Optional[str] = Query(None, description="年齡層篩選"),
     size: Optional[str] = Query(None, description="體型篩選"),
     gender: Optional[str] = Query(None, description="性別篩選"),
     pet_type: Optional[str] = Query(None, description="寵物類型篩選"),
     sort: Optional[str] = Query(None, description="排序方式"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（取自上一頁的 X-Next-Cursor 標頭）"),
 ) -> list[Pet]:
     """
     獲取寵物列表
-    支援多種篩選條件和排序
+    支援多種篩選條件和排序，依刊登時間由新到舊以游標分頁
+    距離排序需先排序整個篩選結果，改以位移游標分頁（見 pets_by_distance）
     """
+    after = decode_cursor(cursor)
+    offset = distance_offset(after) if sort == DISTANCE_SORT else None
+    
     try:
-        client = get_client()
-        query = client.table("pets").select("*")
+        client = get_async_client()
+        
+        # 應用篩選條件（「全部」表示不篩選）
+        filters = {
+            column: value
+            for column, value in zip(FILTER_COLUMNS, (location, age_group, size, gender, pet_type))
+            if value and value != "全部"
+        }
+        if offset is not None:
+            rows, next_keyset, total = await pets_by_distance(client, filters, limit, offset)
+            set_page_headers(http_response, encode_cursor(next_keyset), total)
+            return [pet_from_row(item) for item in rows]
         
-        # 應用篩選條件
-        if location and location != "全部":
-            query = query.eq("location", location)
-        if age_group and age_group != "全部":
-            query = query.eq("age_group", age_group)
-        if size and size != "全部":
-            query = query.eq("size", size)
-        if gender and gender != "全部":
-            query = query.eq("gender", gender)
-        if pet_type and pet_type != "全部":
-            query = query.eq("pet_type", pet_type)
+        query = PETS_QUERY.bind(client, limit=limit, after=after, **filters)
         
-        response = query.execute()
+        response = await query.execute()
         
         pets = []
         for item in response.data:
-            pets.append(Pet(
-                id=str(item["id"]),
-                name=item["name"],
-                breed=item["breed"],
-                age=item["age"],
-                age_group=item["age_group"],
-                gender=item["gender"],
-                size=item["size"],
-                pet_type=item["pet_type"],
-                location=item["location"],
-                distance=item.get("distance"),
-                image_url=item["image_url"],
-                description=item.get("description"),
-                adoption_fee=float(item.get("adoption_fee", 0)),
-                is_vaccinated=item.get("is_vaccinated", False),
-                is_neutered=item.get("is_neutered", False),
-                is_featured=item.get("is_featured", False),
-                tags=item.get("tags", []),
-            ))
+            pets.append(pet_from_row(item))
         
-        # 應用排序（距離由近到遠）
-        if sort == "距離由近到遠":
-            def extract_distance(pet: Pet) -> float:
-                if not pet.distance:
-                    return float("inf")
-                # 嘗試從字串中提取數字
-                import re
-                match = re.search(r"[\d.]+", pet.distance)
-                return float(match.group()) if match else float("inf")
-            
-            pets.sort(key=extract_distance)
+        set_page_headers(http_response, encode_cursor(query.next_keyset(response.data)), response.count)
         
         return pets
         
@@ -81,38 +149,47 @@ async def get_pets(
         raise HTTPException(status_code=500, detail=f"獲取寵物列表失敗: {str(e)}")
 
 
+@router.get("/search", response_model=list[Pet])
+async def search_pets(
+    q: str = Query(..., min_length=1, max_length=100, description="搜尋關鍵字（名字、品種、描述、標籤）"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    offset: int = Query(0, ge=0, le=1000, description="略過的筆數"),
+) -> list[Pet]:
+    """
+    全文搜尋寵物
+    以行程內的倒排索引（中文二字切分、BM25 排序）找出符合所有關鍵字的寵物，再以一次查詢取回資料
+    """
+    try:
+        client = get_async_client()
+        index = await pet_search.get_index(client)
+        ids = [pet_id for pet_id, _ in index.search(q, limit=limit, offset=offset)]
+        if not ids:
+            return []
+        
+        response = await client.table("pets").select(PET_COLUMNS).in_("id", ids).execute()
+        rows = {str(item["id"]): item for item in response.data}
+        # 依搜尋排序返回；索引中已刪除的寵物不會取回資料而被略過
+        return [pet_from_row(rows[pet_id]) for pet_id in ids if pet_id in rows]
+        
+    except pet_search.IndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"搜尋寵物失敗: {str(e)}")
+
+
 @router.get("/{pet_id}", response_model=Pet)
 async def get_pet(pet_id: str) -> Pet:
     """
     獲取單一寵物詳情
     """
     try:
-        client = get_client()
-        response = client.table("pets").select("*").eq("id", pet_id).single().execute()
+        client = get_async_client()
+        response = await PET_BY_ID_QUERY.bind(client, id=pet_id).execute()
         
         if not response.data:
             raise HTTPException(status_code=404, detail="找不到該寵物")
         
-        item = response.data
-        return Pet(
-            id=str(item["id"]),
-            name=item["name"],
-            breed=item["breed"],
-            age=item["age"],
-            age_group=item["age_group"],
-            gender=item["gender"],
-            size=item["size"],
-            pet_type=item["pet_type"],
-            location=item["location"],
-            distance=item.get("distance"),
-            image_url=item["image_url"],
-            description=item.get("description"),
-            adoption_fee=float(item.get("adoption_fee", 0)),
-            is_vaccinated=item.get("is_vaccinated", False),
-            is_neutered=item.get("is_neutered", False),
-            is_featured=item.get("is_featured", False),
-            tags=item.get("tags", []),
-        )
+        return pet_from_row(response.data)
         
     except HTTPException:
         raise
@@ -2,21 +2,33 @@
 幸福故事 API 路由
 處理幸福故事相關的端點
 """
-from fastapi import APIRouter, HTTPException
-from services.supabase_client import get_client
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from services.supabase_client import get_async_client
 from schemas.story import Story
+from schemas.projection import STORY_COLUMNS
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, page_count, set_page_headers
 
 router = APIRouter(prefix="/stories", tags=["幸福故事"])
 
 
 @router.get("", response_model=list[Story])
-async def get_stories() -> list[Story]:
+async def get_stories(
+    http_response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁數量"),
+    cursor: Optional[str] = Query(None, description="分頁游標（取自上一頁的 X-Next-Cursor 標頭）"),
+) -> list[Story]:
     """
-    獲取所有幸福故事
+    獲取幸福故事，依時間由新到舊以游標分頁
     """
+    after = decode_cursor(cursor)
+    
     try:
-        client = get_client()
-        response = client.table("stories").select("*").order("created_at", desc=True).execute()
+        client = get_async_client()
+        query = client.table("stories").select(STORY_COLUMNS, count=page_count(after)).order("created_at", desc=True).order("id", desc=True).limit(limit)
+        if after:
+            query = query.after(*after)
+        response = await query.cached().execute()
         
         stories = []
         for item in response.data:
@@ -29,6 +41,7 @@ async def get_stories() -> list[Story]:
                 color=item.get("color"),
             ))
         
+        set_page_headers(http_response, encode_cursor(query.next_keyset(response.data)), response.count)
         return stories
         
     except Exception as e:
@@ -3,8 +3,9 @@
 處理用戶相關的端點
 """
 from fastapi import APIRouter, HTTPException
-from services.supabase_client import get_client
+from services.supabase_client import get_async_client
 from schemas.user import User, UserStats
+from schemas.projection import USER_COLUMNS
 
 router = APIRouter(prefix="/users", tags=["用戶"])
 
@@ -20,8 +21,8 @@ async def get_current_user() -> User:
     目前使用模擬用戶進行開發
     """
     try:
-        client = get_client()
-        response = client.table("users").select("*").eq("id", MOCK_USER_ID).single().execute()
+        client = get_async_client()
+        response = await client.table("users").select(USER_COLUMNS).eq("id", MOCK_USER_ID).single().execute()
         
         if not response.data:
             # 如果用戶不存在，返回預設用戶資料
@@ -59,15 +60,21 @@ async def get_user_stats() -> UserStats:
     獲取當前用戶的統計數據
     """
     try:
-        client = get_client()
+        client = get_async_client()
         
-        # 獲取申請數量
-        apps_response = client.table("adoption_applications").select("id", count="exact").eq("user_id", MOCK_USER_ID).execute()
-        applications_count = apps_response.count or 0
-        
-        # 獲取收藏數量
-        favs_response = client.table("favorites").select("id", count="exact").eq("user_id", MOCK_USER_ID).execute()
-        favorites_count = favs_response.count or 0
+        # 申請與收藏數量由資料庫函式一次算出
+        response = await client.rpc("get_user_stats", {"p_user_id": MOCK_USER_ID}).execute()
+        if isinstance(response.data, dict):
+            applications_count = response.data.get("applications_count") or 0
+            favorites_count = response.data.get("favorites_count") or 0
+        else:
+            # 資料庫函式尚未部署時改以 HEAD 計數，只讀取 Content-Range 不下載資料列
+            applications, favorites = await client.gather(
+                client.table("adoption_applications").eq("user_id", MOCK_USER_ID).count("exact"),
+                client.table("favorites").eq("user_id", MOCK_USER_ID).count("exact"),
+            )
+            applications_count = applications.count
+            favorites_count = favorites.count
         
         return UserStats(
             applications_count=applications_count,
@@ -0,0 +1,4 @@
+"""
+效能基準測試腳本
+於 backend 目錄下以 python -m benchmarks.<name> 執行
+"""
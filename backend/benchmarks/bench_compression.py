@@ -0,0 +1,73 @@
+"""
+回應壓縮基準測試
+以開發模式（模擬客戶端）呼叫各端點，回報每個端點未壓縮與 gzip / br 壓縮後的大小、
+節省比例與每次壓縮的 CPU 成本；另以同樣方式估算上游 PostgREST 寵物列表回應的節省量
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_compression [--pets 500] [--repeat 50]
+"""
+import argparse
+import os
+import timeit
+
+os.environ["DEBUG"] = "true"
+
+from fastapi.testclient import TestClient
+from config import settings
+from services import json_codec
+from services.compression import ENCODINGS, compress
+from services.supabase_client import get_client
+from benchmarks.bench_json import build_pets
+
+ENDPOINTS = (
+    "/api/pets?limit=50",
+    "/api/pets?limit=200",
+    "/api/pets/1",
+    "/api/stories",
+    "/api/favorites/ids",
+    "/api/messages/threads",
+)
+
+
+def report(label: str, body: bytes, repeat: int) -> None:
+    line = f"  {label:<26} {len(body):>8} B"
+    for encoding in ENCODINGS:
+        func = lambda: compress(body, encoding, settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY)
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        size = len(func())
+        saved = 1 - size / len(body) if body else 0.0
+        line += f" | {encoding:>4} {size:>7} B  節省 {saved:6.1%}  {seconds * 1e6:6.0f} µs"
+    below = " （低於門檻，不壓縮）" if len(body) < settings.COMPRESSION_MIN_SIZE else ""
+    print(line + below)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="回應壓縮基準測試")
+    parser.add_argument("--pets", type=int, default=500, help="額外加入模擬資料的寵物筆數")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    pets = build_pets(args.pets)
+    get_client()._data["pets"].extend(pets)
+
+    from main import app
+
+    print(f"編碼：{', '.join(ENCODINGS)}，gzip 等級 {settings.COMPRESSION_GZIP_LEVEL}，"
+          f"br 品質 {settings.COMPRESSION_BROTLI_QUALITY}，門檻 {settings.COMPRESSION_MIN_SIZE} B")
+    print("API 回應")
+    with TestClient(app) as client:
+        for path in ENDPOINTS:
+            response = client.get(path, headers={"Accept-Encoding": "identity"})
+            report(path, response.content, args.repeat)
+
+        # 端對端確認中介層實際壓縮
+        response = client.get(ENDPOINTS[1], headers={"Accept-Encoding": ", ".join(ENCODINGS)})
+        print(f"  中介層回應 Content-Encoding: {response.headers.get('content-encoding', '無')}")
+
+    print("上游回應（PostgREST 寵物列表）")
+    for rows in (50, 200):
+        report(f"pets × {rows}", json_codec.dumps(pets[:rows]), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
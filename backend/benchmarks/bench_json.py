@@ -0,0 +1,59 @@
+"""
+JSON 編解碼基準測試
+比較標準庫 json 與 json_codec（安裝 orjson 時）處理 10k 筆寵物列表的成本：
+  - 解碼：PostgREST 回應本體 → Python 物件（TableQuery._do_select）
+  - 編碼：API 回應內容 → JSON 位元組（預設回應類別）
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_json [--rows 10000] [--repeat 20]
+"""
+import argparse
+import json
+import timeit
+from fastapi.responses import JSONResponse
+from services import json_codec
+from services.json_codec import FastJSONResponse
+from services.supabase_client import MockSupabaseClient
+
+
+def build_pets(rows: int) -> list[dict]:
+    """以模擬資料為範本產生指定筆數的寵物資料"""
+    templates = MockSupabaseClient()._data["pets"]
+    pets = []
+    for i in range(rows):
+        pet = dict(templates[i % len(templates)])
+        pet["id"] = f"00000000-0000-0000-0000-{i:012d}"
+        pet["created_at"] = f"2024-01-01T00:00:{i % 60:02d}+00:00"
+        pets.append(pet)
+    return pets
+
+
+def measure(label: str, func, repeat: int) -> float:
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"  {label:<28} {seconds * 1000:8.2f} ms")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 編解碼基準測試")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pets = build_pets(args.rows)
+    payload = json.dumps(pets, ensure_ascii=False).encode("utf-8")
+    print(f"寵物列表 {args.rows} 筆，{len(payload) / 1024:.0f} KiB，codec={json_codec.BACKEND}")
+
+    print("解碼（上游回應）")
+    before = measure("json.loads", lambda: json.loads(payload), args.repeat)
+    after = measure(f"json_codec.loads ({json_codec.BACKEND})", lambda: json_codec.loads(payload), args.repeat)
+    print(f"  加速 {before / after:.1f}x")
+
+    print("編碼（API 回應）")
+    before = measure("JSONResponse.render", lambda: JSONResponse(pets), args.repeat)
+    after = measure(f"FastJSONResponse ({json_codec.BACKEND})", lambda: FastJSONResponse(pets), args.repeat)
+    print(f"  加速 {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+注入延遲的端點基準測試
+以開發模式（模擬客戶端）呼叫各端點，先不加延遲、再以延遲分佈包裝客戶端，
+比較兩者的端點耗時排名；上游呼叫較多（N+1）或未並行的端點在注入延遲後會排到前面
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_latency [--latency lognormal:20,120] [--repeat 20] [--seed 42]
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ["DEBUG"] = "true"
+
+from fastapi.testclient import TestClient
+from services import supabase_client
+from services.fault_injection import AsyncFaultInjectingClient, FaultInjector, parse_latency
+from services.supabase_client import AsyncMockSupabaseClient, get_client
+
+ENDPOINTS = (
+    "/api/pets?limit=50",
+    "/api/pets/1",
+    "/api/stories",
+    "/api/favorites",
+    "/api/favorites/ids",
+    "/api/applications",
+    "/api/listings",
+    "/api/messages/threads",
+    "/api/users/me/stats",
+)
+
+
+def measure(client: TestClient, repeat: int) -> dict[str, tuple[float, str]]:
+    """端點 -> (耗時中位數秒數, Server-Timing 的上游呼叫摘要)"""
+    results = {}
+    for path in ENDPOINTS:
+        seconds = []
+        calls = ""
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(path)
+            seconds.append(time.perf_counter() - started)
+            calls = response.headers.get("server-timing", "").partition('desc="')[2].partition(",")[0]
+        results[path] = (statistics.median(seconds), calls)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="注入延遲的端點基準測試")
+    parser.add_argument("--latency", default="lognormal:20,120", help="延遲分佈，格式同 FAULT_LATENCY")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from main import app
+
+    with TestClient(app) as client:
+        baseline = measure(client, args.repeat)
+        injector = FaultInjector(parse_latency(args.latency), seed=args.seed)
+        supabase_client._async_client = AsyncFaultInjectingClient(AsyncMockSupabaseClient(get_client()), injector)
+        injected = measure(client, args.repeat)
+
+    ranked = sorted(ENDPOINTS, key=lambda path: injected[path][0], reverse=True)
+    base_rank = {path: rank for rank, path in enumerate(sorted(ENDPOINTS, key=lambda p: baseline[p][0], reverse=True), 1)}
+    print(f"延遲分佈 {injector.latency!r}，每個端點 {args.repeat} 次（中位數）")
+    print(f"  {'端點':<26} {'上游呼叫':>10} {'無延遲':>10} {'排名':>4} {'注入延遲':>10} {'排名':>4}")
+    for rank, path in enumerate(ranked, 1):
+        before, calls = baseline[path]
+        after, _ = injected[path]
+        print(f"  {path:<28} {calls:>10} {before * 1e3:9.2f} ms {base_rank[path]:>4} {after * 1e3:9.1f} ms {rank:>4}")
+    print(f"  注入統計：{injector.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+模擬資料表記憶體基準測試
+以合成資料產生器產生寵物、收藏與訊息，經 JSON 往返（與自 API / 檔案載入的資料相同，字串不共用）後，
+以 tracemalloc 比較 dict 列表與欄位式 MockTable 每列佔用的記憶體，並比較讀取整張資料表的耗時
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_mock_memory [--rows 50000] [--seed 42]
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+from generate_data import DEFAULT_COUNTS, Generator
+from services import json_codec
+from services.mock_store import MockTable
+
+TABLES = ("pets", "favorites", "messages")
+
+
+def retained(build: Callable[[], Any]) -> tuple[Any, int]:
+    """build() 完成後仍佔用的位元組（建構過程中的暫時物件不計）"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def generate(table: str, rows: int, seed: int) -> bytes:
+    counts = {name: min(count, rows) for name, count in DEFAULT_COUNTS.items()}
+    counts[table] = rows
+    # 訊息隨對話交錯產出
+    source = "message_threads" if table == "messages" else table
+    generated = [row for row_table, row in Generator(counts, seed).rows(source) if row_table == table]
+    return json_codec.dumps(generated)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="模擬資料表記憶體基準測試")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for table in TABLES:
+        payload = generate(table, args.rows, args.seed)
+        dicts, dict_bytes = retained(lambda: json_codec.loads(payload))
+        columnar, columnar_bytes = retained(lambda: MockTable(json_codec.loads(payload)))
+        rows = len(dicts)
+        print(f"{table} {rows} 筆（{len(columnar.columns)} 個欄位）")
+        print(f"  dict 列表         {dict_bytes / rows:8.0f} B/列  {dict_bytes / 2 ** 20:7.1f} MiB")
+        print(f"  欄位式 MockTable  {columnar_bytes / rows:8.0f} B/列  {columnar_bytes / 2 ** 20:7.1f} MiB")
+        print(f"  節省 {1 - columnar_bytes / dict_bytes:.0%}")
+
+        before = min(timeit.repeat(lambda: [row.get("id") for row in dicts], number=1, repeat=5))
+        after = min(timeit.repeat(lambda: [row.get("id") for row in columnar], number=1, repeat=5))
+        print(f"  逐列讀取 id       dict {before * 1e3:.1f} ms / MockRow {after * 1e3:.1f} ms")
+        del dicts, columnar
+
+
+if __name__ == "__main__":
+    main()
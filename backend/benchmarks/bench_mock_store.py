@@ -0,0 +1,85 @@
+"""
+模擬資料表索引基準測試
+在收藏資料表放入大量資料列後，比較逐列掃描（原本的模擬過濾方式）與雜湊索引查詢
+eq / in_ 查詢、更新與刪除的耗時，以及排序分頁（order + limit）取前 k 筆與完整排序的差異
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_mock_store [--rows 100000] [--users 1000] [--repeat 20]
+"""
+import argparse
+import timeit
+
+from services.mock_store import MockTable
+from services.supabase_client import MockSupabaseClient, _mock_sort_value
+
+
+def build_favorites(rows: int, users: int) -> list[dict]:
+    return [
+        {
+            "id": str(i + 1),
+            "user_id": f"user-{i % users}",
+            "pet_id": str(i % 997),
+            "created_at": f"2024-01-{i % 28 + 1:02d}T00:00:{i % 60:02d}+00:00",
+        }
+        for i in range(rows)
+    ]
+
+
+def measure(label: str, func, repeat: int) -> float:
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"  {label:<28} {seconds * 1e6:10.1f} µs")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="模擬資料表索引基準測試")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = build_favorites(args.rows, args.users)
+    client = MockSupabaseClient()
+    client._data["favorites"] = MockTable(rows, ("id", "user_id"))
+    users = [f"user-{i}" for i in range(0, args.users, max(1, args.users // 10))]
+    print(f"favorites {args.rows} 筆，{args.users} 位用戶（每位約 {args.rows // args.users} 筆）")
+
+    print("eq('user_id')")
+    before = measure("逐列掃描", lambda: [row for row in rows if row.get("user_id") == "user-1"], args.repeat)
+    after = measure("雜湊索引", lambda: client.table("favorites").eq("user_id", "user-1").execute(), args.repeat)
+    print(f"  加速 {before / after:.0f}x")
+
+    print(f"in_('user_id', {len(users)} 個值)")
+    before = measure("逐列掃描", lambda: [row for row in rows if row.get("user_id") in users], args.repeat)
+    after = measure("雜湊索引", lambda: client.table("favorites").in_("user_id", users).execute(), args.repeat)
+    print(f"  加速 {before / after:.0f}x")
+
+    print("update().eq('user_id')（含索引維護）")
+    measure("雜湊索引", lambda: client.table("favorites").update({"pet_id": "1"}).eq("user_id", "user-2").execute(),
+            args.repeat)
+
+    print("delete().eq('user_id') 後重新插入")
+    table = client._data["favorites"]
+
+    def delete_and_restore() -> None:
+        deleted = table.delete(table.where([("user_id", ("user-3",))]))
+        table.extend(deleted)
+
+    measure("雜湊索引", delete_and_restore, args.repeat)
+
+    print("order('created_at', desc).order('id', desc).limit(20)（整張資料表）")
+
+    def full_sort() -> list:
+        data = list(rows)
+        for column in ("id", "created_at"):
+            data.sort(key=lambda item: _mock_sort_value(item.get(column)), reverse=True)
+        return data[:20]
+
+    before = measure("逐欄完整排序", full_sort, args.repeat)
+    after = measure("複合鍵取前 k 筆", lambda: client.table("favorites").select("id,created_at")
+                    .order("created_at", desc=True).order("id", desc=True).limit(20).execute(), args.repeat)
+    print(f"  加速 {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+查詢組裝基準測試
+比較 get_pets / get_pet 形狀的查詢在三種方式下組出請求參數的 CPU 成本：
+  - legacy：原本的 TableQuery，以 "col=eq.value" 字串儲存篩選、再以 "=" 拆回並複製標頭
+  - builder：TableQuery 建構器
+  - prepared：PreparedQuery.bind()
+不發出任何網路請求；legacy 只支援單一排序欄位，get_pets 少組一段 id 次要排序，
+因此另列 builder-1 以相同的單一排序與 legacy 對照
+
+三種方式在每一輪中輪流量測，回報各輪的中位數，避免 CPU 頻率與其他行程的干擾只落在其中一種上
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_query_build [--number 20000] [--rounds 25]
+"""
+import argparse
+import statistics
+import timeit
+from services.supabase_client import SupabaseClient, PreparedQuery
+from schemas.projection import PET_COLUMNS
+
+FILTERS = {"location": "台北市", "pet_type": "狗狗", "size": "大型"}
+ORDER = (("created_at", True), ("id", True))
+
+PETS_QUERY = PreparedQuery(
+    "pets", PET_COLUMNS, filters=("location", "age_group", "size", "gender", "pet_type"),
+    order=ORDER, count="estimated",
+)
+PET_BY_ID_QUERY = PreparedQuery("pets", PET_COLUMNS, filters=("id",), single=True)
+
+
+class LegacyTableQuery:
+    """原本 TableQuery 的建構與參數組裝（僅保留 select 路徑），作為對照組"""
+
+    def __init__(self, client: SupabaseClient, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self._filters: list[str] = []
+        self._select_columns = "*"
+        self._order_column = None
+        self._order_desc = False
+        self._limit_count = None
+        self._is_single = False
+        self._count_type = None
+        self._is_insert = False
+        self._insert_data = None
+        self._is_update = False
+        self._update_data = None
+        self._is_delete = False
+
+    def select(self, columns: str = "*", count=None):
+        self._select_columns = columns
+        self._count_type = count
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append(f"{column}=eq.{value}")
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order_column = column
+        self._order_desc = desc
+        return self
+
+    def limit(self, count: int):
+        self._limit_count = count
+        return self
+
+    def single(self):
+        self._is_single = True
+        return self
+
+    def select_request(self) -> tuple[dict, dict]:
+        params = {}
+        if self._select_columns:
+            params["select"] = self._select_columns
+        for f in self._filters:
+            key, value = f.split("=", 1)
+            params[key] = value
+        if self._order_column:
+            order_dir = "desc" if self._order_desc else "asc"
+            params["order"] = f"{self._order_column}.{order_dir}"
+        if self._limit_count:
+            params["limit"] = str(self._limit_count)
+        headers = dict(self.client.headers)
+        if self._count_type:
+            headers["Prefer"] = f"count={self._count_type}"
+        return params, headers
+
+
+def legacy_select_request(client: SupabaseClient, filters: dict, limit: int) -> tuple[dict, dict]:
+    query = LegacyTableQuery(client, "pets").select(PET_COLUMNS, count="estimated")
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    return query.order("created_at", desc=True).limit(limit).select_request()
+
+
+def builder_select_request(client: SupabaseClient, filters: dict, limit: int) -> tuple[dict, dict]:
+    query = client.table("pets").select(PET_COLUMNS, count="estimated")
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    for column, desc in ORDER:
+        query = query.order(column, desc=desc)
+    return query.limit(limit)._select_request()
+
+
+def builder_single_order_request(client: SupabaseClient, filters: dict, limit: int) -> tuple[dict, dict]:
+    query = client.table("pets").select(PET_COLUMNS, count="estimated")
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    return query.order("created_at", desc=True).limit(limit)._select_request()
+
+
+def prepared_select_request(client: SupabaseClient, filters: dict, limit: int) -> tuple[dict, dict]:
+    return PETS_QUERY.bind(client, limit=limit, **filters)._select_request()
+
+
+def measure(funcs: dict, number: int, rounds: int) -> dict[str, float]:
+    """各方式每次呼叫的微秒數（各輪中位數）"""
+    samples: dict[str, list[float]] = {label: [] for label in funcs}
+    for _ in range(rounds):
+        for label, func in funcs.items():
+            samples[label].append(timeit.timeit(func, number=number) / number * 1e6)
+    return {label: statistics.median(values) for label, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="查詢組裝基準測試")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=25)
+    args = parser.parse_args()
+
+    client = SupabaseClient("http://localhost", "bench-key")
+    assert builder_select_request(client, FILTERS, 50) == prepared_select_request(client, FILTERS, 50)
+
+    cases = {
+        "get_pets（3 個篩選）": {
+            "legacy": lambda: legacy_select_request(client, FILTERS, 50),
+            "builder-1": lambda: builder_single_order_request(client, FILTERS, 50),
+            "builder": lambda: builder_select_request(client, FILTERS, 50),
+            "prepared": lambda: prepared_select_request(client, FILTERS, 50),
+        },
+        "get_pet（依 id）": {
+            "legacy": lambda: LegacyTableQuery(client, "pets").select(PET_COLUMNS).eq("id", "1").single().select_request(),
+            "builder": lambda: client.table("pets").select(PET_COLUMNS).eq("id", "1").single()._select_request(),
+            "prepared": lambda: PET_BY_ID_QUERY.bind(client, id="1")._select_request(),
+        },
+    }
+
+    for name, funcs in cases.items():
+        print(name)
+        results = measure(funcs, args.number, args.rounds)
+        baseline = results["legacy"]
+        for label, per_call in results.items():
+            print(f"  {label:<10} {per_call:6.2f} µs/次  ({baseline / per_call:.2f}x)")
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+寵物全文搜尋基準測試
+以合成資料產生器產生寵物並建立 SearchIndex，回報建立耗時、詞彙與倒排列表大小，
+以及常見查詢取前 k 筆的耗時（中位數與最大值），並與逐筆子字串比對比較
+
+執行方式（於 backend 目錄）：
+  python -m benchmarks.bench_search [--pets 500000] [--limit 20] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+import timeit
+
+from generate_data import Generator
+from services.pet_search import SEARCH_FIELDS
+from services.search_index import SearchIndex
+
+# 「黃金 適合新手」為少見詞搭配常見片語：分數上限無法提前停止，需先求交集再計分
+QUERIES = ("黃金", "已訓練", "貓", "柴犬", "對小孩友善", "安靜 貓咪", "黃金 適合新手", "等待新家", "milo")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="寵物全文搜尋基準測試")
+    parser.add_argument("--pets", type=int, default=500000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = {"users": 1, "pets": args.pets}
+    rows = [row for _, row in Generator(counts, args.seed).rows("pets")]
+
+    index = SearchIndex(SEARCH_FIELDS)
+    started = time.perf_counter()
+    for start in range(0, len(rows), 5000):
+        index.add_many(rows[start:start + 5000])
+    elapsed = time.perf_counter() - started
+    postings = index.postings
+    print(f"pets {len(index)} 筆：建立 {elapsed:.1f} 秒（{elapsed / len(index) * 1e6:.0f} µs/筆），"
+          f"{index.terms} 個詞、{postings} 個倒排項目（約 {postings * 5 / 2 ** 20:.0f} MiB）")
+
+    texts = [index._text(row).lower() for row in rows]
+    print(f"前 {args.limit} 筆，{args.repeat} 次")
+    for query in QUERIES:
+        samples = timeit.repeat(lambda: index.search(query, limit=args.limit), number=1, repeat=args.repeat)
+        hits = len(index.search(query, limit=args.limit))
+        words = query.lower().split()
+        scan = min(timeit.repeat(lambda: [text for text in texts if all(word in text for word in words)],
+                                 number=1, repeat=3))
+        print(f"  {query:<10} {hits:>3} 筆  索引 中位數 {statistics.median(samples) * 1e3:6.2f} ms"
+              f" 最大 {max(samples) * 1e3:6.2f} ms  逐筆比對 {scan * 1e3:7.1f} ms")
+
+    # 增量更新：以新 id 加入一批文件、更新既有文件
+    batch = [{**row, "id": f"{row['id']}-copy"} for row in rows[:1000]]
+    seconds = min(timeit.repeat(lambda: index.add_many(batch), number=1, repeat=3))
+    print(f"增量更新 1000 筆 {seconds * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 負責載入環境變數和管理全域配置
 """
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 # 載入 .env 文件
@@ -19,6 +20,77 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     
+    # PostgREST 傳輸層設定（連線池、HTTP/2 與逾時）
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    HTTP_WRITE_TIMEOUT: float = float(os.getenv("HTTP_WRITE_TIMEOUT", "30"))
+    HTTP_POOL_TIMEOUT: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    # 啟動時預先建立的連線數（0 表示不預熱）
+    HTTP_WARMUP_CONNECTIONS: int = int(os.getenv("HTTP_WARMUP_CONNECTIONS", "4"))
+    
+    # 查詢結果快取（僅對標記 cached() 的 select 生效）
+    QUERY_CACHE_ENABLED: bool = os.getenv("QUERY_CACHE_ENABLED", "false").lower() == "true"
+    QUERY_CACHE_TTL: float = float(os.getenv("QUERY_CACHE_TTL", "30"))
+    QUERY_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+    # 快取保存未解碼的回應本體，以其位元組數計算上限
+    QUERY_CACHE_MAX_BYTES: int = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # 合併相同的進行中 select，只發出一次上游請求
+    QUERY_COALESCE_ENABLED: bool = os.getenv("QUERY_COALESCE_ENABLED", "true").lower() == "true"
+    
+    # 對沖讀取：select 超過延遲百分位仍未回應時再送一次，取先完成者
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.01"))
+    HEDGE_MAX_DELAY: float = float(os.getenv("HEDGE_MAX_DELAY", "2"))
+    # 每張資料表對沖請求佔一般請求的最大比例
+    HEDGE_BUDGET_RATIO: float = float(os.getenv("HEDGE_BUDGET_RATIO", "0.05"))
+    
+    # 批次寫入時每個請求的最大筆數
+    WRITE_CHUNK_SIZE: int = int(os.getenv("WRITE_CHUNK_SIZE", "500"))
+    
+    # client.gather() 同時進行的最大查詢數
+    QUERY_GATHER_CONCURRENCY: int = int(os.getenv("QUERY_GATHER_CONCURRENCY", "8"))
+    
+    # 每個請求的上游呼叫統計（Server-Timing 標頭）與 N+1 警告門檻
+    REQUEST_STATS_ENABLED: bool = os.getenv("REQUEST_STATS_ENABLED", "true").lower() == "true"
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+    
+    # 上游回應壓縮（安裝 brotli 時優先使用 br，否則 gzip）
+    UPSTREAM_COMPRESSION: bool = os.getenv("UPSTREAM_COMPRESSION", "true").lower() == "true"
+    
+    # API 回應壓縮：大小門檻（位元組）、允許的內容類型與壓縮等級
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_CONTENT_TYPES: list[str] = [
+        t.strip() for t in os.getenv("COMPRESSION_CONTENT_TYPES", "application/json,text/*").split(",") if t.strip()
+    ]
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
+    # 目錄類端點的 ETag / 304 與公開快取秒數
+    ETAG_ENABLED: bool = os.getenv("ETAG_ENABLED", "true").lower() == "true"
+    CATALOG_CACHE_MAX_AGE: int = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+    
+    # 資料後端：supabase、mock（記憶體模擬）或 sqlite（本機 SQLite 檔案）；未設定時 DEBUG 模式使用 mock
+    DATA_BACKEND: str = os.getenv("DATA_BACKEND", "").lower()
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "local.db")
+    
+    # 寵物搜尋索引的背景重建間隔（秒，0 = 只在第一次搜尋時建立）；寫入本行程時另有增量更新
+    SEARCH_INDEX_REFRESH: float = float(os.getenv("SEARCH_INDEX_REFRESH", "600"))
+    
+    # 延遲與錯誤注入（本機基準測試用，包裝 mock / sqlite 後端的非同步客戶端；supabase 後端忽略）
+    # 延遲分佈：fixed:毫秒、lognormal:中位數,p99（毫秒）或 replay:樣本檔路徑；留空且錯誤率為 0 時不啟用
+    FAULT_LATENCY: str = os.getenv("FAULT_LATENCY", "")
+    FAULT_ERROR_RATE: float = float(os.getenv("FAULT_ERROR_RATE", "0"))
+    # 注入延遲超過此秒數的呼叫視為逾時（0 = 不逾時）
+    FAULT_TIMEOUT: float = float(os.getenv("FAULT_TIMEOUT", "0"))
+    FAULT_SEED: Optional[int] = int(os.getenv("FAULT_SEED")) if os.getenv("FAULT_SEED") else None
+    
     # 開發環境設定
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     
@@ -30,6 +102,11 @@ class Settings:
         "http://127.0.0.1:3000",
     ]
     
+    @property
+    def data_backend(self) -> str:
+        """實際使用的資料後端"""
+        return self.DATA_BACKEND or ("mock" if self.DEBUG else "supabase")
+    
     def validate(self) -> None:
         """
         驗證必要的配置是否已設定
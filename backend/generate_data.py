@@ -0,0 +1,471 @@
+"""
+合成資料產生器
+依指定筆數產生用戶、寵物、故事、收藏、領養申請、刊登、對話與訊息，分佈接近正式環境：
+  - 收藏與申請集中在少數熱門寵物（Zipf 分佈），用戶活躍度同樣為長尾
+  - 每個對話的訊息數為長尾（Pareto 分佈），多數對話很短、少數很長
+資料以產生器逐筆產出，分批寫入目前的資料後端（mock / sqlite / supabase），記憶體用量與總筆數無關；
+相同 seed 與筆數會產生完全相同的資料（含 id），可重現負載測試
+
+執行方式（於 backend 目錄）：
+  python generate_data.py --backend sqlite --users 100000 --pets 1000000 --favorites 5000000 --seed 42
+相同 seed 的 id 固定，重複寫入同一個資料庫會違反主鍵，請改用新的資料庫或其他 seed
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import math
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
+
+from config import settings
+
+# 預設筆數（約為正式環境一個縣市的規模）
+DEFAULT_COUNTS = {
+    "users": 10000,
+    "pets": 50000,
+    "stories": 2000,
+    "favorites": 200000,
+    "adoption_applications": 30000,
+    "pet_listings": 5000,
+    "message_threads": 20000,
+    "messages": 200000,
+}
+
+# 寫入順序：被參照的資料表在前
+TABLES = tuple(DEFAULT_COUNTS)
+
+# 第一位用戶使用 API 路由的示範用戶 id，產生的資料可直接由端點讀取
+DEMO_USER_ID = "00000000-0000-0000-0000-000000000001"
+
+# 資料的時間範圍：end 之前的 years 年內
+DEFAULT_END = "2025-01-01T00:00:00+00:00"
+DEFAULT_YEARS = 2
+
+_SURNAMES = "陳林黃張李王吳劉蔡楊許鄭謝郭洪曾邱廖賴周"
+_GIVEN_NAMES = ("怡君", "家豪", "雅婷", "志明", "淑芬", "冠宇", "宜蓁", "承翰", "佳穎", "俊傑", "詩涵", "柏翰")
+_PET_NAMES = ("Bella", "Milo", "Luna", "Charlie", "Rocky", "Oliver", "Coco", "Max", "Lucy", "Mochi",
+              "豆豆", "小白", "咪咪", "阿福", "球球", "花花", "黑糖", "布丁", "旺財", "妞妞")
+_PET_TYPES = (("狗狗", 55), ("貓咪", 35), ("兔子", 5), ("鳥類", 3), ("其他", 2))
+_BREEDS = {
+    "狗狗": ("米克斯", "黃金獵犬", "柴犬", "拉布拉多", "貴賓", "臘腸犬", "柯基"),
+    "貓咪": ("米克斯", "美國短毛貓", "英國短毛貓", "布偶貓", "橘貓", "暹羅貓"),
+    "兔子": ("荷蘭垂耳兔", "獅子兔", "道奇兔"),
+    "鳥類": ("虎皮鸚鵡", "玄鳳鸚鵡", "文鳥"),
+    "其他": ("天竺鼠", "倉鼠", "烏龜"),
+}
+_AGE_GROUPS = (("幼年", 30), ("成年", 55), ("老年", 15))
+_AGES = {"幼年": ("3 個月", "6 個月", "8 個月", "10 個月"), "成年": ("1 歲", "2 歲", "3 歲", "5 歲"), "老年": ("8 歲", "10 歲", "12 歲")}
+_SIZES = ("小型", "中型", "大型")
+# 地點集中在大都市（依人口加權）
+_LOCATIONS = (("新北市", 40), ("台中市", 28), ("高雄市", 27), ("台北市", 25), ("桃園市", 23), ("台南市", 18),
+              ("彰化縣", 12), ("屏東縣", 8), ("新竹市", 5), ("宜蘭縣", 4), ("花蓮縣", 3), ("台東縣", 2))
+_TAGS = ("愛玩", "對小孩友善", "已訓練", "活潑", "安靜", "親人", "獨立", "愛撒嬌", "適合新手", "需要空間")
+_STATUSES = (("pending", 50), ("interview", 25), ("completed", 15), ("rejected", 10))
+_LISTING_STATUSES = (("active", 70), ("adopted", 20), ("inactive", 10))
+_SHELTERS = ("快樂爪收容所", "毛孩之家", "浪愛有家", "幸福狗園", "喵星人中途", "愛心動物協會")
+_STORY_COLORS = ("bg-primary/5", "bg-accent-peach/10", "bg-accent-mint/10")
+_PHRASES = (
+    "您好，想詢問這隻毛孩的近況。",
+    "請問下週末可以前往拜訪嗎？",
+    "我們已收到您的申請，會盡快與您聯繫。",
+    "牠最近食慾很好，也很親人喔！",
+    "需要準備哪些文件呢？",
+    "面談時間確認為週六下午兩點。",
+    "謝謝您的耐心等候。",
+    "好的，沒問題！",
+)
+
+
+def _weighted(options: tuple[tuple[Any, int], ...]) -> tuple[list, list]:
+    values = [value for value, _ in options]
+    cumulative = list(itertools.accumulate(weight for _, weight in options))
+    return values, cumulative
+
+
+class ZipfSampler:
+    """
+    在 n 個項目中以 Zipf 分佈（排名 k 的機率與 1/k^s 成正比）抽樣
+    排名以乘法雜湊打散成項目索引，熱門項目不會集中在最早建立的資料
+    """
+
+    def __init__(self, rng: random.Random, n: int, s: float = 1.1):
+        self.rng = rng
+        self.n = n
+        self._cumulative = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+        self._total = self._cumulative[-1] if n else 0.0
+        # 與 n 互質的乘數，讓 rank -> index 為一對一映射
+        self._step = next(step for step in itertools.count(2654435761 % max(n, 1) or 1) if math.gcd(step, n) == 1)
+        self._offset = rng.randrange(max(n, 1))
+
+    def index(self, rank: int) -> int:
+        return (rank * self._step + self._offset) % self.n
+
+    def sample(self) -> int:
+        rank = bisect.bisect_left(self._cumulative, self.rng.random() * self._total)
+        return self.index(min(rank, self.n - 1))
+
+    def sample_distinct(self, k: int) -> list[int]:
+        """
+        抽出 k 個不重複的項目
+        k 接近 n 時改為均勻抽樣；長尾項目重複抽中太多次時，剩餘名額以均勻抽樣補足
+        """
+        k = min(k, self.n)
+        if k * 2 > self.n:
+            return self.rng.sample(range(self.n), k)
+        chosen: dict[int, None] = {}
+        attempts = k * 8
+        while len(chosen) < k and attempts:
+            chosen.setdefault(self.sample())
+            attempts -= 1
+        while len(chosen) < k:
+            chosen.setdefault(self.rng.randrange(self.n))
+        return list(chosen)
+
+
+def _quotas(rng: random.Random, total: int, n: int, s: float) -> Iterator[int]:
+    """
+    將 total 筆分配給 n 個項目（例如每位用戶的收藏數），份額依 Zipf 權重並以亂數打散；
+    以累計取整分配，總和恰為 total
+    """
+    if n == 0:
+        return
+    sampler = ZipfSampler(rng, n, s)
+    weights = [0.0] * n
+    for rank in range(n):
+        weights[sampler.index(rank)] = 1.0 / ((rank + 1) ** s)
+    scale = total / sum(weights)
+    assigned = running = 0.0
+    for weight in weights:
+        running += weight * scale
+        quota = round(running) - round(assigned)
+        assigned = running
+        yield quota
+
+
+class Generator:
+    """
+    依 seed 產生各資料表的資料列
+    id 由 (seed, 資料表, 序號) 推導，不需保存已產生的 id 即可建立外鍵
+    """
+
+    def __init__(self, counts: dict[str, int], seed: int = 42, end: str = DEFAULT_END,
+                 years: int = DEFAULT_YEARS, demo_user: bool = True):
+        self.counts = {**DEFAULT_COUNTS, **counts}
+        self.seed = seed
+        self.end = datetime.fromisoformat(end)
+        self.span = timedelta(days=365 * years).total_seconds()
+        self.demo_user = demo_user
+
+    def _rng(self, table: str) -> random.Random:
+        # 每張資料表使用獨立的亂數序列，調整某張表的筆數不影響其他表
+        return random.Random(f"{self.seed}:{table}")
+
+    def row_id(self, table: str, index: int) -> str:
+        if table == "users" and index == 0 and self.demo_user:
+            return DEMO_USER_ID
+        prefix = zlib.crc32(f"{self.seed}:{table}".encode())
+        return f"{prefix:08x}-{index >> 48 & 0xffff:04x}-4{index >> 36 & 0xfff:03x}-8{index >> 24 & 0xfff:03x}-{index & 0xffffff:06x}{prefix & 0xffffff:06x}"
+
+    def _timestamp(self, fraction: float) -> str:
+        """時間範圍內的時間點，fraction 為 0（最早）到 1（最新）"""
+        return (self.end - timedelta(seconds=self.span * (1 - fraction))).isoformat()
+
+    def rows(self, table: str) -> Iterator[tuple[str, dict]]:
+        """產出 (資料表, 資料列)；message_threads 會交錯產出對應的 messages"""
+        return getattr(self, f"_{table}")(self._rng(table), self.counts[table])
+
+    def _users(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        for i in range(n):
+            yield "users", {
+                "id": self.row_id("users", i),
+                "name": rng.choice(_SURNAMES) + rng.choice(_GIVEN_NAMES),
+                "email": f"user{i:07d}.{self.seed}@example.com",
+                "avatar_url": f"https://picsum.photos/seed/user{i}/300/300",
+                "member_since": self._timestamp(i / max(n, 1))[:10],
+                "created_at": self._timestamp(i / max(n, 1)),
+            }
+
+    def _pets(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        types, type_weights = _weighted(_PET_TYPES)
+        groups, group_weights = _weighted(_AGE_GROUPS)
+        locations, location_weights = _weighted(_LOCATIONS)
+        for i in range(n):
+            pet_type = rng.choices(types, cum_weights=type_weights)[0]
+            age_group = rng.choices(groups, cum_weights=group_weights)[0]
+            name = rng.choice(_PET_NAMES)
+            yield "pets", {
+                "id": self.row_id("pets", i),
+                "name": name,
+                "breed": rng.choice(_BREEDS[pet_type]),
+                "age": rng.choice(_AGES[age_group]),
+                "age_group": age_group,
+                "gender": rng.choice(("公", "母")),
+                "size": rng.choice(_SIZES),
+                "pet_type": pet_type,
+                "location": rng.choices(locations, cum_weights=location_weights)[0],
+                "distance": f"{rng.uniform(0.5, 30):.1f} 公里外",
+                "image_url": f"https://picsum.photos/seed/pet{i}/800/600",
+                "description": f"{name} 是一隻{rng.choice(_TAGS)}的{pet_type}，正在等待新家。",
+                "adoption_fee": rng.choice((0, 0, 500, 1000, 1500, 2000)),
+                "is_vaccinated": rng.random() < 0.8,
+                "is_neutered": rng.random() < 0.6,
+                "is_featured": rng.random() < 0.02,
+                "tags": rng.sample(_TAGS, rng.randint(1, 4)),
+                # 依序號遞增，與正式資料的建立順序一致
+                "created_at": self._timestamp((i + rng.random()) / max(n, 1)),
+            }
+
+    def _stories(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        for i in range(n):
+            pet_name = rng.choice(_PET_NAMES)
+            yield "stories", {
+                "id": self.row_id("stories", i),
+                "author": rng.choice(_SURNAMES) + rng.choice(_GIVEN_NAMES),
+                "pet_name": pet_name,
+                "content": f"{pet_name} 為我們的生活帶來了無限歡樂！{rng.choice(_PHRASES)}",
+                "image_url": f"https://picsum.photos/seed/story{i}/600/400",
+                "color": rng.choice(_STORY_COLORS),
+                "created_at": self._timestamp((i + rng.random()) / max(n, 1)),
+            }
+
+    def _user_pet_pairs(self, rng: random.Random, n: int, user_skew: float,
+                        pet_skew: float) -> Iterator[tuple[int, int]]:
+        """產出 n 組不重複的 (用戶, 寵物)：用戶活躍度與寵物熱門度皆為 Zipf 分佈"""
+        users, pets = self.counts["users"], self.counts["pets"]
+        if not users or not pets:
+            return
+        sampler = ZipfSampler(rng, pets, pet_skew)
+        for user, quota in enumerate(_quotas(rng, n, users, user_skew)):
+            for pet in sampler.sample_distinct(quota):
+                yield user, pet
+
+    def _favorites(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        for i, (user, pet) in enumerate(self._user_pet_pairs(rng, n, 0.8, 1.1)):
+            yield "favorites", {
+                "id": self.row_id("favorites", i),
+                "user_id": self.row_id("users", user),
+                "pet_id": self.row_id("pets", pet),
+                "created_at": self._timestamp(rng.random()),
+            }
+
+    def _adoption_applications(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        statuses, status_weights = _weighted(_STATUSES)
+        for i, (user, pet) in enumerate(self._user_pet_pairs(rng, n, 1.0, 1.2)):
+            status = rng.choices(statuses, cum_weights=status_weights)[0]
+            interview = status in ("interview", "completed")
+            yield "adoption_applications", {
+                "id": self.row_id("adoption_applications", i),
+                "user_id": self.row_id("users", user),
+                "pet_id": self.row_id("pets", pet),
+                "status": status,
+                "housing_type": rng.choice(("公寓", "透天", "大樓")),
+                "outdoor_space": rng.choice(("無", "陽台", "庭院")),
+                "is_renting": rng.random() < 0.4,
+                "has_pets": rng.random() < 0.3,
+                "experience": rng.choice(("第一次養寵物", "曾經養過狗", "曾經養過貓", "家中已有寵物")),
+                "full_name": rng.choice(_SURNAMES) + rng.choice(_GIVEN_NAMES),
+                "phone": f"09{rng.randrange(10 ** 8):08d}",
+                "email": f"user{user:07d}.{self.seed}@example.com",
+                "interview_date": self._timestamp(rng.random())[:10] if interview else None,
+                "interview_time": f"{rng.randint(9, 17):02d}:00:00" if interview else None,
+                "created_at": self._timestamp(rng.random()),
+            }
+
+    def _pet_listings(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        types, type_weights = _weighted(_PET_TYPES)
+        statuses, status_weights = _weighted(_LISTING_STATUSES)
+        users = self.counts["users"]
+        for i in range(n if users else 0):
+            pet_type = rng.choices(types, cum_weights=type_weights)[0]
+            yield "pet_listings", {
+                "id": self.row_id("pet_listings", i),
+                "user_id": self.row_id("users", rng.randrange(users)),
+                "name": rng.choice(_PET_NAMES),
+                "pet_type": pet_type,
+                "breed": rng.choice(_BREEDS[pet_type]),
+                "age": rng.choice(_AGES["成年"]),
+                "gender": rng.choice(("公", "母")),
+                "size": rng.choice(_SIZES),
+                "description": rng.choice(_PHRASES),
+                "image_url": f"https://picsum.photos/seed/listing{i}/800/600",
+                "status": rng.choices(statuses, cum_weights=status_weights)[0],
+                "created_at": self._timestamp((i + rng.random()) / max(n, 1)),
+            }
+
+    def _message_threads(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        users = self.counts["users"]
+        if not users:
+            return
+        # 每個對話的訊息數：Pareto（alpha 1.5）權重，總和恰為 messages 筆數
+        lengths = _pareto_quotas(rng, self.counts["messages"], n)
+        message = 0
+        for i, length in enumerate(lengths):
+            thread_id = self.row_id("message_threads", i)
+            started = (i + rng.random()) / max(n, 1)
+            yield "message_threads", {
+                "id": thread_id,
+                "user_id": self.row_id("users", rng.randrange(users)),
+                "shelter_name": rng.choice(_SHELTERS),
+                "shelter_avatar": f"https://picsum.photos/seed/shelter{i % 50}/100/100",
+                "pet_name": rng.choice(_PET_NAMES),
+                "created_at": self._timestamp(started * 0.9),
+            }
+            # 最後幾則對方訊息在部分對話中尚未讀取
+            unread_tail = rng.randint(1, 3) if rng.random() < 0.3 else 0
+            offset = started * 0.9
+            for position in range(length):
+                offset = min(1.0, offset + rng.expovariate(1.0) * 0.0005)
+                sender = "other" if position % 2 == 0 else "user"
+                yield "messages", {
+                    "id": self.row_id("messages", message),
+                    "thread_id": thread_id,
+                    "sender": sender,
+                    "text": rng.choice(_PHRASES),
+                    "image_url": f"https://picsum.photos/seed/msg{message}/400/300" if rng.random() < 0.03 else None,
+                    "is_read": not (sender == "other" and position >= length - unread_tail),
+                    "created_at": self._timestamp(offset),
+                }
+                message += 1
+
+    def _messages(self, rng: random.Random, n: int) -> Iterator[tuple[str, dict]]:
+        # 訊息隨對話一起產生
+        return iter(())
+
+
+def _pareto_quotas(rng: random.Random, total: int, n: int, alpha: float = 1.5) -> list[int]:
+    """以 Pareto 權重將 total 分配給 n 個項目，總和恰為 total"""
+    if n == 0:
+        return []
+    weights = [rng.paretovariate(alpha) for _ in range(n)]
+    scale = total / sum(weights)
+    quotas, assigned, running = [], 0, 0.0
+    for weight in weights:
+        running += weight * scale
+        quota = round(running) - assigned
+        assigned += quota
+        quotas.append(quota)
+    return quotas
+
+
+class BulkWriter:
+    """
+    依資料表暫存資料列，滿 chunk_size 時以一次批次 insert 寫入
+    寫入子表前先寫入父表的暫存資料，避免違反外鍵
+    """
+
+    PARENTS = {"messages": ("message_threads",)}
+
+    def __init__(self, client: Any, chunk_size: int = 5000, concurrency: int = 4, upsert_ids: tuple[str, ...] = ()):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        # 可能已存在的資料列（例如示範用戶）個別以 upsert 寫入並略過已存在者，其餘批次 insert
+        self.upsert_ids = frozenset(upsert_ids)
+        self.buffers: dict[str, list] = {}
+        # 實際寫入成功的筆數與寫入失敗的筆數（已存在而略過的 upsert 兩者皆不計）
+        self.written: dict[str, int] = {}
+        self.failed: dict[str, int] = {}
+
+    def _count(self, table: str, rows: int, result: Any) -> None:
+        # 分批寫入時 count 只含成功的批次
+        written = min(result.count or 0, rows)
+        if written:
+            self.written[table] = self.written.get(table, 0) + written
+        if result.error:
+            self.failed[table] = self.failed.get(table, 0) + rows - written
+
+    async def add(self, table: str, row: dict) -> None:
+        if row.get("id") in self.upsert_ids:
+            result = await self.client.table(table).upsert(row, on_conflict="id", ignore_duplicates=True).execute()
+            self._count(table, 1, result)
+            return
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            await self.flush(table)
+
+    async def flush(self, table: str) -> None:
+        for parent in self.PARENTS.get(table, ()):
+            await self.flush(parent)
+        rows = self.buffers.get(table)
+        if not rows:
+            return
+        self.buffers[table] = []
+        query = self.client.table(table).insert(rows, chunk_size=settings.WRITE_CHUNK_SIZE, concurrency=self.concurrency)
+        self._count(table, len(rows), await query.execute())
+
+    async def close(self) -> None:
+        for table in list(self.buffers):
+            await self.flush(table)
+
+
+async def generate(client: Any, counts: Optional[dict[str, int]] = None, seed: int = 42,
+                   chunk_size: int = 5000, concurrency: int = 4, tables: tuple[str, ...] = TABLES,
+                   **options: Any) -> dict[str, int]:
+    """
+    產生資料並寫入非同步客戶端，返回各資料表寫入的筆數
+    options 傳給 Generator（end / years / demo_user）
+    """
+    generator = Generator(counts or {}, seed=seed, **options)
+    writer = BulkWriter(client, chunk_size, concurrency, upsert_ids=(DEMO_USER_ID,) if generator.demo_user else ())
+    for table in tables:
+        before, failed_before = dict(writer.written), dict(writer.failed)
+        started = time.perf_counter()
+        for row_table, row in generator.rows(table):
+            await writer.add(row_table, row)
+        await writer.close()
+        elapsed = time.perf_counter() - started
+        for name in {**writer.written, **writer.failed}:
+            written = writer.written.get(name, 0) - before.get(name, 0)
+            failed = writer.failed.get(name, 0) - failed_before.get(name, 0)
+            if written or failed:
+                note = f"  失敗 {failed} 筆" if failed else ""
+                print(f"  {name:<22} {written:>10} 筆  {elapsed:6.1f} s  {written / max(elapsed, 1e-9):>9.0f} 筆/s{note}")
+    if writer.failed:
+        print(f"⚠️ 部分批次寫入失敗（未計入寫入筆數）：共 {sum(writer.failed.values())} 筆 {writer.failed}")
+    return writer.written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="合成資料產生器")
+    parser.add_argument("--backend", choices=("mock", "sqlite", "supabase"), default=settings.data_backend,
+                        help="寫入的資料後端（預設依 DATA_BACKEND / DEBUG）")
+    parser.add_argument("--seed", type=int, default=42)
+    for table, count in DEFAULT_COUNTS.items():
+        parser.add_argument(f"--{table.replace('_', '-')}", type=int, default=count, dest=table)
+    parser.add_argument("--tables", default=",".join(TABLES), help="只產生部分資料表（逗號分隔，messages 隨 message_threads 產生）")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每次批次寫入的筆數")
+    parser.add_argument("--concurrency", type=int, default=4, help="Supabase 同時送出的批次數")
+    parser.add_argument("--end", default=DEFAULT_END, help="資料時間範圍的結束時間（ISO 8601）")
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--no-demo-user", action="store_true", help="第一位用戶不使用示範用戶 id")
+    args = parser.parse_args()
+
+    settings.DATA_BACKEND = args.backend
+    from services.supabase_client import get_async_client, close_clients
+
+    counts = {table: getattr(args, table) for table in TABLES}
+    tables = tuple(table for table in TABLES if table in args.tables.split(","))
+    print(f"🚀 產生合成資料（後端 {args.backend}，seed {args.seed}）")
+
+    async def run() -> None:
+        try:
+            started = time.perf_counter()
+            written = await generate(
+                get_async_client(), counts, seed=args.seed, chunk_size=args.chunk_size,
+                concurrency=args.concurrency, tables=tables, end=args.end, years=args.years,
+                demo_user=not args.no_demo_user,
+            )
+            print(f"✅ 完成：共 {sum(written.values())} 筆，{time.perf_counter() - started:.1f} s")
+        finally:
+            await close_clients()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -121,6 +121,30 @@ CREATE INDEX IF NOT EXISTS idx_favorites_user ON favorites(user_id);
 CREATE INDEX IF NOT EXISTS idx_applications_user ON adoption_applications(user_id);
 CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages(thread_id);
 
+-- 每位用戶對同一隻寵物只能有一筆申請（供 upsert on_conflict 使用）
+-- 既有資料庫可能已有重複的申請，建立唯一索引前每組 (user_id, pet_id) 只保留進度最前的一筆
+-- （completed > interview > pending > rejected，同進度時保留最早送出者）；沒有重複時不做任何事
+DELETE FROM adoption_applications a
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY user_id, pet_id
+        ORDER BY CASE status WHEN 'completed' THEN 0 WHEN 'interview' THEN 1 WHEN 'pending' THEN 2 ELSE 3 END,
+                 created_at, id
+    ) AS position
+    FROM adoption_applications
+    WHERE user_id IS NOT NULL AND pet_id IS NOT NULL
+) ranked
+WHERE a.id = ranked.id AND ranked.position > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_user_pet ON adoption_applications(user_id, pet_id);
+
+-- 鍵集分頁（created_at, id）使用的排序索引
+CREATE INDEX IF NOT EXISTS idx_pets_created ON pets(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_stories_created ON stories(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_applications_user_created ON adoption_applications(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_listings_user_created ON pet_listings(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_messages_thread_created ON messages(thread_id, created_at, id);
+
 -- =============================================
 -- 插入測試用戶
 -- =============================================
@@ -393,6 +417,55 @@ VALUES (
     'active'
 );
 
+-- =============================================
+-- 彙總函式（供 PostgREST /rpc 呼叫）
+-- =============================================
+-- 用戶的申請與收藏數量
+CREATE OR REPLACE FUNCTION get_user_stats(p_user_id UUID)
+RETURNS JSON
+LANGUAGE sql STABLE
+AS $$
+    SELECT json_build_object(
+        'applications_count', (SELECT COUNT(*) FROM adoption_applications a WHERE a.user_id = p_user_id),
+        'favorites_count', (SELECT COUNT(*) FROM favorites f WHERE f.user_id = p_user_id)
+    );
+$$;
+
+-- 用戶的對話列表，附帶最後一則訊息與未讀數量
+CREATE OR REPLACE FUNCTION get_message_threads(p_user_id UUID)
+RETURNS TABLE (
+    id UUID,
+    shelter_name VARCHAR,
+    shelter_avatar TEXT,
+    pet_name VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE,
+    last_text TEXT,
+    last_image_url TEXT,
+    last_created_at TIMESTAMP WITH TIME ZONE,
+    unread_count BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        t.id, t.shelter_name, t.shelter_avatar, t.pet_name, t.created_at,
+        m.text, m.image_url, m.created_at,
+        (SELECT COUNT(*) FROM messages u
+          WHERE u.thread_id = t.id AND u.sender = 'other' AND u.is_read = FALSE)
+    FROM message_threads t
+    LEFT JOIN LATERAL (
+        SELECT lm.text, lm.image_url, lm.created_at
+        FROM messages lm
+        WHERE lm.thread_id = t.id
+        ORDER BY lm.created_at DESC, lm.id DESC
+        LIMIT 1
+    ) m ON TRUE
+    WHERE t.user_id = p_user_id
+    ORDER BY t.created_at DESC;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_message_threads_user ON message_threads(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_messages_unread ON messages(thread_id) WHERE sender = 'other' AND is_read = FALSE;
+
 -- =============================================
 -- 設定 RLS (Row Level Security) - 可選
 -- =============================================
@@ -4,8 +4,6 @@ FastAPI 應用程式入口
 
 啟動方式：
   uvicorn main:app --reload --port 8000
-"""
-  uvicorn main:app --reload --port 8000
 """
 import sys
 import os
@@ -17,7 +15,14 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
-from routers import (
+from services.supabase_client import open_clients, close_clients, get_async_client
+from services.json_codec import FastJSONResponse
+from services.request_stats import RequestStatsMiddleware
+from services.compression import CompressionMiddleware
+from services.conditional import ConditionalGetMiddleware
+from services import pet_search
+from api.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from api import (
     pets_router,
     users_router,
     favorites_router,
@@ -37,15 +42,24 @@ async def lifespan(app: FastAPI):
     # 啟動時執行
     print("🚀 正在啟動寵物領養平台 API...")
     
-    # 驗證配置（在開發模式下可跳過）
-    if not settings.DEBUG:
+    # 驗證配置（使用模擬或本機後端時可跳過）
+    if settings.data_backend == "supabase":
         try:
             settings.validate()
             print("✅ Supabase 配置驗證成功")
         except ValueError as e:
             print(f"⚠️ 配置警告: {e}")
     else:
-        print("🔧 開發模式：跳過配置驗證")
+        print(f"🔧 使用 {settings.data_backend} 後端：跳過配置驗證")
+    
+    # 建立資料庫客戶端並預熱連線池
+    await open_clients()
+    
+    # 於背景建立寵物搜尋索引（在工作執行緒中進行，不延遲啟動）
+    try:
+        pet_search.warm_up(get_async_client())
+    except ValueError as e:
+        print(f"⚠️ 略過搜尋索引預熱: {e}")
     
     print("✅ API 啟動完成")
     
@@ -53,6 +67,8 @@ async def lifespan(app: FastAPI):
     
     # 關閉時執行
     print("👋 正在關閉 API...")
+    await pet_search.close()
+    await close_clients()
 
 
 # 創建 FastAPI 應用實例
@@ -61,6 +77,7 @@ app = FastAPI(
     description="PawsAdopt 寵物領養平台的後端 API 服務",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # 配置 CORS 中間件
@@ -70,8 +87,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, "Server-Timing"],
 )
 
+# 每個請求的上游呼叫統計：Server-Timing 標頭、開發模式日誌與 N+1 警告
+if settings.REQUEST_STATS_ENABLED:
+    app.add_middleware(
+        RequestStatsMiddleware,
+        log=settings.DEBUG,
+        repeat_threshold=settings.N_PLUS_ONE_THRESHOLD,
+    )
+
+# 目錄類端點的 ETag 與 Cache-Control：公開資料可由瀏覽器與 CDN 快取，用戶資料每次重新驗證
+# 搜尋結果隨索引重建而變動，且查詢組合過多不利於 CDN，每次重新驗證
+if settings.ETAG_ENABLED:
+    catalog_cache = f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}"
+    app.add_middleware(
+        ConditionalGetMiddleware,
+        rules={
+            "/api/pets": catalog_cache,
+            "/api/pets/search": "no-cache",
+            "/api/stories": catalog_cache,
+            "/api/favorites/ids": "private, no-cache",
+        },
+    )
+
+# 回應壓縮（最外層，其他中介層處理的都是未壓縮的本體）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        min_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=tuple(settings.COMPRESSION_CONTENT_TYPES),
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 from fastapi import Request
 from fastapi.responses import JSONResponse
 import traceback
@@ -102,6 +152,19 @@ async def health_check():
     }
 
 
+# 查詢快取統計端點
+@app.get("/cache/stats", tags=["系統"])
+async def cache_stats():
+    """
+    查詢快取的命中、未命中與淘汰統計
+    用於評估快取容量與 TTL 設定
+    """
+    cache = getattr(get_async_client(), "cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
 # 註冊 API 路由
 app.include_router(pets_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
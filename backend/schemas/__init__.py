@@ -8,6 +8,15 @@ from .application import AdoptionApplication, AdoptionApplicationCreate
 from .message import Message, MessageCreate, MessageThread
 from .listing import PetListing, PetListingCreate
 from .story import Story
+from .projection import (
+    projection,
+    PET_COLUMNS,
+    STORY_COLUMNS,
+    USER_COLUMNS,
+    APPLICATION_COLUMNS,
+    LISTING_COLUMNS,
+    MESSAGE_COLUMNS,
+)
 
 __all__ = [
     "Pet",
@@ -23,4 +32,11 @@ __all__ = [
     "PetListing",
     "PetListingCreate",
     "Story",
+    "projection",
+    "PET_COLUMNS",
+    "STORY_COLUMNS",
+    "USER_COLUMNS",
+    "APPLICATION_COLUMNS",
+    "LISTING_COLUMNS",
+    "MESSAGE_COLUMNS",
 ]
@@ -6,6 +6,7 @@ from typing import Optional
 from datetime import date, time
 from pydantic import BaseModel, Field, EmailStr
 from enum import Enum
+from .pet import Pet
 
 
 class ApplicationStatus(str, Enum):
@@ -38,6 +39,7 @@ class AdoptionApplication(AdoptionApplicationBase):
     interview_date: Optional[date] = Field(None, description="面談日期")
     interview_time: Optional[str] = Field(None, description="面談時間")
     created_at: Optional[str] = Field(None, description="創建時間")
+    pet: Optional[Pet] = Field(None, description="申請的寵物")
 
     class Config:
         from_attributes = True
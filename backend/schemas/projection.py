@@ -0,0 +1,31 @@
+"""
+欄位投影註冊表
+由回應模式推導各查詢需要的資料表欄位，取代 select("*")
+"""
+from pydantic import BaseModel
+from .pet import Pet
+from .user import User
+from .application import AdoptionApplication
+from .message import Message
+from .listing import PetListing
+from .story import Story
+
+
+def projection(model: type[BaseModel], exclude: tuple[str, ...] = (), extra: tuple[str, ...] = ()) -> str:
+    """
+    由模式欄位組出 select 欄位字串
+    exclude 為由程式計算、不存在於資料表的欄位；extra 為額外需要讀取的資料表欄位
+    """
+    columns = [name for name in model.model_fields if name not in exclude]
+    columns += [name for name in extra if name not in columns]
+    return ",".join(columns)
+
+
+# 列表端點以 (created_at, id) 分頁，需一併讀取 created_at
+PET_COLUMNS = projection(Pet, extra=("created_at",))
+STORY_COLUMNS = projection(Story, extra=("created_at",))
+USER_COLUMNS = projection(User)
+# 申請列表以嵌入資源一併讀取寵物，回應中的 pet 欄位
+APPLICATION_COLUMNS = projection(AdoptionApplication, exclude=("status_label", "pet"), extra=(f"pet:pets({PET_COLUMNS})",))
+LISTING_COLUMNS = projection(PetListing)
+MESSAGE_COLUMNS = projection(Message, exclude=("timestamp",), extra=("created_at",))
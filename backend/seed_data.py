@@ -130,9 +130,11 @@ async def seed_pets():
     try:
         # 嘗試插入使用者
         print(f"👤 嘗試建立測試使用者 ({test_user_id})...")
-        res = client.table("users").insert(user_data).execute()
+        res = client.table("users").upsert(user_data, on_conflict="id", ignore_duplicates=True).execute()
         if hasattr(res, 'data') and len(res.data) > 0:
             print("✅ 成功插入測試使用者！")
+        else:
+            print("ℹ️ 測試使用者已存在，跳過插入。")
     except Exception as e:
         print(f"⚠️ 使用者插入異常 (可能已存在或 schema 不符): {e}")
         # 繼續執行，因為如果已存在也是 ok 的
@@ -156,19 +158,10 @@ async def seed_pets():
     ]
 
     try:
-        # 先檢查對話是否已存在（避免重複插入錯誤）
-        existing = client.table("message_threads").select("id").execute()
-        existing_ids = [item['id'] for item in existing.data] if existing.data else []
-        
-        new_threads = [t for t in threads_data if t['id'] not in existing_ids]
-        
-        if new_threads:
-            res = client.table("message_threads").insert(new_threads).execute()
-            print(f"📄 API 回應: {res}")
-            if hasattr(res, 'data') and len(res.data) > 0:
-                print(f"✅ 成功插入 {len(new_threads)} 筆對話資料！")
-            else:
-                print("❌ 插入似已執行但無資料返回，可能失敗。")
+        # 已存在的對話由主鍵略過（避免重複插入錯誤）
+        res = client.table("message_threads").upsert(threads_data, on_conflict="id", ignore_duplicates=True).execute()
+        if hasattr(res, 'data') and len(res.data) > 0:
+            print(f"✅ 成功插入 {len(res.data)} 筆對話資料！")
         else:
             print("ℹ️ 對話資料已存在，跳過插入。")
 
@@ -227,10 +220,9 @@ async def seed_pets():
                "pet_id": real_pet_id 
             }
         try:
-            # 先檢查是否已收藏
-            check = client.table("favorites").select("*").eq("user_id", test_user_id).eq("pet_id", "1").execute()
-            if not check.data:
-                client.table("favorites").insert(fav_data).execute()
+            # 已收藏時由唯一鍵略過
+            res = client.table("favorites").upsert(fav_data, on_conflict="user_id,pet_id", ignore_duplicates=True).execute()
+            if res.data:
                 print("✅ 成功插入測試收藏紀錄！")
             
             # 再讀取
@@ -0,0 +1,140 @@
+"""
+回應壓縮
+依用戶端的 Accept-Encoding 以 brotli 或 gzip 壓縮 API 回應，
+只處理超過大小門檻且內容類型在允許清單中的回應
+"""
+import gzip
+from typing import Any, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 依部署環境而定
+    brotli = None
+
+# 可用的編碼，依偏好排序
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    由 Accept-Encoding 選出要使用的編碼，q=0 視為不接受
+    多個可用編碼的 q 值相同時依 ENCODINGS 的順序
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """以指定編碼壓縮"""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI 中介層：壓縮單次送出的回應本體
+    串流回應（分多次送出）、已有 Content-Encoding、小於 min_size 或內容類型不在 content_types 的回應原樣送出
+    """
+
+    def __init__(self, app: Any, min_size: int = 1024, content_types: tuple[str, ...] = ("application/json",),
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.min_size = min_size
+        self.content_types = tuple(content_type.lower() for content_type in content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        passthrough = False
+
+        async def send_compressed(message: dict) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # 等到本體確定後才送出標頭
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers = []
+            vary = []
+            for name, value in start_message.get("headers", []):
+                if name == b"vary":
+                    vary.append(value)
+                elif name == b"etag" and not value.startswith(b"W/"):
+                    # 壓縮後的表示與原本的位元組不同，強 ETag 改為弱 ETag
+                    headers.append((name, b"W/" + value))
+                elif name != b"content-length":
+                    headers.append((name, value))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start_message: dict, body: bytes) -> bool:
+        if len(body) < self.min_size:
+            return False
+        content_type = b""
+        for name, value in start_message.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        media_type = content_type.decode("latin-1").split(";", 1)[0].strip().lower()
+        return any(
+            media_type == allowed or (allowed.endswith("/*") and media_type.startswith(allowed[:-1]))
+            for allowed in self.content_types
+        )
@@ -0,0 +1,108 @@
+"""
+條件式 GET
+為指定路徑的 GET 回應計算內容雜湊作為強 ETag，附上 Cache-Control，
+請求帶有相符的 If-None-Match 時改回 304 Not Modified，不送出本體
+"""
+import hashlib
+from typing import Any, Optional
+
+
+def compute_etag(body: bytes) -> str:
+    """以回應本體的雜湊作為強 ETag"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match 使用弱比較：忽略 W/ 前綴，* 符合任何回應
+    （壓縮中介層會把 ETag 改為弱 ETag，用戶端送回時仍需視為相符）
+    """
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI 中介層：rules 為 路徑前綴 -> Cache-Control，前綴本身與其子路徑都會套用
+    只處理單次送出本體的 200 回應，其他回應原樣送出
+    """
+
+    def __init__(self, app: Any, rules: dict[str, str]):
+        self.app = app
+        # 較長的前綴優先，讓子路徑可以有不同的快取策略
+        self.rules = sorted(rules.items(), key=lambda rule: len(rule[0]), reverse=True)
+
+    def _cache_control(self, path: str) -> Optional[str]:
+        for prefix, cache_control in self.rules:
+            if path == prefix or path.startswith(prefix + "/"):
+                return cache_control
+        return None
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        cache_control = self._cache_control(scope["path"])
+        if cache_control is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = ""
+        for name, value in scope.get("headers", []):
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        start_message: Optional[dict] = None
+        passthrough = False
+
+        async def send_conditional(message: dict) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = compute_etag(message.get("body", b""))
+            extra = [(b"etag", etag.encode("latin-1")), (b"cache-control", cache_control.encode("latin-1"))]
+
+            if if_none_match and etag_matches(if_none_match, etag):
+                # 304 不帶本體，只保留與快取相關的標頭
+                headers = [
+                    (name, value) for name, value in start_message.get("headers", [])
+                    if name in (b"vary", b"server-timing") or name.startswith(b"access-control-")
+                ]
+                await send({"type": "http.response.start", "status": 304, "headers": headers + extra})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name not in (b"etag", b"cache-control")
+            ]
+            await send({**start_message, "headers": headers + extra})
+            await send(message)
+
+        await self.app(scope, receive, send_conditional)
@@ -0,0 +1,285 @@
+"""
+延遲與錯誤注入
+包裝任一客戶端，每次上游呼叫（execute）前依延遲分佈等待，並依比例注入錯誤與逾時，
+讓模擬 / SQLite 後端的本機基準測試也反映正式環境的往返成本（N+1 端點會明顯變慢）
+只用於本機後端，Supabase 後端不會被包裝
+
+延遲分佈以字串設定：
+  fixed:20             固定 20 ms
+  lognormal:20,120     對數常態，中位數 20 ms、p99 120 ms
+  replay:latency.txt   自檔案重播正式環境的樣本（每行一個毫秒數，可為 CSV 的第一欄）
+"""
+import abc
+import asyncio
+import math
+import random
+import time
+from typing import Any, Callable, Optional
+
+# 標準常態分佈的 99 百分位
+_Z99 = 2.3263478740408408
+
+
+class LatencyModel(abc.ABC):
+    """延遲分佈：sample() 返回一次呼叫的秒數"""
+
+    @abc.abstractmethod
+    def sample(self, rng: random.Random) -> float:
+        ...
+
+
+class FixedLatency(LatencyModel):
+    def __init__(self, ms: float):
+        self.seconds = ms / 1000
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+    def __repr__(self) -> str:
+        return f"fixed:{self.seconds * 1000:g}"
+
+
+class LognormalLatency(LatencyModel):
+    """以中位數與 p99（毫秒）決定的對數常態分佈，長尾與實際網路延遲相近"""
+
+    def __init__(self, median_ms: float, p99_ms: float):
+        if median_ms <= 0 or p99_ms < median_ms:
+            raise ValueError("lognormal 延遲需滿足 0 < 中位數 <= p99")
+        self.median_ms = median_ms
+        self.p99_ms = p99_ms
+        self.mu = math.log(median_ms / 1000)
+        self.sigma = math.log(p99_ms / median_ms) / _Z99
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+    def __repr__(self) -> str:
+        return f"lognormal:{self.median_ms:g},{self.p99_ms:g}"
+
+
+class ReplayLatency(LatencyModel):
+    """自正式環境量測的延遲樣本（毫秒）中隨機取樣"""
+
+    def __init__(self, samples_ms: list[float]):
+        if not samples_ms:
+            raise ValueError("replay 延遲樣本不可為空")
+        self.samples = [ms / 1000 for ms in samples_ms]
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplayLatency":
+        samples = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                field = line.split(",", 1)[0].strip()
+                try:
+                    samples.append(float(field))
+                except ValueError:
+                    # 標題列或空行
+                    continue
+        return cls(samples)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.samples)
+
+    def __repr__(self) -> str:
+        return f"replay:{len(self.samples)} 筆樣本"
+
+
+def parse_latency(spec: str) -> Optional[LatencyModel]:
+    """解析延遲設定字串，空字串返回 None"""
+    spec = spec.strip()
+    if not spec:
+        return None
+    kind, _, args = spec.partition(":")
+    kind = kind.strip().lower()
+    try:
+        if kind == "fixed":
+            return FixedLatency(float(args))
+        if kind == "lognormal":
+            median, p99 = (float(value) for value in args.split(","))
+            return LognormalLatency(median, p99)
+    except ValueError as e:
+        raise ValueError(f"無效的延遲設定: {spec}") from e
+    if kind == "replay":
+        return ReplayLatency.from_file(args.strip())
+    raise ValueError(f"不支援的延遲分佈: {kind}")
+
+
+class FaultInjector:
+    """
+    決定每次呼叫的延遲與結果
+    error_rate 為立即失敗的比例；延遲超過 timeout（秒）的呼叫在 timeout 後失敗，與 httpx 讀取逾時相同
+    失敗的呼叫不會送達下層客戶端，並與真實客戶端的錯誤處理相同返回帶有 error 的空結果
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, error_rate: float = 0.0,
+                 timeout: Optional[float] = None, seed: Optional[int] = None):
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate 需介於 0 與 1 之間")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout = timeout or None
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.injected = 0.0
+
+    def plan(self) -> tuple[float, bool]:
+        """(等待秒數, 是否失敗)"""
+        self.calls += 1
+        delay = self.latency.sample(self.rng) if self.latency is not None else 0.0
+        if self.timeout is not None and delay > self.timeout:
+            self.timeouts += 1
+            self.injected += self.timeout
+            return self.timeout, True
+        self.injected += delay
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return delay, True
+        return delay, False
+
+    def run(self, execute: Callable[[], Any]) -> Any:
+        delay, failed = self.plan()
+        if delay:
+            time.sleep(delay)
+        return _failed_result() if failed else execute()
+
+    async def arun(self, execute: Callable[[], Any]) -> Any:
+        delay, failed = self.plan()
+        if delay:
+            await asyncio.sleep(delay)
+        return _failed_result() if failed else await execute()
+
+    def stats(self) -> dict:
+        """注入統計"""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "injected_seconds": round(self.injected, 3),
+        }
+
+    def __repr__(self) -> str:
+        return f"latency={self.latency!r} error_rate={self.error_rate:g} timeout={self.timeout}"
+
+
+_INJECTED_ERROR = "注入的錯誤或逾時"
+
+
+def _failed_result() -> Any:
+    from services.supabase_client import QueryResult
+    return QueryResult(data=[], count=0, error=_INJECTED_ERROR)
+
+
+def _page_error(query: Any) -> Exception:
+    from services.supabase_client import QueryError
+    return QueryError(f"{getattr(query, 'table_name', '?')} 分頁讀取失敗: {_INJECTED_ERROR}")
+
+
+class _FaultyQuery:
+    """
+    查詢包裝：建構 API 原樣轉交下層查詢（返回下層查詢本身時改返回包裝），execute() 前注入延遲與錯誤
+    """
+
+    def __init__(self, query: Any, injector: FaultInjector):
+        self._query = query
+        self._injector = injector
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args: Any, **kwargs: Any) -> Any:
+            result = attr(*args, **kwargs)
+            return self if result is self._query else result
+        return chained
+
+    def execute(self) -> Any:
+        return self._injector.run(self._query.execute)
+
+    def iter_pages(self, page_size: int = 1000):
+        """
+        逐頁讀取；每頁計為一次往返，與 execute() 相同注入延遲、錯誤與逾時
+        失敗的頁面不會送達下層查詢，並與真實客戶端相同引發 QueryError
+        """
+        pages = self._query.iter_pages(page_size)
+        try:
+            while True:
+                delay, failed = self._injector.plan()
+                if delay:
+                    time.sleep(delay)
+                if failed:
+                    raise _page_error(self._query)
+                try:
+                    rows = next(pages)
+                except StopIteration:
+                    return
+                yield rows
+        finally:
+            pages.close()
+
+    def stream(self, page_size: int = 1000):
+        for rows in self.iter_pages(page_size):
+            yield from rows
+
+
+class _AsyncFaultyQuery(_FaultyQuery):
+    async def execute(self) -> Any:
+        return await self._injector.arun(self._query.execute)
+
+    async def iter_pages(self, page_size: int = 1000):
+        """逐頁讀取；注入方式與同步版本相同"""
+        pages = self._query.iter_pages(page_size)
+        try:
+            while True:
+                delay, failed = self._injector.plan()
+                if delay:
+                    await asyncio.sleep(delay)
+                if failed:
+                    raise _page_error(self._query)
+                try:
+                    rows = await pages.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield rows
+        finally:
+            await pages.aclose()
+
+    async def stream(self, page_size: int = 1000):
+        async for rows in self.iter_pages(page_size):
+            for row in rows:
+                yield row
+
+
+class FaultInjectingClient:
+    """同步客戶端包裝，其他屬性與方法直接轉交下層客戶端"""
+
+    _query_class = _FaultyQuery
+
+    def __init__(self, client: Any, injector: FaultInjector):
+        self.client = client
+        self.injector = injector
+
+    def table(self, name: str) -> Any:
+        return self._query_class(self.client.table(name), self.injector)
+
+    def rpc(self, function: str, params: Optional[dict] = None) -> Any:
+        return self._query_class(self.client.rpc(function, params), self.injector)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+class AsyncFaultInjectingClient(FaultInjectingClient):
+    """
+    非同步客戶端包裝
+    gather() 經由包裝後的查詢並行執行，注入的延遲會依並行度重疊，與正式環境相同
+    """
+
+    _query_class = _AsyncFaultyQuery
+
+    async def gather(self, *queries: Any, concurrency: Optional[int] = None) -> list:
+        from services.supabase_client import _gather_queries
+        return await _gather_queries(queries, concurrency)
@@ -0,0 +1,100 @@
+"""
+對沖請求（hedged requests）策略
+冪等的 select 若超過該資料表延遲百分位仍未回應，便再送出一個相同請求，
+取先完成者；每張資料表以權杖桶限制額外請求的比例
+"""
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Optional
+
+
+class _TableState:
+    __slots__ = ("latencies", "ordered", "tokens", "requests", "hedges", "hedge_wins")
+
+    def __init__(self, window: int, max_tokens: float):
+        # 依完成順序的延遲視窗，以及同一組樣本的排序副本（查詢百分位時不需重新排序）
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.ordered: list[float] = []
+        self.tokens = max_tokens
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+class HedgePolicy:
+    """
+    依資料表統計延遲並決定何時送出對沖請求
+    budget_ratio 為對沖請求相對於一般請求的最大比例（例如 0.05 = 最多多 5% 負載）
+    """
+
+    def __init__(self, percentile: float = 95.0, min_delay: float = 0.01, max_delay: float = 2.0,
+                 budget_ratio: float = 0.05, window: int = 256, min_samples: int = 20):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.window = window
+        self.min_samples = min_samples
+        # 允許短時間內的突發對沖，但長期仍受 budget_ratio 限制
+        self.max_tokens = max(1.0, budget_ratio * window)
+        self._tables: dict[str, _TableState] = {}
+
+    def _state(self, table: str) -> _TableState:
+        state = self._tables.get(table)
+        if state is None:
+            state = self._tables[table] = _TableState(self.window, self.max_tokens)
+        return state
+
+    def delay(self, table: str) -> float:
+        """
+        送出對沖請求前的等待秒數
+        樣本不足時使用 max_delay，避免冷啟動時過度對沖
+        """
+        ordered = self._tables[table].ordered if table in self._tables else ()
+        if len(ordered) < self.min_samples:
+            return self.max_delay
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return min(self.max_delay, max(self.min_delay, ordered[index]))
+
+    def start(self, table: str) -> None:
+        """記錄一次一般請求，並累積對沖預算"""
+        state = self._state(table)
+        state.requests += 1
+        state.tokens = min(self.max_tokens, state.tokens + self.budget_ratio)
+
+    def try_acquire(self, table: str) -> bool:
+        """取得一次對沖的預算，不足時返回 False"""
+        state = self._state(table)
+        if state.tokens < 1.0:
+            return False
+        state.tokens -= 1.0
+        state.hedges += 1
+        return True
+
+    def record(self, table: str, seconds: float, hedge_won: bool = False) -> None:
+        """
+        記錄完成請求的延遲，seconds 為自原始請求送出起算的秒數
+        對沖請求勝出時原始請求仍未完成，其延遲至少為此值；若改記錄對沖請求本身的延遲，
+        百分位會逐漸偏低，對沖門檻隨之縮短
+        """
+        state = self._state(table)
+        latencies = state.latencies
+        if len(latencies) == latencies.maxlen:
+            del state.ordered[bisect_left(state.ordered, latencies[0])]
+        latencies.append(seconds)
+        insort(state.ordered, seconds)
+        if hedge_won:
+            state.hedge_wins += 1
+
+    def stats(self) -> dict:
+        """各資料表的對沖統計"""
+        return {
+            table: {
+                "requests": state.requests,
+                "hedges": state.hedges,
+                "hedge_wins": state.hedge_wins,
+                "delay": round(self.delay(table), 4),
+            }
+            for table, state in self._tables.items()
+        }
@@ -0,0 +1,46 @@
+"""
+JSON 編解碼
+安裝 orjson 時使用 orjson，否則退回標準庫 json
+供上游 PostgREST 回應解碼、請求本體編碼與 API 回應序列化共用
+"""
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依部署環境而定
+    orjson = None
+
+# 目前使用的實作名稱，供基準測試與除錯輸出
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data: bytes | str) -> Any:
+    """解碼 JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """編碼 JSON 為 UTF-8 位元組（輸出與 Starlette JSONResponse 相同的緊湊格式）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用 dumps() 序列化的 JSON 回應
+    作為應用程式的預設回應類別
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
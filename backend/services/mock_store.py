@@ -0,0 +1,334 @@
+"""
+開發模式的記憶體資料表
+資料以欄位陣列保存（每個欄位一個 list，位置即資料列的插槽），每列只記錄共用的欄位組合（shape），
+短字串以 sys.intern 共用，省去每列一個 dict 與重複鍵字串的成本；讀取時以 MockRow 檢視呈現與 dict 相同的介面
+列表與 dict 值在寫入與讀取時都會複製，呼叫端修改取得的資料列不會改到資料表
+
+並為欄位維護雜湊索引（可預先宣告，或在第一次以該欄位過濾時建立），
+eq / in_ 查詢與更新、刪除只需處理符合條件的資料列，而不必掃描整張資料表
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# 過濾條件：(欄位, 允許的值)；eq 為單一值，in_ 為多個值
+Condition = tuple[str, tuple]
+
+# 不超過此長度的字串共用同一個物件：類別值（寵物類型、地點、狀態等）與外鍵 UUID 在各列間大量重複
+_INTERN_MAX_LENGTH = 40
+
+# 已刪除的插槽超過此數量且多於存活資料列時重新整理欄位陣列
+_COMPACT_THRESHOLD = 1024
+
+_MISSING = object()
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _compact(value: Any) -> Any:
+    if type(value) is str and len(value) <= _INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+def _detached(value: Any) -> Any:
+    """列表與 dict 值（JSON 值，可能巢狀）的獨立副本，其他值原樣返回"""
+    kind = type(value)
+    if kind is list:
+        # 大多數列表（標籤、圖片網址）只含字串：淺複製即可，有巢狀時才逐項複製
+        copy = value.copy()
+        for item in copy:
+            if type(item) is list or type(item) is dict:
+                return [_detached(item) for item in value]
+        return copy
+    if kind is dict:
+        return {key: _detached(item) for key, item in value.items()}
+    return value
+
+
+class MockRow(Mapping):
+    """
+    資料表中一列的檢視，取值時才自欄位陣列讀取
+    支援 get / [] / in / 迭代；copy() 與 dict(row) 返回獨立的 dict，列表與 dict 值也是副本
+    """
+
+    __slots__ = ("_table", "_slot")
+
+    def __init__(self, table: "MockTable", slot: int):
+        self._table = table
+        self._slot = slot
+
+    def get(self, column: str, default: Any = None) -> Any:
+        table = self._table
+        values = table._columns.get(column)
+        if values is None:
+            return default
+        value = values[self._slot]
+        # 欄位陣列以 None 填補沒有該欄位的列，只有需要區分時才查欄位組合
+        if value is None and default is not None and column not in table._shapes[self._slot]:
+            return default
+        if column in table._nested:
+            return _detached(value)
+        return value
+
+    def __getitem__(self, column: str) -> Any:
+        value = self.get(column, _MISSING)
+        if value is _MISSING:
+            raise KeyError(column)
+        return value
+
+    def __contains__(self, column: object) -> bool:
+        return column in self._table._shapes[self._slot]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._shapes[self._slot])
+
+    def __len__(self) -> int:
+        return len(self._table._shapes[self._slot])
+
+    def keys(self) -> tuple[str, ...]:
+        return self._table._shapes[self._slot]
+
+    def copy(self) -> dict:
+        table = self._table
+        columns = table._columns
+        slot = self._slot
+        row = {column: columns[column][slot] for column in table._shapes[slot]}
+        for column in table._nested:
+            value = row.get(column)
+            if value is not None:
+                row[column] = _detached(value)
+        return row
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class MockTable:
+    """
+    單一模擬資料表
+    迭代、len() 與索引存取的行為與 list 相同（元素為 MockRow），寫入請透過 append / extend / update / delete
+    """
+
+    __slots__ = ("_columns", "_shapes", "_shape_cache", "_dead", "_indexes", "_nested")
+
+    def __init__(self, rows: Iterable[dict] = (), indexes: Iterable[str] = ()):
+        # 欄位 -> 各插槽的值；插槽依插入順序遞增，沒有該欄位的列填入 None
+        self._columns: dict[str, list] = {}
+        # 各插槽的欄位組合（相同組合共用一個 tuple）；None 表示已刪除，累積過多時再整理
+        self._shapes: list[Optional[tuple[str, ...]]] = []
+        self._shape_cache: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self._dead = 0
+        # 欄位 -> 值 -> 插槽集合；不可雜湊的值不進索引（不可能與可雜湊的查詢值相等）
+        self._indexes: dict[str, dict[Any, set[int]]] = {}
+        # 曾經保存過列表或 dict 的欄位，讀取時需複製
+        self._nested: set[str] = set()
+        for column in indexes:
+            self.create_index(column)
+        self.extend(rows)
+
+    def __iter__(self) -> Iterator[MockRow]:
+        return (MockRow(self, slot) for slot in self._slots())
+
+    def __len__(self) -> int:
+        return len(self._shapes) - self._dead
+
+    def __getitem__(self, index: int | slice) -> Any:
+        slots = list(self._slots())[index]
+        if isinstance(index, slice):
+            return self.rows(slots)
+        return MockRow(self, slots)
+
+    @property
+    def indexes(self) -> tuple[str, ...]:
+        """已建立索引的欄位"""
+        return tuple(self._indexes)
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """所有資料列出現過的欄位"""
+        return tuple(self._columns)
+
+    def _slots(self) -> Iterator[int]:
+        if not self._dead:
+            return iter(range(len(self._shapes)))
+        return (slot for slot, shape in enumerate(self._shapes) if shape is not None)
+
+    def _column(self, column: str) -> list:
+        """欄位的值陣列；尚無此欄位時返回全為 None 的暫時陣列"""
+        values = self._columns.get(column)
+        return values if values is not None else [None] * len(self._shapes)
+
+    def _shape(self, columns: Iterable[str]) -> tuple[str, ...]:
+        shape = tuple(columns)
+        return self._shape_cache.setdefault(shape, shape)
+
+    def create_index(self, column: str) -> None:
+        """為欄位建立雜湊索引（已存在時不做任何事）"""
+        if column in self._indexes:
+            return
+        index: dict[Any, set[int]] = {}
+        values = self._column(column)
+        for slot in self._slots():
+            value = values[slot]
+            if _hashable(value):
+                index.setdefault(value, set()).add(slot)
+        self._indexes[column] = index
+
+    def append(self, row: dict) -> dict:
+        """插入一列（保存值的副本，row 本身不會被保留）"""
+        columns = self._columns
+        slot = len(self._shapes)
+        for column in row:
+            if column not in columns:
+                columns[column] = [None] * slot
+        for column, values in columns.items():
+            value = row.get(column)
+            kind = type(value)
+            if kind is list or kind is dict:
+                value = _detached(value)
+                self._nested.add(column)
+            values.append(_compact(value))
+        self._shapes.append(self._shape(row))
+        for column, index in self._indexes.items():
+            value = row.get(column)
+            if _hashable(value):
+                index.setdefault(value, set()).add(slot)
+        return row
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def where(self, conditions: Iterable[Condition]) -> list[int]:
+        """
+        符合所有條件的資料列插槽，依插入順序排列
+        以候選數最少的條件查索引，其餘條件只在候選列上比對
+        """
+        conditions = list(conditions)
+        if not conditions:
+            return list(self._slots())
+
+        best: Optional[tuple[int, int]] = None
+        for position, (column, values) in enumerate(conditions):
+            if not all(_hashable(value) for value in values):
+                continue
+            self.create_index(column)
+            index = self._indexes[column]
+            size = sum(len(index.get(value, ())) for value in values)
+            if best is None or size < best[0]:
+                best = (size, position)
+
+        if best is None:
+            candidates = list(self._slots())
+        else:
+            column, values = conditions.pop(best[1])
+            index = self._indexes[column]
+            if len(values) == 1:
+                candidates = sorted(index.get(values[0], ()))
+            else:
+                candidates = sorted(set().union(*(index.get(value, ()) for value in values)))
+
+        for column, values in conditions:
+            cells = self._column(column)
+            candidates = [slot for slot in candidates if cells[slot] in values]
+        return candidates
+
+    def row(self, slot: int) -> MockRow:
+        """依插槽取出單一資料列的檢視"""
+        return MockRow(self, slot)
+
+    def rows(self, slots: Iterable[int]) -> list[MockRow]:
+        """依插槽取出資料列檢視"""
+        return [MockRow(self, slot) for slot in slots]
+
+    def lookup(self, column: str, values: Iterable[Any]) -> list[MockRow]:
+        """欄位值在 values 之中的資料列"""
+        return self.rows(self.where([(column, tuple(values))]))
+
+    def sort_key(self, columns: list[str]) -> Callable[[int], tuple]:
+        """
+        以插槽排序的多欄位排序鍵，直接讀取欄位陣列
+        與 (是否為 None, 值) 逐欄攤平的順序相同，NULL 排在最後
+        """
+        arrays = [self._column(column) for column in columns]
+        if len(arrays) == 1:
+            first = arrays[0]
+            return lambda slot: ((a := first[slot]) is None, a)
+        if len(arrays) == 2:
+            first, second = arrays
+            return lambda slot: ((a := first[slot]) is None, a, (b := second[slot]) is None, b)
+        return lambda slot: tuple(item for values in arrays for item in (values[slot] is None, values[slot]))
+
+    def update(self, slots: Iterable[int], changes: dict) -> list[MockRow]:
+        """以 changes 更新指定的資料列，並同步調整索引"""
+        columns = self._columns
+        targets = []
+        for column, new in changes.items():
+            if column not in columns:
+                columns[column] = [None] * len(self._shapes)
+            kind = type(new)
+            if kind is list or kind is dict:
+                self._nested.add(column)
+            targets.append((columns[column], _compact(new), self._indexes.get(column)))
+
+        updated = []
+        for slot in slots:
+            for values, new, index in targets:
+                old = values[slot]
+                if index is not None and old != new:
+                    self._discard(index, old, slot)
+                    if _hashable(new):
+                        index.setdefault(new, set()).add(slot)
+                # 每列保存各自的副本，之後修改其中一列不會影響其他列
+                values[slot] = _detached(new)
+            shape = self._shapes[slot]
+            if any(column not in shape for column in changes):
+                self._shapes[slot] = self._shape((*shape, *(column for column in changes if column not in shape)))
+            updated.append(MockRow(self, slot))
+        return updated
+
+    def delete(self, slots: Iterable[int]) -> list[dict]:
+        """刪除指定的資料列，返回被刪除資料列的副本"""
+        deleted = []
+        for slot in list(slots):
+            if self._shapes[slot] is None:
+                continue
+            row = MockRow(self, slot).copy()
+            for column, index in self._indexes.items():
+                self._discard(index, row.get(column), slot)
+            for values in self._columns.values():
+                values[slot] = None
+            self._shapes[slot] = None
+            self._dead += 1
+            deleted.append(row)
+        if self._dead > _COMPACT_THRESHOLD and self._dead > len(self):
+            self._compact_slots()
+        return deleted
+
+    def _compact_slots(self) -> None:
+        """移除已刪除的插槽並重建索引（先前取得的插槽與 MockRow 會失效）"""
+        live = list(self._slots())
+        self._columns = {column: [values[slot] for slot in live] for column, values in self._columns.items()}
+        self._shapes = [self._shapes[slot] for slot in live]
+        self._dead = 0
+        columns = tuple(self._indexes)
+        self._indexes = {}
+        for column in columns:
+            self.create_index(column)
+
+    @staticmethod
+    def _discard(index: dict[Any, set[int]], value: Any, slot: int) -> None:
+        if not _hashable(value):
+            return
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.discard(slot)
+            if not bucket:
+                del index[value]
@@ -0,0 +1,124 @@
+"""
+寵物搜尋索引
+應用程式啟動時（或第一次搜尋時）自 pets 資料表分頁讀取並建立 SearchIndex，之後以寫入通知增量更新，
+並每 SEARCH_INDEX_REFRESH 秒於背景重建一次，納入其他行程的寫入與刪除
+建立索引在工作執行緒中進行，不阻塞事件迴圈；新索引完成後才一次替換，搜尋期間沿用舊索引
+任一頁讀取失敗時放棄該次建立並保留舊索引，間隔 _RETRY_DELAY 秒後於下次搜尋時重試
+"""
+import asyncio
+import time
+from typing import Any, Optional
+
+from config import settings
+from services import write_events
+from services.search_index import SearchIndex
+
+# 參與檢索的欄位
+SEARCH_FIELDS = ("name", "breed", "description", "tags")
+
+_index: Optional[SearchIndex] = None
+_built_at = 0.0
+_building: Optional[asyncio.Future] = None
+# 重建期間收到的寫入，完成後套用到新索引
+_pending: list[list] = []
+_failed_at: Optional[float] = None
+
+# 建立失敗後至少間隔的秒數才重試，上游故障時不會每個請求都重新讀取整個資料表
+_RETRY_DELAY = 30.0
+
+
+class IndexUnavailable(Exception):
+    """索引尚未建立且無法建立（上游錯誤），retry_after 為建議的重試秒數"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _on_write(operation: str, rows: Optional[list]) -> None:
+    # 刪除不提供資料列：已刪除的寵物在取回資料時自然略過，並於下次重建時移除
+    if not rows:
+        return
+    if _index is not None:
+        _index.add_many(rows)
+    if _building is not None:
+        _pending.append(rows)
+
+
+async def _rebuild(client: Any, page_size: int) -> None:
+    global _index, _built_at
+    started = time.perf_counter()
+    index = SearchIndex(SEARCH_FIELDS)
+    columns = ",".join(("id", *SEARCH_FIELDS))
+    # 新索引只在工作執行緒中修改，完成前不會被搜尋或寫入通知存取
+    async for rows in client.table("pets").select(columns).iter_pages(page_size):
+        await asyncio.to_thread(index.add_many, rows)
+    # 套用期間可能再收到寫入，直到沒有待處理的寫入為止
+    while _pending:
+        rows = [row for batch in _pending for row in batch]
+        _pending.clear()
+        await asyncio.to_thread(index.add_many, rows)
+    # 替換與清空待處理寫入之間沒有 await，寫入通知不會遺漏
+    _index, _built_at = index, time.monotonic()
+    print(f"🔎 寵物搜尋索引已建立：{len(index)} 筆、{index.terms} 個詞，{time.perf_counter() - started:.1f} 秒")
+
+
+def _finished(future: asyncio.Future) -> None:
+    global _building, _failed_at
+    _building = None
+    if future.cancelled() or future.exception() is not None:
+        # 未完成的建立不替換索引；待處理的寫入已套用到舊索引，下次重建會重新讀取
+        _pending.clear()
+    if not future.cancelled() and future.exception() is not None:
+        _failed_at = time.monotonic()
+        kept = "沿用舊索引" if _index is not None else "尚無可用索引"
+        print(f"❌ 寵物搜尋索引建立失敗（{kept}）: {future.exception()}")
+    elif not future.cancelled():
+        _failed_at = None
+
+
+def _ensure_building(client: Any, page_size: int) -> None:
+    """尚未建立或超過重建間隔時於背景開始建立（同時只有一次建立）"""
+    global _building
+    if _building is not None:
+        return
+    if _failed_at is not None and time.monotonic() - _failed_at < _RETRY_DELAY:
+        return
+    expired = settings.SEARCH_INDEX_REFRESH > 0 and time.monotonic() - _built_at > settings.SEARCH_INDEX_REFRESH
+    if _index is None or expired:
+        write_events.subscribe("pets", _on_write)
+        _building = asyncio.ensure_future(_rebuild(client, page_size))
+        _building.add_done_callback(_finished)
+
+
+def warm_up(client: Any, page_size: int = 5000) -> None:
+    """應用程式啟動時於背景建立索引，不延遲啟動；第一次搜尋只需等待尚未完成的部分"""
+    _ensure_building(client, page_size)
+
+
+async def close() -> None:
+    """應用程式關閉時取消進行中的建立"""
+    building = _building
+    if building is None:
+        return
+    building.cancel()
+    # 建立失敗已由 _finished 記錄
+    await asyncio.gather(building, return_exceptions=True)
+
+
+async def get_index(client: Any, page_size: int = 5000) -> SearchIndex:
+    """
+    取得寵物搜尋索引
+    尚未建立時等待建立完成（同時的請求共用同一次建立）；超過重建間隔時於背景重建，期間沿用舊索引
+    尚無索引且建立失敗時引發 IndexUnavailable
+    """
+    _ensure_building(client, page_size)
+    if _index is None:
+        if _building is None:
+            retry_after = _RETRY_DELAY - (time.monotonic() - (_failed_at or 0.0))
+            raise IndexUnavailable("寵物搜尋索引建立失敗，稍後重試", max(1.0, retry_after))
+        try:
+            await asyncio.shield(_building)
+        except Exception as e:
+            raise IndexUnavailable(f"寵物搜尋索引建立失敗: {e}", _RETRY_DELAY) from e
+    return _index
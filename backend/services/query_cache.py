@@ -0,0 +1,130 @@
+"""
+查詢結果快取
+為 TableQuery 的 select 提供讀穿式（read-through）快取，
+以 TTL 與 LRU 淘汰控制新鮮度，並以總位元組數限制記憶體用量
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class _CacheEntry:
+    __slots__ = ("table", "value", "size", "expires_at")
+
+    def __init__(self, table: str, value: Any, size: int, expires_at: float):
+        self.table = table
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class QueryCache:
+    """
+    依資料表分組的 LRU + TTL 快取
+    寫入同一資料表時以 invalidate_table() 清除該表所有項目
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._table_keys: dict[str, set] = {}
+        # 每次寫入遞增，用來丟棄寫入前就已發出的查詢結果
+        self._generations: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, table: str) -> int:
+        """取得資料表目前的寫入版本"""
+        return self._generations.get(table, 0)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """讀取快取，過期項目視為未命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, table: str, key: Hashable, value: Any, size: int,
+            generation: int, ttl: Optional[float] = None) -> None:
+        """
+        寫入快取
+        generation 為查詢發出前取得的版本，若期間資料表已被寫入則放棄寫入
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._generations.get(table, 0) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = _CacheEntry(table, value, size, expires_at)
+            self._table_keys.setdefault(table, set()).add(key)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_table(self, table: str) -> None:
+        """清除資料表的所有快取項目"""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in self._table_keys.pop(table, set()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry.size
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """清空快取（保留統計數據）"""
+        with self._lock:
+            for table in self._table_keys:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+            self._table_keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """快取統計，用於評估容量設定"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        keys = self._table_keys.get(entry.table)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._table_keys[entry.table]
@@ -0,0 +1,120 @@
+"""
+每個 API 請求的上游呼叫統計
+以 contextvars 追蹤單一請求內發出的 Supabase 呼叫次數、資料表、位元組與耗時，
+透過 Server-Timing 標頭回報，並偵測重複發出的相同形狀查詢（N+1）
+"""
+import time
+from contextvars import ContextVar
+from typing import Any, Iterable, Optional
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("request_stats", default=None)
+
+
+def _calls(count: int) -> str:
+    return f"{count} call" if count == 1 else f"{count} calls"
+
+
+class RequestStats:
+    """單一 API 請求的上游呼叫累計"""
+
+    __slots__ = ("calls", "bytes", "seconds", "tables", "shapes")
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        # 資料表 -> [呼叫次數, 秒數, 位元組]
+        self.tables: dict[str, list] = {}
+        # (方法, 資料表, 參數名稱) -> 次數；只看參數名稱，值不同仍視為同一形狀
+        self.shapes: dict[tuple, int] = {}
+
+    def record(self, table: str, method: str, params: Optional[Iterable[str]], seconds: float, nbytes: int) -> None:
+        self.calls += 1
+        self.bytes += nbytes
+        self.seconds += seconds
+        entry = self.tables.get(table)
+        if entry is None:
+            entry = self.tables[table] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += nbytes
+        shape = (method, table, tuple(sorted(params)) if params else ())
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int) -> list[tuple[tuple, int]]:
+        """發出次數達到門檻的相同形狀查詢"""
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing 標頭值，例如
+        db;dur=12.5;desc="3 calls, 4.1 KB", db-pets;dur=8.2;desc="1 call"
+        """
+        entries = [f'db;dur={self.seconds * 1000:.1f};desc="{_calls(self.calls)}, {self.bytes / 1024:.1f} KB"']
+        for table, (calls, seconds, _) in self.tables.items():
+            name = "db-" + table.replace("/", "-")
+            entries.append(f'{name};dur={seconds * 1000:.1f};desc="{_calls(calls)}"')
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        """除錯日誌用的單行摘要"""
+        tables = ", ".join(f"{table}×{calls}" for table, (calls, _, _) in self.tables.items())
+        return f"{self.calls} 次上游呼叫 {self.seconds * 1000:.1f} ms {self.bytes / 1024:.1f} KB [{tables}]"
+
+
+def current() -> Optional[RequestStats]:
+    """目前請求的統計，不在請求範圍內時為 None"""
+    return _current.get()
+
+
+def record(table: str, method: str, params: Optional[Iterable[str]], seconds: float, nbytes: int) -> None:
+    """
+    記錄一次上游呼叫（不在請求範圍內時忽略）
+    params 為查詢參數名稱（傳入 dict 時取其鍵），用於判斷查詢形狀
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.record(table, method, params, seconds, nbytes)
+
+
+class RequestStatsMiddleware:
+    """
+    ASGI 中介層：為每個 HTTP 請求建立統計，回應時附上 Server-Timing 標頭
+    log 為 True 時輸出每個請求的摘要；相同形狀查詢達 repeat_threshold 次時輸出警告
+    """
+
+    def __init__(self, app: Any, log: bool = False, repeat_threshold: int = 3):
+        self.app = app
+        self.log = log
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: dict) -> None:
+            if message["type"] == "http.response.start" and stats.calls:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats, time.perf_counter() - started)
+
+    def _report(self, scope: dict, stats: RequestStats, elapsed: float) -> None:
+        if not stats.calls:
+            return
+        route = f"{scope.get('method', '')} {scope.get('path', '')}"
+        if self.log:
+            print(f"📊 {route} {elapsed * 1000:.1f} ms：{stats.summary()}")
+        for (method, table, params), count in stats.repeated(self.repeat_threshold):
+            print(f"⚠️ 可能的 N+1 查詢：{route} 發出 {count} 次相同形狀的 {method} {table}（參數：{', '.join(params) or '無'}）")
@@ -0,0 +1,349 @@
+"""
+行程內全文檢索索引
+中日韓文字以單字與相鄰二字（bigram）切分、拉丁字母與數字以單字切分，依 BM25 排序
+
+每個詞的倒排列表以文件編號排序的 array 保存，並以 bytearray 平行保存量化後的 BM25 權重等級
+（impact），查詢時由最少文件的詞依等級由高到低（bytearray.rfind，C 速度）取出候選，
+其他詞以二分搜尋確認並取得等級，剩餘候選的分數上限不足以進入前 k 筆時即停止，
+常見詞也不需掃描整個列表；上限無法提前停止時（少見詞搭配常見詞），
+改為由最少文件的詞開始求出所有詞的交集，只為交集中的文件計分
+新增與更新只在列表尾端追加，刪除以墓碑標記
+"""
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# 中日韓統一表意文字（含擴充 A 與相容字）、假名與韓文音節
+_CJK = "㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+_RUNS = re.compile(f"([{_CJK}]+)|([a-z0-9]+)")
+
+# BM25 權重量化的等級數（等級為 1..LEVELS）
+LEVELS = 32
+
+# bytes.translate 用的對照表：等級 -> 只有該等級對應為 1 的位元組對照
+_LEVEL_MASKS = [bytes(int(value == level) for value in range(256)) for level in range(LEVELS + 1)]
+
+# 墓碑超過此數量且多於存活文件時清理倒排列表
+_COMPACT_THRESHOLD = 10000
+
+# 多詞查詢確認超過此數量的候選仍未能提前停止時，改為先求交集
+_PROBE_BUDGET = 1024
+
+# 下一個倒排列表比目前的交集大超過此倍數時，以二分搜尋跳躍比對，不逐項走過整個列表
+_GALLOP_RATIO = 32
+
+
+def _normalize(text: str) -> str:
+    # NFKC 將全形英數轉為半形，相容字轉為標準字
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """索引用的詞：中日韓文字的每個字與相鄰二字，拉丁字母與數字的整個單字"""
+    tokens = []
+    for cjk, word in _RUNS.findall(_normalize(text)):
+        if cjk:
+            tokens.extend(cjk)
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def query_terms(text: str) -> list[str]:
+    """
+    查詢用的詞（不重複，依出現順序）
+    兩字以上的中日韓文字只取相鄰二字（單字已隱含在其中），單一字才以單字查詢
+    """
+    terms = []
+    for cjk, word in _RUNS.findall(_normalize(text)):
+        if cjk:
+            terms.extend(cjk if len(cjk) == 1 else (cjk[i:i + 2] for i in range(len(cjk) - 1)))
+        else:
+            terms.append(word)
+    return list(dict.fromkeys(terms))
+
+
+class _Postings:
+    __slots__ = ("docs", "levels", "max_level")
+
+    def __init__(self):
+        # 文件編號遞增排列；levels[i] 為 docs[i] 在此詞的權重等級
+        self.docs = array("I")
+        self.levels = bytearray()
+        self.max_level = 0
+
+
+class SearchIndex:
+    """
+    BM25 倒排索引
+    fields 為參與檢索的欄位（列表欄位以空白串接）；文件以資料列的 id 識別，重複加入視為更新
+    權重等級在加入文件時以當時的平均長度計算
+    """
+
+    def __init__(self, fields: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, _Postings] = {}
+        # 文件編號 -> id（None 為已刪除）、id -> 文件編號、文件編號 -> 詞數
+        self._ids: list[Optional[str]] = []
+        self._docnos: dict[str, int] = {}
+        self._lengths = array("I")
+        self._total_length = 0
+        self._dead = 0
+        # 等級 -> 代表的權重（等級區間的中點）
+        self._weights = [(level - 0.5) / LEVELS * (k1 + 1) for level in range(LEVELS + 1)]
+
+    def __len__(self) -> int:
+        return len(self._docnos)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._docnos
+
+    @property
+    def terms(self) -> int:
+        """詞彙數"""
+        return len(self._postings)
+
+    @property
+    def postings(self) -> int:
+        """倒排列表的總項目數（含已刪除文件）"""
+        return sum(len(postings.docs) for postings in self._postings.values())
+
+    def _text(self, row: Any) -> str:
+        parts = []
+        for field in self.fields:
+            value = row.get(field)
+            if isinstance(value, (list, tuple)):
+                parts.extend(str(item) for item in value)
+            elif value is not None:
+                parts.append(str(value))
+        return " ".join(parts)
+
+    def add(self, row: Any) -> None:
+        """加入或更新一筆文件"""
+        self.add_many([row])
+
+    def add_many(self, rows: Iterable[Any]) -> None:
+        """
+        加入或更新多筆文件
+        同一批文件先合計長度再計算權重等級，建立索引時第一批即有穩定的平均長度
+        """
+        batch: dict[str, tuple[Counter, int]] = {}
+        for row in rows:
+            doc_id = row.get("id")
+            if doc_id is None:
+                continue
+            doc_id = str(doc_id)
+            if not self.remove(doc_id) and doc_id in batch:
+                self._total_length -= batch.pop(doc_id)[1]
+            counts = Counter(tokenize(self._text(row)))
+            length = sum(counts.values())
+            batch[doc_id] = (counts, length)
+            self._total_length += length
+        if not batch:
+            return
+
+        live = len(self._docnos) + len(batch)
+        avgdl = self._total_length / live or 1.0
+        k1, b = self.k1, self.b
+        scale = LEVELS / (k1 + 1)
+        postings = self._postings
+        for doc_id, (counts, length) in batch.items():
+            docno = len(self._ids)
+            self._ids.append(doc_id)
+            self._docnos[doc_id] = docno
+            self._lengths.append(length)
+            norm = k1 * (1 - b + b * length / avgdl)
+            # 同一文件中詞頻相同的詞等級相同（大多數詞只出現一次）
+            tf_levels: dict[int, int] = {}
+            for term, tf in counts.items():
+                level = tf_levels.get(tf)
+                if level is None:
+                    level = tf_levels[tf] = min(LEVELS, int(tf * (k1 + 1) / (tf + norm) * scale) + 1)
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = _Postings()
+                entry.docs.append(docno)
+                entry.levels.append(level)
+                if level > entry.max_level:
+                    entry.max_level = level
+
+    def remove(self, doc_id: str) -> bool:
+        """刪除文件（只標記墓碑，倒排列表在累積過多時清理）"""
+        docno = self._docnos.pop(doc_id, None)
+        if docno is None:
+            return False
+        self._ids[docno] = None
+        self._total_length -= self._lengths[docno]
+        self._dead += 1
+        if self._dead > _COMPACT_THRESHOLD and self._dead > len(self._docnos):
+            self._compact()
+        return True
+
+    def _compact(self) -> None:
+        """自倒排列表移除已刪除文件的項目（文件編號不變）"""
+        ids = self._ids
+        for term in list(self._postings):
+            entry = self._postings[term]
+            keep = [i for i, docno in enumerate(entry.docs) if ids[docno] is not None]
+            if not keep:
+                del self._postings[term]
+                continue
+            entry.docs = array("I", (entry.docs[i] for i in keep))
+            entry.levels = bytearray(entry.levels[i] for i in keep)
+            entry.max_level = max(entry.levels)
+        self._dead = 0
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[tuple[str, float]]:
+        """
+        返回 (id, 分數)，依分數由高到低、同分時較新加入者在前
+        查詢的所有詞都需出現在文件中
+        """
+        terms = query_terms(query)
+        if not terms or limit <= 0:
+            return []
+        entries = []
+        for term in terms:
+            entry = self._postings.get(term)
+            if entry is None:
+                return []
+            entries.append(entry)
+
+        live = max(1, len(self._docnos))
+        ranked = []
+        for entry in entries:
+            df = min(len(entry.docs), live)
+            ranked.append((math.log(1 + (live - df + 0.5) / (df + 0.5)), entry))
+        # 由文件最少的詞取候選
+        ranked.sort(key=lambda item: len(item[1].docs))
+        (lead_idf, lead), rest = ranked[0], ranked[1:]
+        others_bound = sum(idf * self._weights[entry.max_level] for idf, entry in rest)
+        wanted = offset + limit
+
+        others = [(entry.docs, [(idf, entry.levels)]) for idf, entry in rest]
+        heap = self._rank(lambda level: self._candidates(lead, level), lead.max_level, lead_idf,
+                          others, others_bound, wanted, _PROBE_BUDGET if others else -1)
+        if heap is None:
+            # 上限無法提前停止：先求交集，只為包含所有詞的文件計分
+            others = self._group(rest)
+            matches = self._intersect(lead, others)
+            if not matches:
+                return []
+            heap = self._rank(lambda level: self._matching(lead, level, matches), lead.max_level, lead_idf,
+                              others, others_bound, wanted)
+
+        results = sorted(heap, reverse=True)[offset:]
+        return [(self._ids[docno], round(score, 4)) for score, docno in results]
+
+    def _rank(self, candidates: Callable[[int], Iterable[int]], max_level: int, lead_idf: float,
+              others: list, others_bound: float, wanted: int, budget: int = -1) -> Optional[list[tuple[float, int]]]:
+        """
+        依領頭詞的等級由高到低為候選計分，保留前 wanted 筆（最小堆積）
+        candidates(level) 為該等級的候選（新到舊）；計分超過 budget 個候選時返回 None（負數為不限制）
+        """
+        weights = self._weights
+        heap: list[tuple[float, int]] = []
+        for level in range(max_level, 0, -1):
+            lead_score = lead_idf * weights[level]
+            bound = lead_score + others_bound
+            if len(heap) == wanted and heap[0][0] >= bound:
+                break
+            for docno in candidates(level):
+                if budget == 0:
+                    return None
+                budget -= 1
+                score = self._score(docno, lead_score, others)
+                if score is None:
+                    continue
+                item = (score, docno)
+                if len(heap) < wanted:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+                elif heap[0][0] >= bound:
+                    # 同一等級依新到舊取出，之後的候選不會更好
+                    break
+        return heap
+
+    def _candidates(self, entry: _Postings, level: int) -> Iterator[int]:
+        """詞的倒排列表中指定等級的存活文件，依新到舊"""
+        needle = bytes((level,))
+        levels, docs, ids = entry.levels, entry.docs, self._ids
+        end = len(levels)
+        while True:
+            position = levels.rfind(needle, 0, end)
+            if position < 0:
+                return
+            end = position
+            docno = docs[position]
+            if ids[docno] is not None:
+                yield docno
+
+    @staticmethod
+    def _group(ranked: list[tuple[float, _Postings]]) -> list[tuple[array, list[tuple[float, bytearray]]]]:
+        """
+        將文件列表完全相同的詞合為一組：(文件列表, [(idf, 等級)...])，依文件數由少到多
+        同一片語的相鄰二字通常出現在相同的文件中，每組只需比對與定位一次
+        """
+        groups: list[tuple[array, list[tuple[float, bytearray]]]] = []
+        for idf, entry in ranked:
+            docs = entry.docs
+            for group_docs, members in groups:
+                if len(group_docs) == len(docs) and group_docs == docs:
+                    members.append((idf, entry.levels))
+                    break
+            else:
+                groups.append((docs, [(idf, entry.levels)]))
+        return groups
+
+    @staticmethod
+    def _intersect(lead: _Postings, others: list[tuple[array, list]]) -> set[int]:
+        """
+        包含所有詞的文件編號（含已刪除文件），由文件最少的詞開始逐一縮小
+        列表大小相近時以集合求交集（C 速度），遠大於目前的交集時改以二分搜尋跳躍比對，不走過整個列表
+        """
+        lead_docs = lead.docs
+        matches = set(lead_docs)
+        for docs, _ in others:
+            if not matches:
+                break
+            if len(docs) == len(lead_docs) and docs == lead_docs:
+                continue
+            if len(docs) > _GALLOP_RATIO * len(matches):
+                found = set()
+                position, end = 0, len(docs)
+                for docno in sorted(matches):
+                    position = bisect_left(docs, docno, position)
+                    if position == end:
+                        break
+                    if docs[position] == docno:
+                        found.add(docno)
+                matches = found
+            else:
+                matches.intersection_update(docs)
+        return matches
+
+    def _matching(self, lead: _Postings, level: int, matches: set[int]) -> list[int]:
+        """領頭詞在指定等級、且在交集中的存活文件，依新到舊（以 translate 與 compress 在 C 中篩選）"""
+        docs = matches.intersection(compress(lead.docs, lead.levels.translate(_LEVEL_MASKS[level])))
+        ids = self._ids
+        return [docno for docno in sorted(docs, reverse=True) if ids[docno] is not None]
+
+    def _score(self, docno: int, score: float, others: list[tuple[array, list[tuple[float, bytearray]]]]) -> Optional[float]:
+        """加上其他詞的分數；文件缺少任一詞時返回 None"""
+        weights = self._weights
+        for docs, members in others:
+            position = bisect_left(docs, docno)
+            if position == len(docs) or docs[position] != docno:
+                return None
+            for idf, levels in members:
+                score += idf * weights[levels[position]]
+        return score
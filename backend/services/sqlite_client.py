@@ -0,0 +1,451 @@
+"""
+本機 SQLite 後端
+以單一 SQLite 檔案保存資料表，提供與模擬客戶端相同的查詢建構器
+（table().select().eq().in_().order().limit()...），資料在重新啟動後仍保留，
+適合在沒有 Supabase 的單機上進行接近正式資料量的負載測試
+
+每張資料表為 (id 主鍵, data JSON)，其餘欄位以 json_extract 讀取，
+索引建立在相同的 json_extract 運算式上，過濾、排序與鍵集分頁都能使用
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from services import json_codec
+from services.supabase_client import (
+    AsyncTableQuery,
+    MockSupabaseClient,
+    MockTableQuery,
+    MockRpcQuery,
+    QueryResult,
+    _MOCK_RPC_FUNCTIONS,
+    _flatten_rows,
+    _gather_queries,
+    _mock_embed,
+    _mock_project,
+    _split_select,
+)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# 預先建立的索引，對應 init_database.sql（id 為主鍵，不需另建）
+_SQLITE_INDEXES: dict[str, tuple[tuple[str, ...], ...]] = {
+    "pets": (("location",), ("pet_type",), ("age_group",), ("created_at", "id")),
+    "stories": (("created_at", "id"),),
+    "favorites": (("user_id", "pet_id"), ("pet_id",)),
+    "adoption_applications": (("user_id", "created_at", "id"), ("pet_id",)),
+    "pet_listings": (("user_id", "created_at", "id"),),
+    "message_threads": (("user_id", "created_at"),),
+    "messages": (("thread_id", "created_at", "id"),),
+}
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"不合法的名稱: {name}")
+    return name
+
+
+def _column(column: str) -> str:
+    """欄位對應的 SQL 運算式：id 為實體欄位，其餘自 JSON 取出"""
+    if column == "id":
+        return "id"
+    return f"json_extract(data, '$.{_identifier(column)}')"
+
+
+def _param(value: Any) -> Any:
+    """查詢參數：列表與物件以 JSON 文字比較（與 json_extract 的結果相同）"""
+    if isinstance(value, (list, dict)):
+        return json_codec.dumps(value).decode("utf-8")
+    return value
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SQLiteTable:
+    """
+    單一 SQLite 資料表
+    提供模擬資料表（MockTable）的 lookup / 迭代 / len()，讓嵌入資源與模擬預存函式可直接共用
+    """
+
+    def __init__(self, db: "SQLiteClient", name: str):
+        self.db = db
+        self.name = _identifier(name)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.select([]))
+
+    def __len__(self) -> int:
+        return self.count([])
+
+    def create_index(self, *columns: str) -> None:
+        """以欄位運算式建立索引（已存在時不做任何事）"""
+        name = f"idx_{self.name}_{'_'.join(_identifier(column) for column in columns)}"
+        expressions = ", ".join(_column(column) for column in columns)
+        self.db._execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{self.name}" ({expressions})')
+
+    def _where(self, conditions: Iterable[tuple[str, tuple]], orders: Iterable[tuple[str, bool]] = (),
+               after: Optional[list] = None) -> tuple[str, list]:
+        """將 eq / in_ 條件與鍵集分頁轉為 WHERE 子句"""
+        clauses, params = [], []
+        for column, values in conditions:
+            expression = _column(column)
+            present = [_param(value) for value in values if value is not None]
+            parts = []
+            if len(present) == 1:
+                parts.append(f"{expression} = ?")
+            elif present:
+                parts.append(f"{expression} IN ({', '.join('?' * len(present))})")
+            if len(present) < len(values):
+                parts.append(f"{expression} IS NULL")
+            clauses.append(" OR ".join(parts) if len(parts) == 1 else f"({' OR '.join(parts)})" if parts else "0")
+            params.extend(present)
+
+        if after:
+            orders = list(orders)
+            if len(after) > len(orders):
+                raise ValueError("after() 的值數量不能超過 order() 欄位數")
+            keys = orders[:len(after)]
+            if len({desc for _, desc in keys}) == 1:
+                # 方向一致時使用 row value 比較；運算式索引無法以 row value 定位，另加第一欄的範圍條件
+                desc = keys[0][1]
+                expressions = ", ".join(_column(column) for column, _ in keys)
+                placeholders = ", ".join("?" * len(after))
+                clauses.append(f"{_column(keys[0][0])} {'<=' if desc else '>='} ?")
+                clauses.append(f"({expressions}) {'<' if desc else '>'} ({placeholders})")
+                params.append(_param(after[0]))
+                params.extend(_param(value) for value in after)
+            else:
+                branches = []
+                for i, ((column, desc), value) in enumerate(zip(keys, after)):
+                    terms = [f"{_column(prev)} = ?" for prev, _ in keys[:i]]
+                    terms.append(f"{_column(column)} {'<' if desc else '>'} ?")
+                    branches.append(f"({' AND '.join(terms)})")
+                    params.extend(_param(prev) for prev in after[:i])
+                    params.append(_param(value))
+                clauses.append(f"({' OR '.join(branches)})")
+
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def select(self, conditions: Iterable[tuple[str, tuple]], orders: Iterable[tuple[str, bool]] = (),
+               after: Optional[list] = None, limit: Optional[int] = None, offset: int = 0) -> list[dict]:
+        """
+        符合條件的資料列，未指定排序或排序值相同時依插入順序
+        注意：SQLite 將 NULL 視為最小值（升冪排在最前），與 PostgreSQL 相反；排序欄位在 schema 中皆不為 NULL
+        """
+        where, params = self._where(conditions, orders, after)
+        sql = f'SELECT data FROM "{self.name}"{where}'
+        # rowid 依插入順序遞增：排序鍵不含唯一的 id 時作為最後的排序鍵，與模擬資料表的穩定排序一致
+        orders = list(orders)
+        terms = [f"{_column(column)} {'DESC' if desc else 'ASC'}" for column, desc in orders]
+        if all(column != "id" for column, _ in orders):
+            terms.append("rowid")
+        sql += " ORDER BY " + ", ".join(terms)
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        return [json_codec.loads(data) for data, in self.db._execute(sql, params)]
+
+    def count(self, conditions: Iterable[tuple[str, tuple]], orders: Iterable[tuple[str, bool]] = (),
+              after: Optional[list] = None) -> int:
+        where, params = self._where(conditions, orders, after)
+        return self.db._execute(f'SELECT COUNT(*) FROM "{self.name}"{where}', params)[0][0]
+
+    def lookup(self, column: str, values: Iterable[Any]) -> list[dict]:
+        """欄位值在 values 之中的資料列"""
+        return self.select([(column, tuple(values))])
+
+    def insert(self, rows: Iterable[dict]) -> list[dict]:
+        """
+        插入資料列並返回寫入的內容
+        未提供 id / created_at 時與 init_database.sql 的預設值相同，自動產生 UUID 與目前時間
+        """
+        inserted = []
+        for row in rows:
+            row = dict(row)
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", _now())
+            inserted.append(row)
+        self.db._executemany(
+            f'INSERT INTO "{self.name}" (id, data) VALUES (?, ?)',
+            [(str(row["id"]), json_codec.dumps(row).decode("utf-8")) for row in inserted],
+        )
+        return inserted
+
+    def update(self, conditions: Iterable[tuple[str, tuple]], changes: dict) -> list[dict]:
+        """以 changes 更新符合條件的資料列，返回更新後的內容"""
+        with self.db._transaction():
+            where, params = self._where(conditions)
+            rows = [json_codec.loads(data) for data, in
+                    self.db._execute(f'SELECT data FROM "{self.name}"{where}', params)]
+            updated = []
+            for row in rows:
+                key = str(row["id"])
+                row.update(changes)
+                updated.append((str(row["id"]), json_codec.dumps(row).decode("utf-8"), key))
+            self.db._executemany(f'UPDATE "{self.name}" SET id = ?, data = ? WHERE id = ?', updated)
+        return rows
+
+    def upsert(self, rows: Iterable[dict], on_conflict: list[str], ignore_duplicates: bool = False) -> list[dict]:
+        """依 on_conflict 欄位比對既有資料：存在時合併（或略過），否則插入"""
+        result = []
+        with self.db._transaction():
+            for row in rows:
+                conditions = [(column, (row.get(column),)) for column in on_conflict]
+                if self.count(conditions):
+                    if not ignore_duplicates:
+                        result.extend(self.update(conditions, row)[:1])
+                    continue
+                result.extend(self.insert([row]))
+        return result
+
+    def delete(self, conditions: Iterable[tuple[str, tuple]]) -> int:
+        where, params = self._where(conditions)
+        return self.db._execute_write(f'DELETE FROM "{self.name}"{where}', params)
+
+
+class SQLiteClient:
+    """
+    本機 SQLite 客戶端
+    path 為資料庫檔案（":memory:" 為記憶體資料庫）；新資料庫會以模擬數據初始化（seed=False 時略過）
+    查詢在呼叫端的執行緒上同步執行，以鎖保護共用連線
+    """
+
+    def __init__(self, path: str, seed: bool = True):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._depth = 0
+        for pragma in ("journal_mode = WAL", "synchronous = NORMAL", "busy_timeout = 5000"):
+            self._conn.execute(f"PRAGMA {pragma}")
+
+        # 資料表名稱 -> SQLiteTable；模擬查詢與預存函式以 _data 存取資料表
+        self._data: dict[str, SQLiteTable] = {
+            name: SQLiteTable(self, name)
+            for name, in self._execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        self._rpc_functions = dict(_MOCK_RPC_FUNCTIONS)
+
+        if seed and not self._data:
+            for name, rows in MockSupabaseClient()._data.items():
+                self._table(name).insert(rows)
+
+    def table(self, name: str) -> "SQLiteTableQuery":
+        return SQLiteTableQuery(self, name)
+
+    def rpc(self, function: str, params: Optional[dict] = None) -> MockRpcQuery:
+        return MockRpcQuery(self, function, params)
+
+    def register_rpc(self, name: str, func: Callable[[dict, dict], Any]) -> None:
+        """註冊或覆寫預存函式（與模擬客戶端共用實作）"""
+        self._rpc_functions[name] = func
+
+    def create_index(self, table: str, *columns: str) -> None:
+        """為資料表的欄位建立索引"""
+        self._table(table).create_index(*columns)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _table(self, name: str) -> SQLiteTable:
+        table = self._data.get(name)
+        if table is not None:
+            return table
+        # 工作執行緒上的寫入可能同時建立同一張資料表：在鎖內再確認一次並登記
+        with self._lock:
+            table = self._data.get(name)
+            if table is None:
+                table = SQLiteTable(self, name)
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table.name}" (id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                )
+                for columns in _SQLITE_INDEXES.get(name, ()):
+                    table.create_index(*columns)
+                self._data[name] = table
+        return table
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def _execute_write(self, sql: str, params: Iterable[Any] = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).rowcount
+
+    def _executemany(self, sql: str, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        with self._transaction():
+            self._conn.executemany(sql, rows)
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self)
+
+
+class _Transaction:
+    """可巢狀使用的交易：只有最外層會 BEGIN / COMMIT，例外時回滾"""
+
+    def __init__(self, db: SQLiteClient):
+        self.db = db
+
+    def __enter__(self) -> None:
+        self.db._lock.acquire()
+        if self.db._depth == 0:
+            self.db._conn.execute("BEGIN IMMEDIATE")
+        self.db._depth += 1
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            self.db._depth -= 1
+            if self.db._depth == 0:
+                self.db._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db._lock.release()
+
+
+class SQLiteTableQuery(MockTableQuery):
+    """
+    SQLite 資料表查詢
+    建構器與請求統計沿用模擬查詢，執行時轉為 SQL
+    SQLite 錯誤（例如重複的 id）與真實客戶端相同只輸出錯誤並返回空結果
+    """
+
+    def _execute(self) -> QueryResult:
+        try:
+            return self._run()
+        except sqlite3.Error as e:
+            print(f"❌ SQLite Error ({self.table_name}): {e}")
+            return QueryResult(data=[], count=0, error=str(e))
+
+    def _run(self) -> QueryResult:
+        if self._is_delete:
+            return self._do_delete()
+        if self._is_update:
+            return self._do_update()
+        if self._is_insert:
+            return self._do_insert()
+        if self._is_upsert:
+            return self._do_upsert()
+
+        table = self.client._data.get(self.table_name)
+        counting = self._is_count or self._count_type
+        if table is None:
+            return QueryResult(data=None if self._is_single else [], count=0 if counting else None)
+
+        fields, embeds = _split_select(self._select_columns)
+        conditions = self._conditions()
+        if any(embed.inner for embed in embeds):
+            # !inner 會排除沒有關聯資料的列，需先套用嵌入資源再計數與分頁
+            data = table.select(conditions, self._orders, self._after)
+            data = _mock_embed(self.client._data, self.table_name, data, embeds)
+            if self._is_count:
+                return QueryResult(data=[], count=len(data))
+            total = len(data)
+            end = None if self._limit_count is None else self._offset + self._limit_count
+            data = data[self._offset:end]
+        else:
+            if self._is_count:
+                return QueryResult(data=[], count=table.count(conditions, self._orders, self._after))
+            data = table.select(conditions, self._orders, self._after, self._limit_count, self._offset)
+            total = table.count(conditions, self._orders, self._after) if counting else None
+            if embeds:
+                data = _mock_embed(self.client._data, self.table_name, data, embeds)
+
+        if embeds and "*" not in fields:
+            fields = fields + [embed.key for embed in embeds]
+        data = [_mock_project(item, fields) for item in data]
+
+        if self._flatten:
+            data = _flatten_rows(data, self._flatten)
+
+        if self._is_single:
+            data = data[0] if data else None
+
+        return QueryResult(data=data, count=total if counting else None)
+
+    def _do_insert(self) -> QueryResult:
+        data = self._insert_data
+        rows = self.client._table(self.table_name).insert([data] if isinstance(data, dict) else data)
+        return QueryResult(data=rows, count=len(rows))
+
+    def _do_upsert(self) -> QueryResult:
+        data = self._upsert_data
+        rows = self.client._table(self.table_name).upsert(
+            [data] if isinstance(data, dict) else data, self._on_conflict, self._ignore_duplicates
+        )
+        return QueryResult(data=rows, count=len(rows))
+
+    def _do_update(self) -> QueryResult:
+        table = self.client._data.get(self.table_name)
+        if table is None:
+            return QueryResult(data=[], count=0)
+        rows = table.update(self._conditions(), self._update_data)
+        return QueryResult(data=rows, count=len(rows))
+
+    def _do_delete(self) -> QueryResult:
+        table = self.client._data.get(self.table_name)
+        # 沒有過濾條件時不刪除任何資料
+        if table is not None and self._filters:
+            table.delete(self._conditions())
+        return QueryResult(data=[], count=0)
+
+
+class AsyncSQLiteClient:
+    """
+    非同步 SQLite 客戶端
+    與同步客戶端共用同一個連線；查詢在工作執行緒上執行，不阻塞事件迴圈（連線由鎖保護，同一時間只執行一個查詢）
+    """
+
+    def __init__(self, client: SQLiteClient):
+        self._client = client
+
+    def table(self, name: str) -> "AsyncSQLiteTableQuery":
+        return AsyncSQLiteTableQuery(self._client, name)
+
+    def rpc(self, function: str, params: Optional[dict] = None) -> "AsyncSQLiteRpcQuery":
+        return AsyncSQLiteRpcQuery(self._client, function, params)
+
+    async def gather(self, *queries: Any, concurrency: Optional[int] = None) -> list[QueryResult]:
+        return await _gather_queries(queries, concurrency)
+
+    def register_rpc(self, name: str, func: Callable[[dict, dict], Any]) -> None:
+        self._client.register_rpc(name, func)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+
+class AsyncSQLiteTableQuery(SQLiteTableQuery):
+    """
+    非同步 SQLite 資料表查詢
+    SQL 在工作執行緒上執行；寫入通知與請求統計回到事件迴圈上處理，監聽函式不需考慮執行緒安全
+    """
+
+    async def execute(self) -> QueryResult:
+        started = time.perf_counter()
+        return self._finish(await asyncio.to_thread(self._execute), started)
+
+    iter_pages = AsyncTableQuery.iter_pages
+    stream = AsyncTableQuery.stream
+
+
+class AsyncSQLiteRpcQuery(MockRpcQuery):
+    """
+    非同步 SQLite 預存函式呼叫
+    函式在工作執行緒上執行；請求統計回到事件迴圈上記錄
+    """
+
+    async def execute(self) -> QueryResult:
+        started = time.perf_counter()
+        return self._finish(await asyncio.to_thread(self._call), started)
@@ -2,9 +2,239 @@
 Supabase 客戶端服務
 使用 HTTP API 直接與 Supabase 通訊（避免依賴構建問題）
 """
+import asyncio
+import copy
+import heapq
+import importlib.util
+import time
 import httpx
-from typing import Optional, Any
+from typing import Optional, Any, AsyncIterator, Callable, Iterator, NamedTuple
 from config import settings
+from services.query_cache import QueryCache
+from services import json_codec
+from services.hedging import HedgePolicy
+from services.fault_injection import AsyncFaultInjectingClient, FaultInjector, parse_latency
+from services import request_stats
+from services import write_events
+from services.mock_store import MockTable
+
+
+def _transport_options() -> dict:
+    """
+    依設定組出 httpx 客戶端的連線池、逾時與 HTTP/2 參數
+    """
+    http2 = settings.HTTP2_ENABLED
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("⚠️ 已啟用 HTTP2_ENABLED 但未安裝 h2 套件，改用 HTTP/1.1")
+        http2 = False
+    
+    return {
+        "timeout": httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": http2,
+        "headers": {"Accept-Encoding": _accept_encoding()},
+    }
+
+
+def _accept_encoding() -> str:
+    """
+    上游請求的 Accept-Encoding：依已安裝的解碼器宣告 br 與 gzip
+    """
+    if not settings.UPSTREAM_COMPRESSION:
+        return "identity"
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        return "br, gzip"
+    return "gzip"
+
+
+def _build_cache() -> Optional[QueryCache]:
+    """
+    依設定建立查詢快取，未啟用時返回 None
+    """
+    if not settings.QUERY_CACHE_ENABLED:
+        return None
+    return QueryCache(
+        ttl=settings.QUERY_CACHE_TTL,
+        max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+        max_bytes=settings.QUERY_CACHE_MAX_BYTES,
+    )
+
+
+def _build_hedge_policy() -> Optional[HedgePolicy]:
+    """
+    依設定建立對沖請求策略，未啟用時返回 None
+    """
+    if not settings.HEDGE_ENABLED:
+        return None
+    return HedgePolicy(
+        percentile=settings.HEDGE_PERCENTILE,
+        min_delay=settings.HEDGE_MIN_DELAY,
+        max_delay=settings.HEDGE_MAX_DELAY,
+        budget_ratio=settings.HEDGE_BUDGET_RATIO,
+    )
+
+
+def _fault_injection_enabled() -> bool:
+    return bool(settings.FAULT_LATENCY.strip() or settings.FAULT_ERROR_RATE)
+
+
+def _with_fault_injection(client: Any) -> Any:
+    """
+    依設定以延遲與錯誤注入包裝模擬 / SQLite 非同步客戶端，未啟用時原樣返回
+    """
+    if not _fault_injection_enabled():
+        return client
+    latency = parse_latency(settings.FAULT_LATENCY)
+    injector = FaultInjector(latency, settings.FAULT_ERROR_RATE, settings.FAULT_TIMEOUT, settings.FAULT_SEED)
+    print(f"🐢 已啟用延遲與錯誤注入：{injector!r}")
+    return AsyncFaultInjectingClient(client, injector)
+
+
+def _quote_filter_value(value: Any) -> str:
+    """
+    以雙引號包住 PostgREST 邏輯條件中的值，避免逗號或括號破壞語法
+    """
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_equal(column: str, value: Any) -> str:
+    """鍵集條件：欄位等於 value（None 以 is.null 比對）"""
+    return f"{column}.is.null" if value is None else f"{column}.eq.{_quote_filter_value(value)}"
+
+
+def _keyset_beyond(column: str, desc: bool, value: Any) -> list[str]:
+    """
+    鍵集條件：欄位排在 value 之後（多個條件時任一成立即可）
+    與 PostgreSQL 預設相同，NULL 視為最大值：升冪排在最後、降冪排在最前；id 為主鍵，不會是 NULL
+    """
+    if value is None:
+        return [f"{column}.not.is.null"] if desc else []
+    beyond = [f"{column}.{'lt' if desc else 'gt'}.{_quote_filter_value(value)}"]
+    if not desc and column != "id":
+        beyond.append(f"{column}.is.null")
+    return beyond
+
+
+# PostgREST 支援的計數方式
+COUNT_MODES = ("exact", "planned", "estimated")
+
+
+def _content_range_total(response: httpx.Response) -> Optional[int]:
+    """由 Content-Range（例如 0-24/1234 或 */1234）取得總筆數，未提供時為 None"""
+    total = response.headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _received_bytes(response: httpx.Response) -> int:
+    """上游回應實際傳輸的位元組數（壓縮前），無法取得時以解碼後的長度代替"""
+    return response.num_bytes_downloaded or len(response.content)
+
+
+async def _gather_queries(queries: tuple, concurrency: Optional[int]) -> list:
+    """
+    並行執行多個查詢，以 concurrency 限制同時進行的數量，依傳入順序返回結果
+    """
+    limit = max(1, concurrency or settings.QUERY_GATHER_CONCURRENCY)
+    if len(queries) <= limit:
+        return list(await asyncio.gather(*(query.execute() for query in queries)))
+    
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(query: Any) -> "QueryResult":
+        async with semaphore:
+            return await query.execute()
+    
+    return list(await asyncio.gather(*(run(query) for query in queries)))
+
+
+class _Embed(NamedTuple):
+    """select 字串中的嵌入資源，例如 pet:pets!inner(id,name)"""
+    key: str
+    resource: str
+    inner: bool
+    columns: str
+
+
+def _select_parts(columns: str) -> list[str]:
+    """將 select 字串依最外層的逗號拆開（巢狀的嵌入資源保持完整）"""
+    parts = []
+    depth = start = 0
+    for i, char in enumerate(columns):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(columns[start:i])
+            start = i + 1
+    parts.append(columns[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _inner_embeds(columns: str) -> str:
+    """select 字串中最外層的 !inner 嵌入資源（原樣保留），沒有時為空字串"""
+    return ",".join(part for part in _select_parts(columns)
+                    if "(" in part and "inner" in part.split("(", 1)[0].split("!")[1:])
+
+
+def _split_select(columns: str) -> tuple[list[str], list[_Embed]]:
+    """
+    將 select 字串拆為一般欄位與嵌入資源（只拆最外層，巢狀部分保留在 columns 中）
+    """
+    fields, embeds = [], []
+    for part in _select_parts(columns):
+        if "(" not in part:
+            fields.append(part)
+            continue
+        head, inner_columns = part.split("(", 1)
+        alias, _, target = head.rpartition(":")
+        resource, *hints = target.split("!")
+        embeds.append(_Embed(alias or resource, resource, "inner" in hints, inner_columns[:-1] or "*"))
+    return fields, embeds
+
+
+def _flatten_rows(rows: list, key: str) -> list:
+    """
+    以嵌入資源取代每一列：多對一的物件直接取出，一對多的列表展開，缺少的略過
+    """
+    flattened = []
+    for row in rows:
+        embedded = row.get(key)
+        if isinstance(embedded, list):
+            flattened.extend(embedded)
+        elif embedded is not None:
+            flattened.append(embedded)
+    return flattened
+
+
+def _page_query(query: Any, after: Optional[list], page_size: int) -> Any:
+    """
+    複製查詢並套用分頁條件，作為 iter_pages() 的單頁查詢
+    排序鍵不含 id 時補上 id 作為次要排序，確保分頁不重複也不遺漏
+    """
+    orders = list(query._orders) or [("id", False)]
+    if all(column != "id" for column, _ in orders):
+        orders.append(("id", orders[-1][1]))
+    page = copy.copy(query)
+    page._prepared_params = None
+    page._orders = orders
+    page._after = after
+    page._limit_count = page_size
+    page._offset = 0
+    page._is_single = False
+    page._count_type = None
+    page._use_cache = False
+    return page
 
 
 class SupabaseClient:
@@ -13,7 +243,8 @@ class SupabaseClient:
     提供簡單的資料庫操作介面
     """
     
-    def __init__(self, url: str, key: str):
+    def __init__(self, url: str, key: str, transport: Optional[dict] = None,
+                 cache: Optional[QueryCache] = None):
         self.base_url = f"{url}/rest/v1"
         self.headers = {
             "apikey": key,
@@ -21,7 +252,9 @@ class SupabaseClient:
             "Content-Type": "application/json",
             "Prefer": "return=representation",
         }
-        self._client = httpx.Client(timeout=30.0)
+        self._header_sets: dict[str, dict] = {}
+        self._client = httpx.Client(**(transport or {"timeout": 30.0}))
+        self.cache = cache
     
     def table(self, name: str) -> "TableQuery":
         """
@@ -29,230 +262,1054 @@ class SupabaseClient:
         """
         return TableQuery(self, name)
     
+    def rpc(self, function: str, params: Optional[dict] = None) -> "RpcQuery":
+        """
+        呼叫 PostgREST 預存函式
+        """
+        return RpcQuery(self, function, params)
+    
+    def headers_for(self, prefer: str) -> dict:
+        """
+        取得帶有指定 Prefer 的標頭集合
+        每種 Prefer 只建立一次並重複使用，呼叫端不應修改
+        """
+        headers = self._header_sets.get(prefer)
+        if headers is None:
+            headers = self._header_sets[prefer] = {**self.headers, "Prefer": prefer}
+        return headers
+    
     def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
         """
         發送 HTTP 請求
         """
         url = f"{self.base_url}/{endpoint}"
         return self._client.request(method, url, headers=self.headers, **kwargs)
+    
+    def _send(self, method: str, table: str, url: str, **kwargs) -> httpx.Response:
+        """
+        發送查詢請求，並計入目前 API 請求的上游呼叫統計
+        """
+        started = time.perf_counter()
+        response = self._client.request(method, url, **kwargs)
+        request_stats.record(table, method, kwargs.get("params"), time.perf_counter() - started,
+                             _received_bytes(response))
+        return response
+    
+    def warm_up(self) -> None:
+        """
+        預先建立一條連線，讓 TLS 握手不落在第一個使用者請求上
+        """
+        self._client.head(f"{self.base_url}/", headers=self.headers)
+    
+    def close(self) -> None:
+        """
+        關閉底層連線池
+        """
+        self._client.close()
 
 
-class TableQuery:
+class AsyncSupabaseClient:
+    """
+    Supabase REST API 非同步客戶端
+    使用 httpx.AsyncClient，避免查詢阻塞事件迴圈
+    """
+    
+    def __init__(self, url: str, key: str, transport: Optional[dict] = None,
+                 cache: Optional[QueryCache] = None, coalesce: bool = True,
+                 hedging: Optional[HedgePolicy] = None):
+        self.base_url = f"{url}/rest/v1"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=representation",
+        }
+        self._header_sets: dict[str, dict] = {}
+        self._client = httpx.AsyncClient(**(transport or {"timeout": 30.0}))
+        self.cache = cache
+        # 進行中的 select：相同查詢共用同一個上游請求
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self.hedging = hedging
+    
+    def table(self, name: str) -> "AsyncTableQuery":
+        """
+        選取資料表
+        """
+        return AsyncTableQuery(self, name)
+    
+    def rpc(self, function: str, params: Optional[dict] = None) -> "AsyncRpcQuery":
+        """
+        呼叫 PostgREST 預存函式
+        """
+        return AsyncRpcQuery(self, function, params)
+    
+    async def gather(self, *queries: Any, concurrency: Optional[int] = None) -> list["QueryResult"]:
+        """
+        並行執行多個互不相依的查詢（table 或 rpc），依傳入順序返回結果
+        端點延遲接近最慢的查詢而非總和；concurrency 預設為 QUERY_GATHER_CONCURRENCY
+        """
+        return await _gather_queries(queries, concurrency)
+    
+    def headers_for(self, prefer: str) -> dict:
+        """
+        取得帶有指定 Prefer 的標頭集合
+        每種 Prefer 只建立一次並重複使用，呼叫端不應修改
+        """
+        headers = self._header_sets.get(prefer)
+        if headers is None:
+            headers = self._header_sets[prefer] = {**self.headers, "Prefer": prefer}
+        return headers
+    
+    async def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        發送 HTTP 請求
+        """
+        url = f"{self.base_url}/{endpoint}"
+        return await self._client.request(method, url, headers=self.headers, **kwargs)
+    
+    async def _send(self, method: str, table: str, url: str, **kwargs) -> httpx.Response:
+        """
+        發送查詢請求，並計入目前 API 請求的上游呼叫統計
+        """
+        started = time.perf_counter()
+        response = await self._client.request(method, url, **kwargs)
+        request_stats.record(table, method, kwargs.get("params"), time.perf_counter() - started,
+                             _received_bytes(response))
+        return response
+    
+    async def _select_get(self, table: str, url: str, **kwargs) -> httpx.Response:
+        """
+        發送 select 的 GET 請求
+        啟用對沖時，若超過延遲門檻仍未回應則再送出一個相同請求，取先成功者並取消另一個
+        """
+        policy = self.hedging
+        if policy is None:
+            return await self._send("GET", table, url, **kwargs)
+        
+        policy.start(table)
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self._client.get(url, **kwargs))
+        pending = {primary}
+        hedge = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=policy.delay(table))
+            if not done and policy.try_acquire(table):
+                hedge = asyncio.ensure_future(self._client.get(url, **kwargs))
+                pending.add(hedge)
+            
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        # 一律以原始請求送出起算，對沖勝出時即為原始請求延遲的下限
+                        elapsed = time.perf_counter() - started
+                        policy.record(table, elapsed, hedge_won=task is hedge)
+                        response = task.result()
+                        request_stats.record(table, "GET", kwargs.get("params"), elapsed, _received_bytes(response))
+                        return response
+                if not pending:
+                    # 全部失敗：拋出原始請求的錯誤
+                    return primary.result()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        並行預先建立多條連線，讓 TLS 握手不落在使用者請求上
+        """
+        url = f"{self.base_url}/"
+        results = await asyncio.gather(
+            *(self._client.head(url, headers=self.headers) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            print(f"⚠️ 連線預熱失敗 {len(errors)}/{connections}: {errors[0]}")
+    
+    async def aclose(self) -> None:
+        """
+        關閉底層連線池
+        """
+        await self._client.aclose()
+
+
+class BaseTableQuery:
     """
     資料表查詢建構器
+    負責累積查詢條件並組出 PostgREST 請求參數，實際傳輸由子類別實作
     """
     
-    def __init__(self, client: SupabaseClient, table_name: str):
+    # 不可變的預設值放在類別層級，建立查詢時只需初始化可變的欄位
+    _select_columns = "*"
+    _limit_count: Optional[int] = None
+    _offset: Optional[int] = None
+    _after: Optional[list] = None
+    _is_single = False
+    _count_type: Optional[str] = None
+    _use_cache = False
+    _cache_ttl: Optional[float] = None
+    _flatten: Optional[str] = None
+    # 由 PreparedQuery.bind() 設定的現成查詢參數；會改變查詢參數的建構方法將其清除，改回逐項組裝
+    _prepared_params: Optional[dict] = None
+    _prepared_headers: Optional[dict] = None
+    
+    # 延遲執行標記
+    _is_insert = False
+    _insert_data = None
+    _on_conflict: Optional[str] = None
+    _resolution: Optional[str] = None
+    _chunk_size: Optional[int] = None
+    _write_concurrency = 1
+    _is_update = False
+    _update_data = None
+    _is_delete = False
+    _is_count = False
+    
+    def __init__(self, client: Any, table_name: str):
         self.client = client
         self.table_name = table_name
-        self._filters: list[str] = []
-        self._select_columns = "*"
-        self._order_column: Optional[str] = None
-        self._order_desc = False
-        self._limit_count: Optional[int] = None
-        self._is_single = False
-        self._count_type: Optional[str] = None
-        
-        # 延遲執行標記
-        self._is_insert = False
-        self._insert_data = None
-        self._is_update = False
-        self._update_data = None
-        self._is_delete = False
+        # (欄位, PostgREST 運算式)，例如 ("id", "eq.1")
+        self._filters: list[tuple[str, str]] = []
+        self._orders: list[tuple[str, bool]] = []
     
-    def select(self, columns: str = "*", count: Optional[str] = None) -> "TableQuery":
+    def select(self, columns: str = "*", count: Optional[str] = None):
         """選取欄位"""
         self._select_columns = columns
         self._count_type = count
+        self._prepared_params = None
         return self
     
-    def eq(self, column: str, value: Any) -> "TableQuery":
+    def eq(self, column: str, value: Any):
         """等於條件"""
-        self._filters.append(f"{column}=eq.{value}")
+        self._filters.append((column, f"eq.{value}"))
+        self._prepared_params = None
         return self
     
-    def in_(self, column: str, values: list) -> "TableQuery":
+    def in_(self, column: str, values: list):
         """包含在列表中"""
         values_str = ",".join(str(v) for v in values)
-        self._filters.append(f"{column}=in.({values_str})")
+        self._filters.append((column, f"in.({values_str})"))
+        self._prepared_params = None
         return self
     
-    def order(self, column: str, desc: bool = False, asc: bool = False) -> "TableQuery":
-        """排序"""
-        self._order_column = column
-        self._order_desc = desc
+    def order(self, column: str, desc: bool = False, asc: bool = False):
+        """排序（可多次呼叫，依序作為次要排序欄位）"""
+        self._orders.append((column, desc))
+        self._prepared_params = None
         return self
     
-    def limit(self, count: int) -> "TableQuery":
+    def limit(self, count: int):
         """限制數量"""
         self._limit_count = count
+        self._prepared_params = None
         return self
     
-    def single(self) -> "TableQuery":
+    def range(self, start: int, end: int):
+        """取得第 start 到 end 筆（含兩端，從 0 起算）"""
+        self._offset = start
+        self._limit_count = end - start + 1
+        self._prepared_params = None
+        return self
+    
+    def after(self, *values: Any):
+        """
+        鍵集分頁：只取排序鍵在 values 之後的資料
+        values 依序對應 order() 的欄位，通常為上一頁最後一筆的排序鍵
+        """
+        self._after = list(values)
+        self._prepared_params = None
+        return self
+    
+    def next_keyset(self, rows: list) -> Optional[list]:
+        """
+        由本頁資料計算下一頁的 after() 參數
+        未滿一頁時表示已無下一頁，返回 None
+        """
+        if not rows or not self._orders or self._limit_count is None or len(rows) < self._limit_count:
+            return None
+        last = rows[-1]
+        return [last.get(column) for column, _ in self._orders]
+    
+    def single(self):
         """預期只有一筆結果"""
         self._is_single = True
         return self
     
-    def insert(self, data: dict | list) -> "TableQuery":
-        """插入資料"""
+    def flatten(self, resource: str):
+        """
+        以嵌入資源取代結果中的每一列
+        例如 select("pets!inner(*)").flatten("pets") 直接得到寵物列表；count 仍為主表筆數
+        """
+        self._flatten = resource
+        return self
+    
+    def cached(self, ttl: Optional[float] = None):
+        """
+        允許此 select 使用客戶端的查詢快取
+        快取保存回應本體的位元組，每次命中重新解碼，呼叫端取得的資料可自由修改
+        """
+        self._use_cache = True
+        self._cache_ttl = ttl
+        return self
+    
+    def insert(self, data: dict | list, chunk_size: Optional[int] = None, concurrency: int = 1):
+        """
+        插入資料
+        大量資料依 chunk_size（預設 WRITE_CHUNK_SIZE）分批送出，
+        非同步客戶端可用 concurrency 同時送出多批
+        """
         self._insert_data = data
         self._is_insert = True
+        self._chunk_size = chunk_size
+        self._write_concurrency = concurrency
+        return self
+    
+    def upsert(self, data: dict | list, on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False, chunk_size: Optional[int] = None,
+               concurrency: int = 1):
+        """
+        插入或合併資料，一次往返完成「不存在才新增」
+        on_conflict 為唯一鍵欄位（逗號分隔，預設為主鍵），
+        ignore_duplicates 為 True 時略過已存在的資料，否則以新值覆寫
+        """
+        self.insert(data, chunk_size=chunk_size, concurrency=concurrency)
+        self._on_conflict = on_conflict
+        self._resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
         return self
         
-    def update(self, data: dict) -> "TableQuery":
+    def update(self, data: dict):
         """更新資料"""
         self._update_data = data
         self._is_update = True
         return self
         
-    def delete(self) -> "TableQuery":
+    def delete(self):
         """刪除資料"""
         self._is_delete = True
         return self
+    
+    def count(self, mode: str = "exact"):
+        """
+        只取得符合條件的筆數：以 HEAD 請求讀取 Content-Range，不下載任何資料列
+        mode 為 exact（COUNT(*)）、planned（查詢計畫估計）或 estimated（超過上限時改用估計）
+        """
+        if mode not in COUNT_MODES:
+            raise ValueError(f"不支援的計數方式: {mode}")
+        self._is_count = True
+        self._count_type = mode
+        return self
+    
+    @property
+    def _url(self) -> str:
+        return f"{self.client.base_url}/{self.table_name}"
+    
+    def _filter_params(self) -> dict:
+        """將過濾條件轉為查詢參數"""
+        return dict(self._filters)
+    
+    def _keyset_filter(self) -> str:
+        """
+        將 after() 轉為 PostgREST 的 or 條件，例如
+        (created_at.lt.X,and(created_at.eq.X,id.lt.Y))
+        排序鍵可為 None（NULL），排序位置與 PostgreSQL 預設相同
+        """
+        if len(self._after) > len(self._orders):
+            raise ValueError("after() 的值數量不能超過 order() 欄位數")
+        
+        clauses = []
+        for i, value in enumerate(self._after):
+            column, desc = self._orders[i]
+            equal = [_keyset_equal(prev_column, prev_value)
+                     for (prev_column, _), prev_value in zip(self._orders[:i], self._after)]
+            for condition in _keyset_beyond(column, desc, value):
+                conditions = equal + [condition]
+                clauses.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+        if not clauses:
+            # 沒有任何資料列排在之後
+            clauses.append("id.is.null")
+        return f"({','.join(clauses)})"
+    
+    def _select_request(self) -> tuple[dict, dict]:
+        """組出 select 請求的查詢參數與標頭"""
+        if self._prepared_params is not None:
+            return self._prepared_params, self._prepared_headers
+        
+        params = {"select": self._select_columns} if self._select_columns else {}
+        params.update(self._filters)
+        
+        if self._after:
+            params["or"] = self._keyset_filter()
+        
+        if self._orders:
+            params["order"] = ",".join([
+                f"{column}.{'desc' if desc else 'asc'}" for column, desc in self._orders
+            ])
+        
+        if self._limit_count:
+            params["limit"] = str(self._limit_count)
+        
+        if self._offset:
+            params["offset"] = str(self._offset)
+        
+        headers = self.client.headers
+        if self._count_type:
+            headers = self.client.headers_for(f"count={self._count_type}")
+        
+        return params, headers
+    
+    def _query_cache(self) -> Optional[QueryCache]:
+        if not self._use_cache:
+            return None
+        return getattr(self.client, "cache", None)
+    
+    def _select_key(self) -> tuple:
+        """select 的識別鍵，供快取與合併進行中請求使用"""
+        return (
+            self.table_name,
+            self._select_columns,
+            tuple(self._filters),
+            tuple(self._orders),
+            self._limit_count,
+            self._offset,
+            tuple(self._after) if self._after else None,
+            self._is_single,
+            self._count_type,
+            self._flatten,
+        )
+    
+    def _cache_result(self, cache: QueryCache, key: tuple, generation: int,
+                      content: Optional[bytes], count: Optional[int]) -> None:
+        """
+        快取回應本體與總數，而非解碼後的物件：
+        位元組預算即為實際佔用的記憶體（解碼後的 dict / str 約為 JSON 的數倍），命中時也不會返回共用物件
+        content 為 None（請求失敗）時不快取
+        """
+        if content is not None:
+            cache.set(self.table_name, key, (content, count), len(content), generation, self._cache_ttl)
+    
+    def _cached_result(self, cache: QueryCache, key: tuple) -> Optional["QueryResult"]:
+        """讀取快取並解碼，未命中時返回 None"""
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        content, count = cached
+        return self._parse_select(content, count)
+    
+    def _invalidate_cache(self) -> None:
+        """
+        寫入後清除同一資料表的快取
+        並讓之後的 select 不再加入寫入前就已發出的請求
+        """
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            cache.invalidate_table(self.table_name)
+        
+        inflight = getattr(self.client, "_inflight", None)
+        if inflight:
+            for key in [k for k in inflight if k[0] == self.table_name]:
+                del inflight[key]
+    
+    def _written(self, operation: str, rows: Optional[list]) -> None:
+        """寫入成功後清除快取，並通知資料表的寫入監聽"""
+        self._invalidate_cache()
+        write_events.notify(self.table_name, operation, rows)
+    
+    def _insert_operation(self) -> str:
+        return "upsert" if self._resolution else "insert"
+    
+    def _insert_payload(self) -> list:
+        if isinstance(self._insert_data, dict):
+            return [self._insert_data]
+        return self._insert_data
+    
+    def _insert_chunks(self) -> list[list]:
+        """將插入資料切成固定大小的批次"""
+        rows = self._insert_payload()
+        size = self._chunk_size or settings.WRITE_CHUNK_SIZE
+        if len(rows) <= size:
+            return [rows]
+        return [rows[i:i + size] for i in range(0, len(rows), size)]
+    
+    def _insert_request(self) -> tuple[dict, dict]:
+        """組出 insert / upsert 請求的查詢參數與標頭"""
+        params = {}
+        headers = self.client.headers
+        if self._resolution:
+            headers = self.client.headers_for(f"return=representation,resolution={self._resolution}")
+            if self._on_conflict:
+                params["on_conflict"] = self._on_conflict
+        return params, headers
+    
+    def _select_body(self, response: httpx.Response) -> tuple[Optional[bytes], Optional[int], Optional[str]]:
+        """select 回應的 (本體, 總數, 錯誤)；請求失敗時本體為 None"""
+        if response.status_code != 200:
+            return None, None, f"HTTP {response.status_code}"
+        return response.content, _content_range_total(response) if self._count_type else None, None
+    
+    def _decode_select(self, content: Optional[bytes], count: Optional[int], error: Optional[str]) -> "QueryResult":
+        """由 _select_body() 的結果解碼；每次呼叫都產生新的物件"""
+        result = self._parse_select(content, count)
+        result.error = error
+        return result
+    
+    def _parse_select(self, content: Optional[bytes], count: Optional[int]) -> "QueryResult":
+        """由回應本體組出 select 結果（content 為 None 表示請求失敗）"""
+        data = json_codec.loads(content) if content is not None else []
+        
+        if self._flatten:
+            data = _flatten_rows(data, self._flatten)
+        
+        if self._is_single:
+            data = data[0] if data else None
+        
+        return QueryResult(data=data, count=count)
+    
+    def _count_request(self) -> tuple[dict, dict]:
+        """
+        組出計數 HEAD 請求的查詢參數與標頭
+        !inner 嵌入會排除沒有關聯資料的列，嵌入資源上的過濾條件也需要該資源出現在 select 中，
+        因此保留最外層的 !inner 嵌入，其餘欄位不需要
+        """
+        params = self._filter_params()
+        inner = _inner_embeds(self._select_columns) if self._select_columns else ""
+        if inner:
+            params["select"] = inner
+        return params, self.client.headers_for(f"count={self._count_type}")
+    
+    def _count_result(self, response: httpx.Response) -> "QueryResult":
+        """解析計數回應"""
+        if response.status_code not in [200, 206]:
+            print(f"❌ Supabase Count Error {self.table_name} ({response.status_code})")
+            return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
+        return QueryResult(data=[], count=_content_range_total(response) or 0)
+    
+    def _insert_result(self, response: httpx.Response) -> "QueryResult":
+        """解析 insert 回應"""
+        if response.status_code not in [200, 201]:
+            print(f"❌ Supabase API Error ({response.status_code}): {response.text}")
+            return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
+
+        result_data = json_codec.loads(response.content)
+        return QueryResult(data=result_data, count=len(result_data) if result_data else 0)
+    
+    @staticmethod
+    def _merge_results(results: list["QueryResult"]) -> "QueryResult":
+        """合併分批寫入的結果"""
+        if len(results) == 1:
+            return results[0]
+        data = [row for result in results for row in result.data]
+        # 任一批次失敗即視為失敗（成功的批次仍保留在 data 中）
+        error = next((result.error for result in results if result.error), None)
+        return QueryResult(data=data, count=len(data), error=error)
+    
+    def _update_result(self, response: httpx.Response) -> "QueryResult":
+        """解析 update 回應"""
+        if response.status_code not in [200, 204]:
+            print(f"❌ Supabase API Error ({response.status_code}): {response.text}")
+            return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
+        result_data = json_codec.loads(response.content) if response.content else []
+        return QueryResult(data=result_data, count=len(result_data) if result_data else 0)
+
+
+class PreparedQuery:
+    """
+    預先編譯的 select 查詢形狀
+    於模組載入時建立一次，每個請求只需以 bind() 填入篩選值，
+    select、order 與標頭在建立時組好，省去逐次呼叫建構方法與組字串的成本
+    """
+    
+    def __init__(self, table: str, columns: str = "*", filters: tuple[str, ...] = (),
+                 order: tuple[tuple[str, bool], ...] = (), limit: Optional[int] = None,
+                 single: bool = False, count: Optional[str] = None, cached: bool = False):
+        self.table = table
+        self.columns = columns
+        self.filters = tuple(filters)
+        self.order = tuple(order)
+        self.limit = limit
+        self.single = single
+        self.count = count
+        self.cached = cached
+        
+        self._base_params = {"select": columns}
+        if self.order:
+            self._base_params["order"] = ",".join(
+                f"{column}.{'desc' if desc else 'asc'}" for column, desc in self.order
+            )
+        self._prefer = f"count={count}" if count else None
+        self._filter_set = frozenset(self.filters)
+    
+    def headers(self, client: Any) -> dict:
+        """取得此查詢形狀使用的標頭集合"""
+        return client.headers_for(self._prefer) if self._prefer else client.headers
+    
+    def bind(self, client: Any, limit: Optional[int] = None, after: Optional[list] = None, **values: Any):
+        """
+        填入篩選值並返回可執行的查詢
+        值為 None 的篩選欄位會被略過；limit 與 after 用於分頁，帶有 after 的頁面不計算總數
+        返回的查詢與以建構器組出者相同，之後仍可繼續呼叫建構方法（例如再加上 eq()）
+        """
+        query = client.table(self.table)
+        if not isinstance(query, BaseTableQuery):
+            return self._bind_builder(query, limit, after, values)
+        
+        params = self._base_params.copy()
+        filters = []
+        filter_set = self._filter_set
+        for column, value in values.items():
+            if column not in filter_set:
+                raise ValueError(f"未定義的篩選欄位: {column}")
+            if value is not None:
+                expression = params[column] = f"eq.{value}"
+                filters.append((column, expression))
+        
+        query._select_columns = self.columns
+        query._filters = filters
+        query._orders = list(self.order)
+        query._is_single = self.single
+        query._use_cache = self.cached
+        limit = self.limit if limit is None else limit
+        if limit:
+            query._limit_count = limit
+            params["limit"] = str(limit)
+        if after:
+            # 鍵集條件會縮小計數範圍，之後的頁面不計算總數
+            query._after = list(after)
+            params["or"] = query._keyset_filter()
+            query._prepared_headers = client.headers
+        else:
+            query._count_type = self.count
+            query._prepared_headers = self.headers(client)
+        query._prepared_params = params
+        return query
+    
+    def _bind_builder(self, query: Any, limit: Optional[int], after: Optional[list], values: dict):
+        """模擬客戶端等其他實作：以建構器 API 組出相同查詢"""
+        unknown = values.keys() - self._filter_set
+        if unknown:
+            raise ValueError(f"未定義的篩選欄位: {', '.join(sorted(unknown))}")
+        
+        query = query.select(self.columns, count=None if after else self.count)
+        for column, value in values.items():
+            if value is not None:
+                query = query.eq(column, value)
+        for column, desc in self.order:
+            query = query.order(column, desc=desc)
+        limit = self.limit if limit is None else limit
+        if limit is not None:
+            query = query.limit(limit)
+        if after:
+            query = query.after(*after)
+        if self.single:
+            query = query.single()
+        return query.cached() if self.cached else query
+
+
+class TableQuery(BaseTableQuery):
+    """
+    資料表查詢建構器（同步版本）
+    """
+
+    def execute(self) -> "QueryResult":
+        """執行查詢"""
+        if self._is_insert:
+            return self._do_insert()
+        if self._is_update:
+            return self._do_update()
+        if self._is_delete:
+            return self._do_delete()
+        if self._is_count:
+            return self._do_count()
+            
+        return self._do_select()
+
+    def iter_pages(self, page_size: int = 1000) -> Iterator[list]:
+        """
+        以鍵集分頁逐頁讀取，每次只持有一頁資料
+        未指定排序時依 id 排序；select 的欄位需包含排序欄位與 id
+        任一頁失敗時引發 QueryError
+        """
+        after = self._after
+        while True:
+            page = _page_query(self, after, page_size)
+            result = page.execute()
+            if result.error:
+                # 中途失敗不能以空頁表示，否則呼叫端會把部分資料當成完整結果
+                raise QueryError(f"{self.table_name} 分頁讀取失敗: {result.error}")
+            rows = result.data
+            if rows:
+                yield rows
+            after = page.next_keyset(rows)
+            if after is None:
+                return
+
+    def stream(self, page_size: int = 1000) -> Iterator[dict]:
+        """逐筆產出查詢結果，底層以 iter_pages() 分頁讀取"""
+        for rows in self.iter_pages(page_size):
+            yield from rows
+
+    def _do_select(self) -> "QueryResult":
+        cache = self._query_cache()
+        if cache is not None:
+            key = self._select_key()
+            cached = self._cached_result(cache, key)
+            if cached is not None:
+                return cached
+            generation = cache.generation(self.table_name)
+        
+        params, headers = self._select_request()
+        
+        try:
+            response = self.client._send("GET", self.table_name, self._url, headers=headers, params=params)
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+        content, count, error = self._select_body(response)
+        if cache is not None:
+            self._cache_result(cache, key, generation, content, count)
+        return self._decode_select(content, count, error)
+
+    def _do_count(self) -> "QueryResult":
+        params, headers = self._count_request()
+        try:
+            response = self.client._send("HEAD", self.table_name, self._url, headers=headers, params=params)
+            return self._count_result(response)
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
+    def _do_insert(self) -> "QueryResult":
+        params, headers = self._insert_request()
+        results = [self._post_chunk(chunk, params, headers) for chunk in self._insert_chunks()]
+        result = self._merge_results(results)
+        self._written(self._insert_operation(), result.data)
+        return result
+
+    def _post_chunk(self, rows: list, params: dict, headers: dict) -> "QueryResult":
+        try:
+            response = self.client._send(
+                "POST",
+                self.table_name,
+                self._url,
+                headers=headers,
+                params=params,
+                content=json_codec.dumps(rows)
+            )
+            return self._insert_result(response)
+        except Exception as e:
+            print(f"❌ Supabase Client Exception: {e}")
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
 
-    def execute(self) -> "QueryResult":
+    def _do_update(self) -> "QueryResult":
+        try:
+            response = self.client._send(
+                "PATCH",
+                self.table_name,
+                self._url,
+                headers=self.client.headers,
+                params=self._filter_params(),
+                content=json_codec.dumps(self._update_data)
+            )
+            result = self._update_result(response)
+            self._written("update", result.data or None)
+            return result
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
+    def _do_delete(self) -> "QueryResult":
+        try:
+            response = self.client._send(
+                "DELETE",
+                self.table_name,
+                self._url,
+                headers=self.client.headers,
+                params=self._filter_params()
+            )
+            if response.status_code not in [200, 204]:
+                print(f"❌ Supabase API Error ({response.status_code}): {response.text}")
+                return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
+            self._written("delete", None)
+            return QueryResult(data=[], count=0)
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
+
+class AsyncTableQuery(BaseTableQuery):
+    """
+    資料表查詢建構器（非同步版本）
+    與 TableQuery 相同的建構 API，execute() 需以 await 呼叫
+    """
+
+    async def execute(self) -> "QueryResult":
         """執行查詢"""
         if self._is_insert:
-            return self._do_insert()
+            return await self._do_insert()
         if self._is_update:
-            return self._do_update()
+            return await self._do_update()
         if self._is_delete:
-            return self._do_delete()
+            return await self._do_delete()
+        if self._is_count:
+            return await self._do_count()
             
-        return self._do_select()
+        return await self._do_select()
 
-    def _do_select(self) -> "QueryResult":
-        params = {}
-        endpoint = self.table_name
+    async def iter_pages(self, page_size: int = 1000) -> AsyncIterator[list]:
+        """
+        以鍵集分頁逐頁讀取，每次只持有一頁資料
+        未指定排序時依 id 排序；select 的欄位需包含排序欄位與 id
+        任一頁失敗時引發 QueryError
+        """
+        after = self._after
+        while True:
+            page = _page_query(self, after, page_size)
+            result = await page.execute()
+            if result.error:
+                # 中途失敗不能以空頁表示，否則呼叫端會把部分資料當成完整結果
+                raise QueryError(f"{self.table_name} 分頁讀取失敗: {result.error}")
+            rows = result.data
+            if rows:
+                yield rows
+            after = page.next_keyset(rows)
+            if after is None:
+                return
+
+    async def stream(self, page_size: int = 1000) -> AsyncIterator[dict]:
+        """逐筆產出查詢結果，底層以 iter_pages() 分頁讀取"""
+        async for rows in self.iter_pages(page_size):
+            for row in rows:
+                yield row
+
+    async def _do_select(self) -> "QueryResult":
+        key = self._select_key()
+        cache = self._query_cache()
+        if cache is not None:
+            cached = self._cached_result(cache, key)
+            if cached is not None:
+                return cached
         
-        if self._select_columns:
-            params["select"] = self._select_columns
+        if not self.client.coalesce:
+            return self._decode_select(*await self._fetch_select(key, cache))
         
-        for f in self._filters:
-            key, value = f.split("=", 1)
-            params[key] = value
+        # 相同的查詢已在進行中則直接等待其結果，不再發出新的上游請求
+        inflight = self.client._inflight
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_select(key, cache))
+            inflight[key] = task
+            task.add_done_callback(lambda t: inflight.pop(key) if inflight.get(key) is t else None)
+        else:
+            self.client.coalesced += 1
         
-        if self._order_column:
-            order_dir = "desc" if self._order_desc else "asc"
-            params["order"] = f"{self._order_column}.{order_dir}"
+        # shield：單一等待者被取消時不影響其他共用此請求的等待者
+        # 共用的是回應本體，每個等待者各自解碼，修改資料列不會影響其他等待者
+        return self._decode_select(*await asyncio.shield(task))
+
+    async def _fetch_select(self, key: tuple, cache: Optional[QueryCache]) -> tuple[Optional[bytes], Optional[int], Optional[str]]:
+        """發出 select 請求，返回 _select_body() 的 (本體, 總數, 錯誤)"""
+        if cache is not None:
+            generation = cache.generation(self.table_name)
         
-        if self._limit_count:
-            params["limit"] = str(self._limit_count)
+        params, headers = self._select_request()
         
-        headers = dict(self.client.headers)
-        if self._count_type:
-            headers["Prefer"] = f"count={self._count_type}"
+        try:
+            response = await self.client._select_get(self.table_name, self._url, headers=headers, params=params)
+        except Exception as e:
+            return None, 0, str(e) or type(e).__name__
+        body = self._select_body(response)
+        if cache is not None:
+            self._cache_result(cache, key, generation, body[0], body[1])
+        return body
+
+    async def _do_count(self) -> "QueryResult":
+        params, headers = self._count_request()
+        try:
+            response = await self.client._send("HEAD", self.table_name, self._url, headers=headers, params=params)
+            return self._count_result(response)
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
+    async def _do_insert(self) -> "QueryResult":
+        params, headers = self._insert_request()
+        chunks = self._insert_chunks()
+        semaphore = asyncio.Semaphore(max(1, self._write_concurrency))
         
+        async def post(rows: list) -> "QueryResult":
+            async with semaphore:
+                return await self._post_chunk(rows, params, headers)
+        
+        results = await asyncio.gather(*(post(chunk) for chunk in chunks))
+        result = self._merge_results(list(results))
+        self._written(self._insert_operation(), result.data)
+        return result
+
+    async def _post_chunk(self, rows: list, params: dict, headers: dict) -> "QueryResult":
         try:
-            response = self.client._client.get(
-                f"{self.client.base_url}/{endpoint}",
+            response = await self.client._send(
+                "POST",
+                self.table_name,
+                self._url,
                 headers=headers,
-                params=params
+                params=params,
+                content=json_codec.dumps(rows)
             )
-            
-            data = response.json() if response.status_code == 200 else []
-            count = None
-            
-            if self._count_type and "content-range" in response.headers:
-                range_header = response.headers.get("content-range", "")
-                if "/" in range_header:
-                    count = int(range_header.split("/")[-1])
-            
-            if self._is_single:
-                data = data[0] if data else None
-            
-            return QueryResult(data=data, count=count)
-        except Exception:
-            return QueryResult(data=[], count=0)
+            return self._insert_result(response)
+        except Exception as e:
+            print(f"❌ Supabase Client Exception: {e}")
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
 
-    def _do_insert(self) -> "QueryResult":
-        if isinstance(self._insert_data, dict):
-            data = [self._insert_data]
-        else:
-            data = self._insert_data
-            
+    async def _do_update(self) -> "QueryResult":
         try:
-            response = self.client._client.post(
-                f"{self.client.base_url}/{self.table_name}",
+            response = await self.client._send(
+                "PATCH",
+                self.table_name,
+                self._url,
                 headers=self.client.headers,
-                json=data
+                params=self._filter_params(),
+                content=json_codec.dumps(self._update_data)
             )
-            
-            if response.status_code not in [200, 201]:
-                print(f"❌ Supabase API Error ({response.status_code}): {response.text}")
-
-            result_data = response.json() if response.status_code in [200, 201] else []
-            return QueryResult(data=result_data, count=len(result_data) if result_data else 0)
+            result = self._update_result(response)
+            self._written("update", result.data or None)
+            return result
         except Exception as e:
-            print(f"❌ Supabase Client Exception: {e}")
-            return QueryResult(data=[], count=0)
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
 
-    def _do_update(self) -> "QueryResult":
-        params = {}
-        for f in self._filters:
-            key, value = f.split("=", 1)
-            params[key] = value
-        
+    async def _do_delete(self) -> "QueryResult":
         try:
-            response = self.client._client.patch(
-                f"{self.client.base_url}/{self.table_name}",
+            response = await self.client._send(
+                "DELETE",
+                self.table_name,
+                self._url,
                 headers=self.client.headers,
-                params=params,
-                json=self._update_data
+                params=self._filter_params()
             )
-            
-            result_data = response.json() if response.status_code == 200 else []
-            return QueryResult(data=result_data, count=len(result_data) if result_data else 0)
-        except Exception:
+            if response.status_code not in [200, 204]:
+                print(f"❌ Supabase API Error ({response.status_code}): {response.text}")
+                return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
+            self._written("delete", None)
             return QueryResult(data=[], count=0)
+        except Exception as e:
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
 
-    def _do_delete(self) -> "QueryResult":
-        params = {}
-        for f in self._filters:
-            key, value = f.split("=", 1)
-            params[key] = value
+
+class BaseRpcQuery:
+    """
+    PostgREST 預存函式呼叫（POST /rpc/<函式>）
+    讓彙總類的工作在資料庫內一次完成，實際傳輸由子類別實作
+    """
+    
+    def __init__(self, client: Any, function: str, params: Optional[dict] = None):
+        self.client = client
+        self.function = function
+        self.params = params or {}
+    
+    @property
+    def _url(self) -> str:
+        return f"{self.client.base_url}/rpc/{self.function}"
+    
+    def _rpc_result(self, response: httpx.Response) -> "QueryResult":
+        """
+        解析函式回應
+        回傳集合的函式得到列表，純量或 json 函式得到單一值
+        """
+        if response.status_code not in [200, 201, 204]:
+            print(f"❌ Supabase RPC Error {self.function} ({response.status_code}): {response.text}")
+            return QueryResult(data=[], count=0, error=f"HTTP {response.status_code}")
         
+        data = json_codec.loads(response.content) if response.content else None
+        return QueryResult(data=data, count=len(data) if isinstance(data, list) else None)
+
+
+class RpcQuery(BaseRpcQuery):
+    """
+    預存函式呼叫（同步版本）
+    """
+    
+    def execute(self) -> "QueryResult":
+        """呼叫函式"""
         try:
-            response = self.client._client.delete(
-                f"{self.client.base_url}/{self.table_name}",
+            response = self.client._send(
+                "POST",
+                f"rpc/{self.function}",
+                self._url,
                 headers=self.client.headers,
-                params=params
+                content=json_codec.dumps(self.params)
             )
-            return QueryResult(data=[], count=0)
-        except Exception:
-            return QueryResult(data=[], count=0)
+            return self._rpc_result(response)
+        except Exception as e:
+            print(f"❌ Supabase RPC Exception {self.function}: {e}")
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
+
+class AsyncRpcQuery(BaseRpcQuery):
+    """
+    預存函式呼叫（非同步版本）
+    """
+    
+    async def execute(self) -> "QueryResult":
+        """呼叫函式"""
+        try:
+            response = await self.client._send(
+                "POST",
+                f"rpc/{self.function}",
+                self._url,
+                headers=self.client.headers,
+                content=json_codec.dumps(self.params)
+            )
+            return self._rpc_result(response)
+        except Exception as e:
+            print(f"❌ Supabase RPC Exception {self.function}: {e}")
+            return QueryResult(data=[], count=0, error=str(e) or type(e).__name__)
+
 
 
 class QueryResult:
     """
     查詢結果包裝
+    上游錯誤或逾時時 data 為空、error 為錯誤說明，與「查無資料」或「略過重複資料」的空結果區分
     """
     
-    def __init__(self, data: Any, count: Optional[int] = None):
+    def __init__(self, data: Any, count: Optional[int] = None, error: Optional[str] = None):
         self.data = data
         self.count = count
+        self.error = error
+
+
+class QueryError(Exception):
+    """無法以空結果表示的查詢失敗（例如逐頁讀取中途失敗）"""
 
 
 # 全域客戶端實例
 _client = None
+_async_client = None
 _mock_client = None
+_local_client = None
 
 
 def get_client():
     """
     獲取 Supabase 客戶端單例
-    在 DEBUG 模式下，優先返回模擬客戶端
+    依 DATA_BACKEND 返回模擬客戶端、本機 SQLite 客戶端或 Supabase 客戶端（DEBUG 模式預設為模擬客戶端）
     """
-    global _client, _mock_client
+    global _client, _mock_client, _local_client
     
-    # DEBUG 模式優先使用模擬客戶端
-    if settings.DEBUG:
+    backend = settings.data_backend
+    if backend == "mock":
         if _mock_client is None:
             print("🔧 使用模擬客戶端（DEBUG 模式）")
             _mock_client = MockSupabaseClient()
             # 確保重新加載時數據重置或保持一致
         return _mock_client
     
+    if backend == "sqlite":
+        if _local_client is None:
+            from services.sqlite_client import SQLiteClient
+            print(f"🗄️ 使用本機 SQLite 後端：{settings.SQLITE_PATH}")
+            _local_client = SQLiteClient(settings.SQLITE_PATH)
+        return _local_client
+    
+    if backend != "supabase":
+        raise ValueError(f"不支援的資料後端: {backend}")
+    
     # 驗證配置
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         raise ValueError("Supabase 配置未設置：請設定 SUPABASE_URL 和 SUPABASE_KEY 環境變數")
@@ -261,20 +1318,286 @@ def get_client():
         _client = SupabaseClient(
             url=settings.SUPABASE_URL,
             key=settings.SUPABASE_KEY,
+            transport=_transport_options(),
+            cache=_build_cache(),
         )
     
     return _client
 
 
+def get_async_client():
+    """
+    獲取非同步 Supabase 客戶端單例，供 API 路由使用
+    模擬與 SQLite 後端返回包裝同一份數據的非同步客戶端；設定 FAULT_* 時再包上延遲與錯誤注入
+    """
+    global _async_client
+    
+    backend = settings.data_backend
+    if backend == "mock":
+        if _async_client is None:
+            _async_client = _with_fault_injection(AsyncMockSupabaseClient(get_client()))
+        return _async_client
+    
+    if backend == "sqlite":
+        if _async_client is None:
+            from services.sqlite_client import AsyncSQLiteClient
+            _async_client = _with_fault_injection(AsyncSQLiteClient(get_client()))
+        return _async_client
+    
+    if backend != "supabase":
+        raise ValueError(f"不支援的資料後端: {backend}")
+    
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        raise ValueError("Supabase 配置未設置：請設定 SUPABASE_URL 和 SUPABASE_KEY 環境變數")
+    
+    if _async_client is None:
+        # 延遲與錯誤注入只用於本機後端，不得影響正式環境的請求
+        if _fault_injection_enabled():
+            print("⚠️ FAULT_* 設定只適用於 mock / sqlite 後端，Supabase 後端已忽略")
+        _async_client = AsyncSupabaseClient(
+            url=settings.SUPABASE_URL,
+            key=settings.SUPABASE_KEY,
+            transport=_transport_options(),
+            cache=_build_cache(),
+            coalesce=settings.QUERY_COALESCE_ENABLED,
+            hedging=_build_hedge_policy(),
+        )
+    
+    return _async_client
+
+
+async def open_clients() -> None:
+    """
+    應用程式啟動時建立非同步客戶端並預熱連線池
+    配置不完整時僅提示，與 lifespan 的驗證行為一致
+    """
+    try:
+        client = get_async_client()
+    except ValueError as e:
+        print(f"⚠️ 無法建立 Supabase 客戶端: {e}")
+        return
+    
+    if settings.HTTP_WARMUP_CONNECTIONS > 0:
+        await client.warm_up(settings.HTTP_WARMUP_CONNECTIONS)
+
+
+async def close_clients() -> None:
+    """
+    應用程式關閉時釋放所有客戶端的連線池
+    """
+    global _client, _async_client, _local_client
+    
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    
+    if _client is not None:
+        _client.close()
+        _client = None
+    
+    if _local_client is not None:
+        _local_client.close()
+        _local_client = None
+
+
+def _mock_sort_value(value: Any) -> tuple:
+    """
+    模擬排序鍵：與 PostgreSQL 預設相同，None 視為最大值（升冪排在最後、降冪排在最前），
+    也避免與其他型別比較出錯
+    """
+    return (1, 0) if value is None else (0, value)
+
+
+def _mock_sort_key(columns: list[str]) -> Callable[[dict], tuple]:
+    """
+    多欄位排序鍵，順序與 _mock_sort_value 相同
+    常見的一、兩個欄位攤平為 (是否為 None, 值) 序列，避免每列建立巢狀 tuple
+    """
+    if len(columns) == 1:
+        first = columns[0]
+        return lambda item: ((a := item.get(first)) is None, a)
+    if len(columns) == 2:
+        first, second = columns
+        return lambda item: ((a := item.get(first)) is None, a, (b := item.get(second)) is None, b)
+    return lambda item: tuple(_mock_sort_value(item.get(column)) for column in columns)
+
+
+def _mock_project(row: dict, fields: list[str]) -> dict:
+    """
+    依 select 的一般欄位取出資料列的副本，支援 * 、別名（alias:column）與型別轉換（column::type，忽略轉換）
+    """
+    if "*" in fields:
+        return row.copy()
+    item = {}
+    for field in fields:
+        name = field.split("::", 1)[0]
+        alias, _, column = name.rpartition(":")
+        item[alias or column] = row.get(column)
+    return item
+
+
+# 估算回應大小時序列化的資料列數
+_MOCK_SIZE_SAMPLE = 8
+
+
+def _mock_response_bytes(data: Any) -> int:
+    """
+    估算模擬結果序列化後的位元組數（用於 Server-Timing）
+    只序列化平均分佈的少量資料列再依筆數推算，避免為了統計把整個結果再序列化一次
+    """
+    if not isinstance(data, list) or len(data) <= _MOCK_SIZE_SAMPLE:
+        return len(json_codec.dumps(data))
+    step = len(data) / _MOCK_SIZE_SAMPLE
+    sample = [data[int(i * step)] for i in range(_MOCK_SIZE_SAMPLE)]
+    # 扣除陣列括號後依比例放大，再補回括號
+    return round((len(json_codec.dumps(sample)) - 2) * len(data) / _MOCK_SIZE_SAMPLE) + 2
+
+
+# 模擬資料表的外鍵（資料表 -> {欄位: 參照的資料表}），與 init_database.sql 一致，用於模擬嵌入資源
+_MOCK_FOREIGN_KEYS = {
+    "favorites": {"user_id": "users", "pet_id": "pets"},
+    "adoption_applications": {"user_id": "users", "pet_id": "pets"},
+    "pet_listings": {"user_id": "users"},
+    "message_threads": {"user_id": "users"},
+    "messages": {"thread_id": "message_threads"},
+}
+
+# 模擬資料表預先建立的雜湊索引（id 之外），對應 init_database.sql 的索引；其他欄位在第一次過濾時建立
+_MOCK_INDEXES = {
+    "pets": ("pet_type", "location", "age_group"),
+    "favorites": ("user_id", "pet_id"),
+    "adoption_applications": ("user_id", "pet_id"),
+    "pet_listings": ("user_id",),
+    "message_threads": ("user_id",),
+    "messages": ("thread_id",),
+}
+
+
+def _mock_lookup(tables: dict, table: str, column: str, value: Any) -> list:
+    """以索引取得模擬資料表中欄位等於 value 的資料列"""
+    rows = tables.get(table)
+    return rows.lookup(column, (value,)) if rows is not None else []
+
+
+# 模擬客戶端的預存函式：函式名稱 -> fn(資料表, 參數)，對應 init_database.sql 中的同名函式
+_MOCK_RPC_FUNCTIONS: dict[str, Callable[[dict, dict], Any]] = {}
+
+
+def mock_rpc(name: str):
+    """註冊模擬預存函式的裝飾器"""
+    def decorator(func: Callable[[dict, dict], Any]):
+        _MOCK_RPC_FUNCTIONS[name] = func
+        return func
+    return decorator
+
+
+@mock_rpc("get_user_stats")
+def _mock_get_user_stats(tables: dict, params: dict) -> dict:
+    user_id = params.get("p_user_id")
+    return {
+        "applications_count": len(_mock_lookup(tables, "adoption_applications", "user_id", user_id)),
+        "favorites_count": len(_mock_lookup(tables, "favorites", "user_id", user_id)),
+    }
+
+
+@mock_rpc("get_message_threads")
+def _mock_get_message_threads(tables: dict, params: dict) -> list:
+    user_id = params.get("p_user_id")
+    threads = _mock_lookup(tables, "message_threads", "user_id", user_id)
+    threads.sort(key=lambda row: _mock_sort_value(row.get("created_at")), reverse=True)
+    
+    last_messages: dict[str, dict] = {}
+    unread: dict[str, int] = {}
+    messages = tables.get("messages")
+    thread_messages = messages.lookup("thread_id", [thread["id"] for thread in threads]) if messages is not None else []
+    for message in thread_messages:
+        thread_id = message.get("thread_id")
+        last = last_messages.get(thread_id)
+        # 時間相同時以較晚寫入者為準
+        if last is None or _mock_sort_value(message.get("created_at")) >= _mock_sort_value(last.get("created_at")):
+            last_messages[thread_id] = message
+        if message.get("sender") == "other" and message.get("is_read") is False:
+            unread[thread_id] = unread.get(thread_id, 0) + 1
+    
+    rows = []
+    for thread in threads:
+        last = last_messages.get(thread["id"], {})
+        rows.append({
+            "id": thread["id"],
+            "shelter_name": thread.get("shelter_name"),
+            "shelter_avatar": thread.get("shelter_avatar"),
+            "pet_name": thread.get("pet_name"),
+            "created_at": thread.get("created_at"),
+            "last_text": last.get("text"),
+            "last_image_url": last.get("image_url"),
+            "last_created_at": last.get("created_at"),
+            "unread_count": unread.get(thread["id"], 0),
+        })
+    return rows
+
+
+def _mock_embed(tables: dict, table: str, rows: list, embeds: list[_Embed]) -> list:
+    """
+    依外鍵為每一列附加嵌入資源：多對一附加物件（或 None），一對多附加列表
+    返回新的列，不修改存儲中的數據
+    """
+    resolved = []
+    for embed in embeds:
+        fields, nested = _split_select(embed.columns)
+        targets = tables.get(embed.resource)
+        if targets is None:
+            targets = MockTable()
+        
+        # 只以索引取出會被參照到的關聯資料列
+        column = next((c for c, t in _MOCK_FOREIGN_KEYS.get(table, {}).items() if t == embed.resource), None)
+        if column is not None:
+            referenced = targets.lookup("id", {row.get(column) for row in rows})
+            lookup = {target.get("id"): target for target in referenced}
+            many = False
+        else:
+            column = next((c for c, t in _MOCK_FOREIGN_KEYS.get(embed.resource, {}).items() if t == table), None)
+            if column is None:
+                raise ValueError(f"找不到 {table} 與 {embed.resource} 的關聯")
+            lookup = {}
+            for target in targets.lookup(column, {row.get("id") for row in rows}):
+                lookup.setdefault(target.get(column), []).append(target)
+            many = True
+        resolved.append((embed, column, lookup, many, fields, nested))
+    
+    def project(target: str, row: dict, fields: list, nested: list) -> dict:
+        item = _mock_project(row, fields)
+        if not nested:
+            return item
+        embedded = _mock_embed(tables, target, [item], nested)
+        return embedded[0] if embedded else None
+    
+    result = []
+    for row in rows:
+        item = row.copy()
+        for embed, column, lookup, many, fields, nested in resolved:
+            if many:
+                value = [project(embed.resource, child, fields, nested) for child in lookup.get(row.get("id"), [])]
+            else:
+                target = lookup.get(row.get(column))
+                value = project(embed.resource, target, fields, nested) if target is not None else None
+            if embed.inner and not value:
+                break
+            item[embed.key] = value
+        else:
+            result.append(item)
+    return result
+
+
 class MockSupabaseClient:
     """
     開發模式模擬客戶端
     當沒有配置 Supabase 時使用模擬數據
+    indexes 為 資料表 -> 欄位，在 _MOCK_INDEXES 之外額外預先建立的雜湊索引
     """
     
-    def __init__(self):
+    def __init__(self, indexes: Optional[dict[str, tuple[str, ...]]] = None):
         # 模擬數據存儲
-        self._data = {
+        tables = {
             "pets": [
                 {
                     "id": "1",
@@ -421,9 +1744,33 @@ class MockSupabaseClient:
                 },
             ],
         }
+        declared = {**_MOCK_INDEXES, **(indexes or {})}
+        self._data: dict[str, MockTable] = {
+            name: MockTable(rows, ("id", *declared.get(name, ())))
+            for name, rows in tables.items()
+        }
+        # 預存函式，可用 register_rpc() 覆寫
+        self._rpc_functions = dict(_MOCK_RPC_FUNCTIONS)
     
     def table(self, name: str) -> "MockTableQuery":
         return MockTableQuery(self, name)
+    
+    def rpc(self, function: str, params: Optional[dict] = None) -> "MockRpcQuery":
+        return MockRpcQuery(self, function, params)
+    
+    def register_rpc(self, name: str, func: Callable[[dict, dict], Any]) -> None:
+        """註冊或覆寫模擬預存函式"""
+        self._rpc_functions[name] = func
+    
+    def create_index(self, table: str, column: str) -> None:
+        """為模擬資料表的欄位預先建立雜湊索引"""
+        self._table(table).create_index(column)
+    
+    def _table(self, name: str) -> MockTable:
+        table = self._data.get(name)
+        if table is None:
+            table = self._data[name] = MockTable(indexes=("id",))
+        return table
 
 
 class MockTableQuery:
@@ -435,14 +1782,25 @@ class MockTableQuery:
         self.client = client
         self.table_name = table_name
         self._filters = {}
+        self._orders: list[tuple[str, bool]] = []
+        self._limit_count: Optional[int] = None
+        self._offset = 0
+        self._after: Optional[list] = None
+        self._select_columns = "*"
+        self._count_type: Optional[str] = None
+        self._flatten: Optional[str] = None
         self._is_single = False
         self._is_delete = False
         self._is_update = False
         self._update_data = None
         self._is_insert = False
         self._insert_data = None
+        self._is_upsert = False
+        self._is_count = False
     
     def select(self, columns: str = "*", count: Optional[str] = None) -> "MockTableQuery":
+        self._select_columns = columns
+        self._count_type = count
         return self
     
     def eq(self, column: str, value: Any) -> "MockTableQuery":
@@ -454,16 +1812,86 @@ class MockTableQuery:
         return self
     
     def order(self, column: str, desc: bool = False, asc: bool = False) -> "MockTableQuery":
+        self._orders.append((column, desc))
         return self
     
     def limit(self, count: int) -> "MockTableQuery":
+        self._limit_count = count
+        return self
+    
+    def range(self, start: int, end: int) -> "MockTableQuery":
+        self._offset = start
+        self._limit_count = end - start + 1
+        return self
+    
+    def after(self, *values: Any) -> "MockTableQuery":
+        self._after = list(values)
         return self
     
+    next_keyset = BaseTableQuery.next_keyset
+    iter_pages = TableQuery.iter_pages
+    stream = TableQuery.stream
+    
     def single(self) -> "MockTableQuery":
         self._is_single = True
         return self
     
+    def flatten(self, resource: str) -> "MockTableQuery":
+        self._flatten = resource
+        return self
+    
+    def count(self, mode: str = "exact") -> "MockTableQuery":
+        if mode not in COUNT_MODES:
+            raise ValueError(f"不支援的計數方式: {mode}")
+        self._is_count = True
+        return self
+    
+    def cached(self, ttl: Optional[float] = None) -> "MockTableQuery":
+        return self
+    
     def execute(self) -> QueryResult:
+        started = time.perf_counter()
+        return self._finish(self._execute(), started)
+    
+    def _finish(self, result: QueryResult, started: float) -> QueryResult:
+        """執行後的寫入通知與請求統計，需在呼叫端的執行緒（事件迴圈）上執行"""
+        result = self._notify_write(result)
+        if request_stats.current() is None:
+            return result
+        
+        # 以與真實客戶端相同的形狀計入上游呼叫統計，讓開發模式也能發現 N+1
+        if self._is_delete:
+            method = "DELETE"
+        elif self._is_update:
+            method = "PATCH"
+        elif self._is_insert or self._is_upsert:
+            method = "POST"
+        elif self._is_count:
+            method = "HEAD"
+        else:
+            method = "GET"
+        params = list(self._filters)
+        if self._orders:
+            params.append("order")
+        if self._limit_count is not None:
+            params.append("limit")
+        request_stats.record(self.table_name, method, params, time.perf_counter() - started,
+                             _mock_response_bytes(result.data))
+        return result
+    
+    def _notify_write(self, result: QueryResult) -> QueryResult:
+        """寫入後通知資料表的寫入監聽，與真實客戶端相同刪除時不提供資料列"""
+        if self._is_delete:
+            write_events.notify(self.table_name, "delete", None)
+        elif self._is_update:
+            write_events.notify(self.table_name, "update", result.data)
+        elif self._is_insert:
+            write_events.notify(self.table_name, "insert", result.data)
+        elif self._is_upsert:
+            write_events.notify(self.table_name, "upsert", result.data)
+        return result
+    
+    def _execute(self) -> QueryResult:
         if self._is_delete:
             return self._do_delete()
         
@@ -474,38 +1902,126 @@ class MockTableQuery:
         # 處理插入操作
         if self._is_insert:
             return self._do_insert()
+        if self._is_upsert:
+            return self._do_upsert()
+        
+        # 正常的 select 查詢：以索引過濾
+        table = self.client._data.get(self.table_name)
+        if table is None:
+            table = MockTable()
+        data = table.where(self._conditions())
+        
+        # 模擬嵌入資源（!inner 會排除沒有關聯資料的列，需在計算總數前處理）
+        # 沒有嵌入資源時以插槽排序、分頁，只為返回的頁面建立資料列
+        fields, embeds = _split_select(self._select_columns)
+        if embeds:
+            data = _mock_embed(self.client._data, self.table_name, table.rows(data), embeds)
         
-        # 正常的 select 查詢
-        data = self.client._data.get(self.table_name, [])
-        
-        # 應用過濾
-        if self._filters:
-            filtered = []
-            for item in data:
-                match = True
-                for key, value in self._filters.items():
-                    if key.endswith("_in"):
-                        real_key = key[:-3]
-                        if item.get(real_key) not in value:
-                            match = False
-                            break
-                    elif item.get(key) != value:
-                        match = False
-                        break
-                if match:
-                    filtered.append(item)
-            data = filtered
+        if self._is_count:
+            return QueryResult(data=[], count=len(data))
+        
+        # 鍵集分頁是過濾條件，計入總數
+        if self._after:
+            data = [item for item in data if self._is_after(item if embeds else table.row(item))]
+        
+        total = len(data)
+        if embeds:
+            data = self._sorted_page(data)
+        else:
+            data = table.rows(self._sorted_page(data, table.sort_key))
+        
+        # 與 PostgREST 相同只返回 select 的欄位（嵌入資源已由 _mock_embed 附加），並與存儲中的資料列分離
+        if embeds and "*" not in fields:
+            fields = fields + [embed.key for embed in embeds]
+        data = [_mock_project(item, fields) for item in data]
+        
+        if self._flatten:
+            data = _flatten_rows(data, self._flatten)
         
         if self._is_single:
             data = data[0] if data else None
         
-        return QueryResult(data=data, count=len(data) if isinstance(data, list) else 1)
+        # 與真實客戶端相同，只有以 select(count=...) 要求時才返回總數
+        return QueryResult(data=data, count=total if self._count_type else None)
+    
+    def _sorted_page(self, data: list, sort_key: Callable[[list[str]], Callable] = _mock_sort_key) -> list:
+        """
+        排序並取出 range / limit 指定的頁面（data 為資料列，或搭配 MockTable.sort_key 時為插槽）
+        排序方向一致時以複合鍵排序一次，只需要前幾筆時改用堆積取前 k 筆（O(n log k)）；
+        方向混合時依次要欄位到主要欄位做穩定排序
+        """
+        end = None if self._limit_count is None else self._offset + self._limit_count
+        if self._orders:
+            directions = {desc for _, desc in self._orders}
+            if len(directions) == 1:
+                desc = directions.pop()
+                key = sort_key([column for column, _ in self._orders])
+                if end is not None and end * 4 < len(data):
+                    # nsmallest / nlargest 的結果與 sorted(...)[:end] 相同（同值保持原順序）
+                    data = (heapq.nlargest if desc else heapq.nsmallest)(end, data, key=key)
+                else:
+                    data = sorted(data, key=key, reverse=desc)
+            else:
+                data = list(data)
+                for column, desc in reversed(self._orders):
+                    data.sort(key=sort_key([column]), reverse=desc)
+        
+        if self._offset or end is not None:
+            data = data[self._offset:end]
+        return data
+    
+    def _conditions(self) -> list[tuple[str, tuple]]:
+        """將 eq / in_ 過濾條件轉為 MockTable.where 的格式"""
+        return [
+            (key[:-3], tuple(value)) if key.endswith("_in") else (key, (value,))
+            for key, value in self._filters.items()
+        ]
     
-    def insert(self, data: dict | list) -> "MockTableQuery":
+    def _is_after(self, item: dict) -> bool:
+        """判斷資料是否排在 after() 指定的鍵之後"""
+        for (column, desc), value in zip(self._orders, self._after):
+            current = _mock_sort_value(item.get(column))
+            target = _mock_sort_value(value)
+            if current != target:
+                return current < target if desc else current > target
+        return False
+    
+    def insert(self, data: dict | list, chunk_size: Optional[int] = None, concurrency: int = 1) -> "MockTableQuery":
         """插入操作 - 返回 self 來支援鏈式調用"""
         self._insert_data = data
         self._is_insert = True
         return self
+    
+    def upsert(self, data: dict | list, on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False, chunk_size: Optional[int] = None,
+               concurrency: int = 1) -> "MockTableQuery":
+        """插入或合併操作 - 依 on_conflict 欄位比對既有資料"""
+        self._upsert_data = data
+        self._is_upsert = True
+        self._on_conflict = [c.strip() for c in (on_conflict or "id").split(",")]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+    
+    def _do_upsert(self):
+        """實際執行插入或合併操作"""
+        data = self._upsert_data
+        if isinstance(data, dict):
+            data = [data]
+        
+        table = self.client._table(self.table_name)
+        result_data = []
+        for item in data:
+            existing = table.where([(c, (item.get(c),)) for c in self._on_conflict])
+            if existing:
+                if not self._ignore_duplicates:
+                    result_data.extend(row.copy() for row in table.update(existing[:1], item))
+                continue
+            new_item = item.copy()
+            if "id" not in new_item:
+                new_item["id"] = str(len(table) + 1)
+            result_data.append(dict(table.append(new_item)))
+        
+        return QueryResult(data=result_data, count=len(result_data))
 
     def _do_insert(self):
         """實際執行插入操作"""
@@ -516,17 +2032,15 @@ class MockTableQuery:
         if isinstance(data, dict):
             data = [data]
         
-        table_data = self.client._data.get(self.table_name, [])
+        table = self.client._table(self.table_name)
         result_data = []
         for item in data:
             if "id" not in item:
-                item["id"] = str(len(table_data) + 1)
+                item["id"] = str(len(table) + 1)
             # 簡單的深拷貝以避免引用問題
             new_item = item.copy()
-            table_data.append(new_item)
-            result_data.append(new_item)
+            result_data.append(dict(table.append(new_item)))
         
-        self.client._data[self.table_name] = table_data
         return QueryResult(data=result_data, count=len(result_data))
     
     def update(self, data: dict) -> "MockTableQuery":
@@ -540,20 +2054,10 @@ class MockTableQuery:
         if not hasattr(self, '_update_data'):
             return QueryResult(data=[], count=0)
         
-        table_data = self.client._data.get(self.table_name, [])
-        updated = []
-        
-        for item in table_data:
-            match = True
-            for key, value in self._filters.items():
-                if key.endswith("_in"):
-                    continue
-                if item.get(key) != value:
-                    match = False
-                    break
-            if match:
-                item.update(self._update_data)
-                updated.append(item)
+        table = self.client._data.get(self.table_name)
+        if table is None:
+            return QueryResult(data=[], count=0)
+        updated = [row.copy() for row in table.update(table.where(self._conditions()), self._update_data)]
         
         return QueryResult(data=updated, count=len(updated))
     
@@ -564,29 +2068,91 @@ class MockTableQuery:
     
     def _do_delete(self):
         """實際執行刪除操作"""
-        table_data = self.client._data.get(self.table_name, [])
-        
-        if self._filters:
-            new_data = []
-            for item in table_data:
-                keep = False
-                for key, value in self._filters.items():
-                    if key.endswith("_in"):
-                        continue
-                    if item.get(key) != value:
-                        keep = True
-                        break
-                if keep:
-                    new_data.append(item)
-            self.client._data[self.table_name] = new_data
+        table = self.client._data.get(self.table_name)
+        
+        # 沒有過濾條件時不刪除任何資料
+        if table is not None and self._filters:
+            table.delete(table.where(self._conditions()))
         
         return QueryResult(data=[], count=0)
+
+
+class MockRpcQuery:
+    """
+    模擬預存函式呼叫
+    """
+    
+    def __init__(self, client: MockSupabaseClient, function: str, params: Optional[dict] = None):
+        self.client = client
+        self.function = function
+        self.params = params or {}
+    
+    def execute(self) -> QueryResult:
+        started = time.perf_counter()
+        return self._finish(self._call(), started)
+    
+    def _call(self) -> QueryResult:
+        """執行函式本身（SQLite 後端在工作執行緒上呼叫）"""
+        func = self.client._rpc_functions.get(self.function)
+        if func is None:
+            print(f"❌ Mock RPC Error: 未定義的函式 {self.function}")
+            return QueryResult(data=[], count=0, error=f"未定義的函式 {self.function}")
+        
+        data = func(self.client._data, self.params)
+        return QueryResult(data=data, count=len(data) if isinstance(data, list) else None)
+    
+    def _finish(self, result: QueryResult, started: float) -> QueryResult:
+        """記錄請求統計（需在請求的事件迴圈上呼叫）"""
+        if result.error is None and request_stats.current() is not None:
+            request_stats.record(f"rpc/{self.function}", "POST", None, time.perf_counter() - started,
+                                 _mock_response_bytes(result.data))
+        return result
+
+
+class AsyncMockSupabaseClient:
+    """
+    非同步模擬客戶端
+    與同步模擬客戶端共用同一份數據，提供可 await 的查詢介面
+    """
+    
+    def __init__(self, mock_client: MockSupabaseClient):
+        self._mock_client = mock_client
+    
+    def table(self, name: str) -> "AsyncMockTableQuery":
+        return AsyncMockTableQuery(self._mock_client, name)
+    
+    def rpc(self, function: str, params: Optional[dict] = None) -> "AsyncMockRpcQuery":
+        return AsyncMockRpcQuery(self._mock_client, function, params)
+    
+    async def gather(self, *queries: Any, concurrency: Optional[int] = None) -> list[QueryResult]:
+        return await _gather_queries(queries, concurrency)
+    
+    def register_rpc(self, name: str, func: Callable[[dict, dict], Any]) -> None:
+        self._mock_client.register_rpc(name, func)
+    
+    async def warm_up(self, connections: int = 1) -> None:
+        pass
+    
+    async def aclose(self) -> None:
+        pass
+
+
+class AsyncMockTableQuery(MockTableQuery):
+    """
+    非同步模擬資料表查詢
+    """
+    
+    async def execute(self) -> QueryResult:
+        return MockTableQuery.execute(self)
+    
+    iter_pages = AsyncTableQuery.iter_pages
+    stream = AsyncTableQuery.stream
+
+
+class AsyncMockRpcQuery(MockRpcQuery):
+    """
+    非同步模擬預存函式呼叫
+    """
     
-    def __del__(self):
-        """對象銷毀時自動執行刪除或更新操作"""
-        if getattr(self, '_is_delete', False):
-            self._do_delete()
-        if getattr(self, '_is_update', False):
-            self._do_update()
-        if getattr(self, '_is_insert', False):
-            self._do_insert()
+    async def execute(self) -> QueryResult:
+        return MockRpcQuery.execute(self)
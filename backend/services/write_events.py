@@ -0,0 +1,36 @@
+"""
+資料表寫入通知
+客戶端在寫入成功後呼叫 notify()，讓行程內由資料表衍生的結構（例如搜尋索引）增量更新
+"""
+from typing import Callable, Optional
+
+# 監聽函式：fn(操作, 寫入後的資料列)；操作為 insert / upsert / update / delete
+Listener = Callable[[str, Optional[list]], None]
+
+_listeners: dict[str, list[Listener]] = {}
+
+
+def subscribe(table: str, listener: Listener) -> None:
+    """註冊資料表的寫入監聽（同一函式只註冊一次）"""
+    listeners = _listeners.setdefault(table, [])
+    if listener not in listeners:
+        listeners.append(listener)
+
+
+def unsubscribe(table: str, listener: Listener) -> None:
+    listeners = _listeners.get(table)
+    if listeners and listener in listeners:
+        listeners.remove(listener)
+
+
+def notify(table: str, operation: str, rows: Optional[list]) -> None:
+    """
+    通知資料表已寫入
+    rows 為寫入後的資料列；無法得知受影響的資料列時（刪除、未返回內容的更新）為 None
+    監聽函式的錯誤只輸出警告，不影響寫入結果
+    """
+    for listener in _listeners.get(table, ()):
+        try:
+            listener(operation, rows)
+        except Exception as e:
+            print(f"⚠️ 寫入通知處理失敗（{table}）: {e}")
@@ -0,0 +1,63 @@
+"""
+測試共用設定
+測試自 backend 目錄匯入模組（與 uvicorn main:app 相同）；預設使用模擬資料後端，不需 Supabase
+"""
+import json
+import os
+import sys
+from typing import Callable, Optional
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_BACKEND", "mock")
+
+from services.supabase_client import AsyncSupabaseClient  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakePostgREST:
+    """
+    以 httpx.MockTransport 模擬的 PostgREST
+    GET 返回 rows 中該資料表的所有資料列（不解析過濾條件），其他方法返回請求本體；記錄每個請求
+    """
+
+    def __init__(self):
+        self.rows: dict[str, list] = {}
+        self.requests: list[httpx.Request] = []
+        # 可覆寫的處理函式：fn(request) -> httpx.Response 或 None（None 時使用預設行為）
+        self.handler: Optional[Callable[[httpx.Request], Optional[httpx.Response]]] = None
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.handler is not None:
+            response = self.handler(request)
+            if response is not None:
+                return response
+        table = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "GET":
+            rows = self.rows.get(table, [])
+            return httpx.Response(200, json=rows, headers={"Content-Range": f"0-{len(rows) - 1}/{len(rows)}"})
+        if request.method in ("POST", "PATCH"):
+            body = json.loads(request.content)
+            return httpx.Response(201 if request.method == "POST" else 200,
+                                  json=body if isinstance(body, list) else [body])
+        return httpx.Response(204)
+
+    def gets(self, table: Optional[str] = None) -> list[httpx.Request]:
+        return [r for r in self.requests
+                if r.method == "GET" and (table is None or r.url.path.endswith(f"/{table}"))]
+
+    def client(self, **kwargs) -> AsyncSupabaseClient:
+        return AsyncSupabaseClient("http://postgrest.test", "test-key",
+                                   transport={"transport": httpx.MockTransport(self)}, **kwargs)
+
+
+@pytest.fixture
+def postgrest() -> FakePostgREST:
+    return FakePostgREST()
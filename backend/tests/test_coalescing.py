@@ -0,0 +1,104 @@
+"""合併相同的進行中 select"""
+import asyncio
+
+import httpx
+import pytest
+
+PETS = [{"id": "1", "name": "Bella"}]
+
+
+def held_gets(postgrest, release: asyncio.Event):
+    """GET 請求等待 release 後才回應，其他請求使用預設行為"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            await release.wait()
+        return httpx.Response(200, json=PETS) if request.method == "GET" else httpx.Response(201, json=[])
+    postgrest.handler = handler
+
+
+@pytest.mark.anyio
+async def test_identical_selects_share_one_request(postgrest):
+    postgrest.rows["pets"] = PETS
+    client = postgrest.client()
+
+    results = await asyncio.gather(*(client.table("pets").select("id,name").eq("id", "1").execute()
+                                     for _ in range(5)))
+    assert [r.data for r in results] == [PETS] * 5
+    assert len(postgrest.gets()) == 1
+    assert client.coalesced == 4
+    assert client._inflight == {}
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_different_queries_are_not_merged(postgrest):
+    client = postgrest.client()
+    await asyncio.gather(
+        client.table("pets").select("id").eq("id", "1").execute(),
+        client.table("pets").select("id").eq("id", "2").execute(),
+        client.table("pets").select("id,name").eq("id", "1").execute(),
+        client.table("stories").select("id").eq("id", "1").execute(),
+    )
+    assert len(postgrest.gets()) == 4
+    assert client.coalesced == 0
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_coalescing_can_be_disabled(postgrest):
+    client = postgrest.client(coalesce=False)
+    await asyncio.gather(*(client.table("pets").select("id").execute() for _ in range(3)))
+    assert len(postgrest.gets()) == 3
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_write_detaches_inflight_select(postgrest):
+    release = asyncio.Event()
+    held_gets(postgrest, release)
+    client = postgrest.client()
+
+    before = asyncio.ensure_future(client.table("pets").select("id").execute())
+    await asyncio.sleep(0)
+    await client.table("pets").insert({"id": "2"}).execute()
+    # 寫入後的 select 不得加入寫入前發出的請求
+    after = asyncio.ensure_future(client.table("pets").select("id").execute())
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    assert len(postgrest.gets()) == 2
+    assert client.coalesced == 0
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_shared_request(postgrest):
+    release = asyncio.Event()
+    held_gets(postgrest, release)
+    client = postgrest.client()
+
+    first = asyncio.ensure_future(client.table("pets").select("id").execute())
+    second = asyncio.ensure_future(client.table("pets").select("id").execute())
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert (await second).data == PETS
+    assert first.cancelled()
+    assert len(postgrest.gets()) == 1
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_waiters_get_their_own_rows(postgrest):
+    postgrest.rows["pets"] = PETS
+    client = postgrest.client()
+    results = await asyncio.gather(*(client.table("pets").select("id,name").execute() for _ in range(3)))
+    assert len(postgrest.gets()) == 1
+    # 路由會就地在資料列加入欄位，不能影響共用同一請求的其他等待者
+    results[0].data[0]["name"] = "changed"
+    results[0].data.append({"id": "2"})
+    assert [r.data for r in results[1:]] == [PETS, PETS]
+    assert results[1].data is not results[2].data
+    await client.aclose()
@@ -0,0 +1,94 @@
+"""回應壓縮：編碼協商、大小與內容類型門檻、串流與 ETag"""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services import compression
+from services.compression import CompressionMiddleware, choose_encoding
+
+PREFERRED = compression.ENCODINGS[0]
+BIG = {"items": [{"id": i, "name": "毛孩"} for i in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return JSONResponse(BIG, headers={"ETag": '"abc"', "Vary": "Origin"})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/text")
+    def text():
+        return PlainTextResponse("x" * 5000)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"[1]" for _ in range(3)), media_type="application/json")
+
+    app.add_middleware(CompressionMiddleware, min_size=1024)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", PREFERRED),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", PREFERRED),
+    ("*, br;q=0", "gzip"),
+    ("identity", None),
+    ("GZIP", "gzip"),
+    ("gzip;q=bad", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODINGS", ("gzip",))
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") is None
+
+
+@pytest.mark.parametrize("encoding", compression.ENCODINGS)
+def test_large_json_is_compressed(client, encoding):
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    # httpx 自動解壓縮：內容與原本相同
+    assert response.json() == BIG
+    assert int(response.headers["Content-Length"]) < len(response.content)
+    assert response.headers["Vary"] == "Origin, Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"abc"'
+
+
+def test_gzip_body_round_trips(client):
+    with client.stream("GET", "/big", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == JSONResponse(BIG).body
+
+
+@pytest.mark.parametrize("path, headers", [
+    ("/big", {"Accept-Encoding": "identity"}),
+    ("/small", {"Accept-Encoding": "gzip"}),
+    ("/text", {"Accept-Encoding": "gzip"}),
+    ("/stream", {"Accept-Encoding": "gzip"}),
+])
+def test_passthrough(client, path, headers):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" not in response.headers.get("Vary", "")
+
+
+def test_stream_body_is_intact(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.content == b"[1][1][1]"
@@ -0,0 +1,95 @@
+"""條件式 GET：ETag、304 與依路徑前綴的 Cache-Control"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.conditional import ConditionalGetMiddleware, compute_etag, etag_matches
+
+RULES = {"/api/pets": "public, max-age=60", "/api/pets/search": "no-cache"}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/api/pets")
+    def pets():
+        return [{"id": "1"}]
+
+    @app.get("/api/pets/search")
+    def search():
+        return [{"id": "2"}]
+
+    @app.get("/api/petsitters")
+    def petsitters():
+        return []
+
+    @app.get("/api/pets/missing")
+    def missing():
+        return JSONResponse({"detail": "not found"}, status_code=404)
+
+    @app.get("/api/pets/stream")
+    def stream():
+        return StreamingResponse(iter([b"[", b"]"]), media_type="application/json")
+
+    @app.post("/api/pets")
+    def create():
+        return {"id": "3"}
+
+    app.add_middleware(ConditionalGetMiddleware, rules=RULES)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_etag_and_cache_control(client):
+    response = client.get("/api/pets")
+    assert response.headers["ETag"] == compute_etag(response.content)
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+
+
+def test_matching_if_none_match_returns_304(client):
+    etag = client.get("/api/pets").headers["ETag"]
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/api/pets", headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert "Content-Type" not in response.headers
+
+    response = client.get("/api/pets", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_longest_prefix_wins(client):
+    assert client.get("/api/pets/search").headers["Cache-Control"] == "no-cache"
+    # 前綴只比對完整的路徑段
+    assert "ETag" not in client.get("/api/petsitters").headers
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/api/pets/missing"),
+    ("GET", "/api/pets/stream"),
+    ("POST", "/api/pets"),
+])
+def test_passthrough(client, method, path):
+    response = client.request(method, path)
+    assert "ETag" not in response.headers
+    assert "Cache-Control" not in response.headers
+
+
+def test_etag_matches_weak_comparison():
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"a"', 'W/"a"')
+    assert not etag_matches('"b"', '"a"')
+
+
+def test_app_search_is_not_publicly_cached():
+    import main
+
+    with TestClient(main.app) as client:
+        search = client.get("/api/pets/search", params={"q": "狗"})
+        assert search.status_code == 200
+        assert search.headers["Cache-Control"] == "no-cache"
+        pets = client.get("/api/pets")
+        assert pets.headers["Cache-Control"].startswith("public")
@@ -0,0 +1,151 @@
+"""延遲與錯誤注入：延遲分佈、逐頁讀取的失敗注入與只包裝本機後端"""
+import pytest
+
+from services import supabase_client
+from services.fault_injection import (
+    AsyncFaultInjectingClient,
+    FaultInjector,
+    FixedLatency,
+    LatencyModel,
+    LognormalLatency,
+    _AsyncFaultyQuery,
+    _FaultyQuery,
+    parse_latency,
+)
+from services.supabase_client import AsyncMockSupabaseClient, MockSupabaseClient, QueryError, settings
+
+
+def test_latency_model_is_abstract():
+    with pytest.raises(TypeError):
+        LatencyModel()
+
+    class Incomplete(LatencyModel):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_parse_latency():
+    assert parse_latency("") is None
+    assert repr(parse_latency("fixed:20")) == "fixed:20"
+    model = parse_latency("lognormal:20,120")
+    assert isinstance(model, LognormalLatency)
+    with pytest.raises(ValueError):
+        parse_latency("lognormal:20")
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1,2")
+
+
+def test_injector_timeout_and_errors():
+    injector = FaultInjector(FixedLatency(50), timeout=0.01)
+    assert injector.plan() == (0.01, True)
+    injector = FaultInjector(error_rate=1.0)
+    assert injector.plan() == (0.0, True)
+    assert injector.stats()["errors"] == 1
+
+
+class CountingQuery:
+    """記錄被讀取的頁數"""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+        self.fetched = 0
+        self.closed = False
+
+    def iter_pages(self, page_size: int = 1000):
+        try:
+            for i in range(self.pages):
+                self.fetched += 1
+                yield [{"id": str(i)}]
+        finally:
+            self.closed = True
+
+    async def aiter_pages(self, page_size: int = 1000):
+        try:
+            for i in range(self.pages):
+                self.fetched += 1
+                yield [{"id": str(i)}]
+        finally:
+            self.closed = True
+
+
+class FailAfter(FaultInjector):
+    """前 n 次呼叫成功，之後失敗"""
+
+    def __init__(self, n: int):
+        super().__init__()
+        self.n = n
+
+    def plan(self) -> tuple[float, bool]:
+        self.calls += 1
+        return 0.0, self.calls > self.n
+
+
+def test_iter_pages_injects_failures():
+    query = CountingQuery(5)
+    wrapped = _FaultyQuery(query, FailAfter(2))
+    pages = []
+    with pytest.raises(QueryError):
+        for rows in wrapped.iter_pages():
+            pages.append(rows[0]["id"])
+    assert pages == ["0", "1"]
+    # 失敗的頁面不會送達下層查詢
+    assert query.fetched == 2 and query.closed
+
+    query = CountingQuery(3)
+    wrapped = _FaultyQuery(query, FaultInjector(error_rate=1.0))
+    with pytest.raises(QueryError):
+        list(wrapped.stream())
+    assert query.fetched == 0
+    result = FaultInjector(error_rate=1.0).run(lambda: None)
+    assert (result.data, result.error) == ([], "注入的錯誤或逾時")
+
+
+@pytest.mark.anyio
+async def test_async_iter_pages_injects_timeouts():
+    query = CountingQuery(4)
+    query.iter_pages = query.aiter_pages
+    wrapped = _AsyncFaultyQuery(query, FailAfter(3))
+    pages = []
+    with pytest.raises(QueryError):
+        async for rows in wrapped.iter_pages():
+            pages.append(rows)
+    assert pages == [[{"id": "0"}], [{"id": "1"}], [{"id": "2"}]]
+    assert query.fetched == 3 and query.closed
+
+    injector = FaultInjector(FixedLatency(50), timeout=0.001)
+    client = AsyncFaultInjectingClient(AsyncMockSupabaseClient(MockSupabaseClient()), injector)
+    with pytest.raises(QueryError):
+        [rows async for rows in client.table("pets").select("*").iter_pages()]
+    result = await client.table("pets").select("*").execute()
+    assert result.data == [] and result.error
+    assert injector.stats()["timeouts"] == 2
+
+
+@pytest.fixture
+def fault_settings(monkeypatch):
+    monkeypatch.setattr(settings, "FAULT_LATENCY", "fixed:1")
+    monkeypatch.setattr(supabase_client, "_async_client", None)
+    monkeypatch.setattr(supabase_client, "_local_client", None)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", ["mock", "sqlite"])
+async def test_local_backends_are_wrapped(fault_settings, monkeypatch, backend):
+    monkeypatch.setattr(settings, "DATA_BACKEND", backend)
+    monkeypatch.setattr(settings, "SQLITE_PATH", ":memory:")
+    client = supabase_client.get_async_client()
+    assert isinstance(client, AsyncFaultInjectingClient)
+    assert (await client.table("pets").select("id").eq("id", "1").execute()).data == [{"id": "1"}]
+
+
+@pytest.mark.anyio
+async def test_supabase_client_is_never_wrapped(fault_settings, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "DATA_BACKEND", "supabase")
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://postgrest.test")
+    monkeypatch.setattr(settings, "SUPABASE_KEY", "test-key")
+    client = supabase_client.get_async_client()
+    assert isinstance(client, supabase_client.AsyncSupabaseClient)
+    assert "FAULT_*" in capsys.readouterr().out
+    await client.aclose()
@@ -0,0 +1,34 @@
+"""合成資料的批次寫入：只計入實際寫入成功的筆數"""
+import httpx
+import pytest
+
+from generate_data import BulkWriter
+
+
+@pytest.mark.anyio
+async def test_failed_batches_are_counted_separately(postgrest):
+    posts = []
+
+    def fail_second_batch(request):
+        if request.method == "POST":
+            posts.append(request)
+            if len(posts) == 2:
+                return httpx.Response(500, json={"message": "boom"})
+        return None
+
+    postgrest.handler = fail_second_batch
+    client = postgrest.client()
+    writer = BulkWriter(client, chunk_size=3, upsert_ids=("demo",))
+    for i in range(7):
+        await writer.add("pets", {"id": str(i)})
+    await writer.add("users", {"id": "demo"})
+    await writer.close()
+
+    assert writer.written == {"pets": 4, "users": 1}
+    assert writer.failed == {"pets": 3}
+
+    # 已存在而略過的 upsert 不算寫入也不算失敗
+    postgrest.handler = lambda request: httpx.Response(201, json=[]) if request.method == "POST" else None
+    await writer.add("users", {"id": "demo"})
+    assert writer.written["users"] == 1 and "users" not in writer.failed
+    await client.aclose()
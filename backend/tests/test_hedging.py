@@ -0,0 +1,132 @@
+"""對沖讀取：延遲門檻、預算與客戶端的取先完成者"""
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from services.hedging import HedgePolicy
+
+
+def test_delay_uses_max_until_enough_samples():
+    policy = HedgePolicy(percentile=90, min_delay=0.001, max_delay=1.0, min_samples=10)
+    assert policy.delay("pets") == 1.0
+    for ms in range(1, 10):
+        policy.record("pets", ms / 1000)
+    assert policy.delay("pets") == 1.0
+    policy.record("pets", 0.010)
+    assert policy.delay("pets") == pytest.approx(0.009)
+
+
+def test_window_keeps_sorted_samples():
+    policy = HedgePolicy(percentile=50, min_delay=0.0, max_delay=10.0, window=8, min_samples=1)
+    rng = random.Random(3)
+    for _ in range(50):
+        policy.record("pets", rng.choice([0.1, 0.2, 0.3, rng.random()]))
+        state = policy._tables["pets"]
+        assert state.ordered == sorted(state.latencies)
+    assert len(state.ordered) == 8
+    assert policy.delay("pets") == state.ordered[3]
+
+
+def test_delay_is_clamped():
+    policy = HedgePolicy(percentile=50, min_delay=0.05, max_delay=0.2, min_samples=1)
+    policy.record("pets", 0.001)
+    assert policy.delay("pets") == 0.05
+    policy = HedgePolicy(percentile=50, min_delay=0.05, max_delay=0.2, min_samples=1)
+    policy.record("pets", 5.0)
+    assert policy.delay("pets") == 0.2
+
+
+def test_budget_limits_hedge_ratio():
+    policy = HedgePolicy(budget_ratio=0.25, window=4)
+    assert policy.max_tokens == 1.0
+    assert policy.try_acquire("pets")
+    assert not policy.try_acquire("pets")
+    for _ in range(3):
+        policy.start("pets")
+    assert not policy.try_acquire("pets")
+    policy.start("pets")
+    assert policy.try_acquire("pets")
+    stats = policy.stats()["pets"]
+    assert (stats["requests"], stats["hedges"]) == (4, 2)
+
+
+class SlowFirst:
+    """第 n 個 GET 依 delays[n] 秒回應（None 表示連線錯誤），記錄被取消的請求"""
+
+    def __init__(self, postgrest, delays: list):
+        self.delays = delays
+        self.cancelled = []
+        self.calls = 0
+        postgrest.handler = self
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        index = self.calls
+        self.calls += 1
+        delay = self.delays[index] if index < len(self.delays) else 0
+        try:
+            if delay is None:
+                raise httpx.ConnectError("boom", request=request)
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        return httpx.Response(200, json=[{"id": str(index)}])
+
+
+@pytest.mark.anyio
+async def test_hedge_wins_and_cancels_primary(postgrest):
+    transport = SlowFirst(postgrest, [5, 0])
+    policy = HedgePolicy(min_delay=0.01, max_delay=0.02)
+    client = postgrest.client(hedging=policy)
+
+    result = await asyncio.wait_for(client.table("pets").select("id").execute(), timeout=2)
+    await asyncio.sleep(0)
+    assert result.data == [{"id": "1"}]
+    assert transport.calls == 2
+    assert transport.cancelled == [0]
+    assert policy.stats()["pets"]["hedge_wins"] == 1
+    # 記錄的是原始請求的延遲（至少為對沖前的等待），而非對沖請求本身
+    assert policy._tables["pets"].latencies[0] >= 0.02
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_fast_primary_is_not_hedged(postgrest):
+    transport = SlowFirst(postgrest, [0])
+    policy = HedgePolicy(min_delay=0.01, max_delay=0.5)
+    client = postgrest.client(hedging=policy)
+
+    result = await client.table("pets").select("id").execute()
+    assert result.data == [{"id": "0"}]
+    assert transport.calls == 1
+    assert policy.stats()["pets"]["hedges"] == 0
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_failed_hedge_falls_back_to_primary(postgrest):
+    transport = SlowFirst(postgrest, [0.1, None])
+    client = postgrest.client(hedging=HedgePolicy(min_delay=0.01, max_delay=0.02))
+
+    result = await client.table("pets").select("id").execute()
+    assert result.data == [{"id": "0"}]
+    assert transport.calls == 2
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_no_hedge_without_budget(postgrest):
+    transport = SlowFirst(postgrest, [0.05, 0, 0.05])
+    policy = HedgePolicy(min_delay=0.01, max_delay=0.02, budget_ratio=0.0)
+    client = postgrest.client(hedging=policy)
+
+    await client.table("pets").select("id").execute()
+    assert transport.calls == 2
+    # 預算已用完：第二個慢請求只能等待原始請求
+    result = await client.table("pets").select("id").eq("id", "x").execute()
+    assert result.data == [{"id": "2"}]
+    assert transport.calls == 3
+    assert policy.stats()["pets"]["hedges"] == 1
+    await client.aclose()
@@ -0,0 +1,145 @@
+"""模擬資料表：欄位式儲存、MockRow 檢視與雜湊索引（與逐列掃描的結果比對）"""
+import random
+
+import pytest
+
+from services import mock_store
+from services.mock_store import MockRow, MockTable
+
+LOCATIONS = ["台北市", "新北市", "台中市", None]
+TYPES = ["狗狗", "貓咪"]
+
+
+def make_row(rng: random.Random, i: int) -> dict:
+    row = {"id": str(i), "location": rng.choice(LOCATIONS), "pet_type": rng.choice(TYPES)}
+    if rng.random() < 0.3:
+        row["tags"] = ["親人"] if rng.random() < 0.5 else []
+    if rng.random() < 0.2:
+        del row["location"]
+    return row
+
+
+def scan(rows: list[dict], conditions: list) -> list[str]:
+    """逐列掃描的參考實作"""
+    return [row["id"] for row in rows
+            if all(row.get(column) in values for column, values in conditions)]
+
+
+def test_row_view_behaves_like_dict():
+    table = MockTable([{"id": "1", "name": "Bella", "breed": None}, {"id": "2", "age": 3}])
+    first, second = table
+    assert isinstance(first, MockRow)
+    assert dict(first) == first.copy() == {"id": "1", "name": "Bella", "breed": None}
+    assert list(second) == ["id", "age"] and len(second) == 2
+    # 欄位陣列以 None 填補缺少的欄位，仍需與值為 None 的欄位區分
+    assert "breed" in first and "breed" not in second
+    assert first.get("breed", "x") is None
+    assert second.get("breed", "x") == "x"
+    with pytest.raises(KeyError):
+        second["breed"]
+    assert table[-1]["age"] == 3
+    assert [row["id"] for row in table[0:1]] == ["1"]
+
+
+def test_stored_values_are_copies_and_shapes_are_shared():
+    source = {"id": "1", "location": "".join(["台北", "市"])}
+    table = MockTable([source, {"id": "2", "location": "台北市"}])
+    source["id"] = "changed"
+    assert table[0]["id"] == "1"
+    # 短字串共用同一個物件，相同欄位組合共用同一個 tuple
+    assert table[0]["location"] is table[1]["location"]
+    assert table[0].keys() is table[1].keys()
+
+
+def test_list_values_are_not_shared_with_the_store():
+    source = {"id": "1", "tags": ["親人"], "meta": {"images": ["a.jpg"]}}
+    table = MockTable([source, {"id": "2"}])
+    source["tags"].append("changed")
+    row = table[0]
+    assert row["tags"] == ["親人"]
+
+    for copy in (row.copy(), dict(row)):
+        copy["tags"].append("x")
+        copy["meta"]["images"].append("b.jpg")
+    row.get("tags").append("y")
+    row["meta"]["images"].clear()
+    assert table[0].copy() == {"id": "1", "tags": ["親人"], "meta": {"images": ["a.jpg"]}}
+
+    # 更新時每列保存各自的副本
+    tags = ["安靜"]
+    table.update(table.where([]), {"tags": tags})
+    tags.append("z")
+    table[1]["tags"].append("w")
+    assert [row["tags"] for row in table] == [["安靜"], ["安靜"]]
+    assert table.where([("tags", (["安靜"],))]) == [0, 1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_indexes_match_scan_through_writes(seed, monkeypatch):
+    monkeypatch.setattr(mock_store, "_COMPACT_THRESHOLD", 20)
+    rng = random.Random(seed)
+    rows = [make_row(rng, i) for i in range(300)]
+    table = MockTable(rows, indexes=("id",))
+    queries = [
+        [("location", ("台北市",))],
+        [("location", ("台北市", "台中市")), ("pet_type", ("貓咪",))],
+        [("location", (None,))],
+        [("pet_type", ("狗狗",)), ("id", tuple(str(i) for i in range(0, 300, 7)))],
+        [("tags", (["親人"],))],
+        [("missing", (None,)), ("pet_type", ("貓咪",))],
+    ]
+
+    def check():
+        for conditions in queries:
+            found = [table.row(slot)["id"] for slot in table.where(conditions)]
+            assert found == scan(rows, conditions), conditions
+        assert [row.copy() for row in table] == [{k: v for k, v in row.items()} for row in rows]
+
+    check()
+    compacted = False
+    for step in range(6):
+        # 更新：改變已索引的欄位並加入新欄位
+        targets = table.where([("pet_type", ("狗狗",)), ("location", (LOCATIONS[step % 4],))])
+        table.update(targets, {"location": LOCATIONS[(step + 1) % 4], "step": step})
+        for row in rows:
+            if row["pet_type"] == "狗狗" and row.get("location") == LOCATIONS[step % 4]:
+                row.update(location=LOCATIONS[(step + 1) % 4], step=step)
+        queries.append([("step", (step,))])
+
+        # 刪除：累積超過門檻時會重新整理插槽並重建索引
+        doomed = {row["id"] for row in rng.sample(rows, len(rows) // 3)}
+        deleted = table.delete(table.where([("id", tuple(doomed))]))
+        assert sorted(row["id"] for row in deleted) == sorted(row["id"] for row in rows if row["id"] in doomed)
+        rows = [row for row in rows if row["id"] not in doomed]
+        compacted = compacted or table._dead == 0
+
+        table.extend(make_row(rng, 1000 + step * 10 + i) for i in range(10))
+        rows += [row.copy() for row in list(table)[-10:]]
+        assert len(table) == len(rows)
+        check()
+    assert compacted
+    assert set(table.indexes) >= {"id", "location", "pet_type"}
+
+
+def test_where_without_conditions_and_unknown_column():
+    table = MockTable([{"id": str(i)} for i in range(3)])
+    table.delete(table.where([("id", ("1",))]))
+    assert [table.row(slot)["id"] for slot in table.where([])] == ["0", "2"]
+    assert table.where([("color", ("黑",))]) == []
+    assert len(table.where([("color", (None,))])) == 2
+
+
+def test_sort_key_puts_nulls_last():
+    table = MockTable([
+        {"id": "1", "name": "b", "age": 2},
+        {"id": "2", "name": None, "age": 1},
+        {"id": "3", "name": "a", "age": None},
+        {"id": "4", "name": "b", "age": 1},
+    ])
+    slots = list(range(4))
+    by_name = sorted(slots, key=table.sort_key(["name"]))
+    assert [table.row(slot)["id"] for slot in by_name] == ["3", "1", "4", "2"]
+    by_name_age = sorted(slots, key=table.sort_key(["name", "age"]))
+    assert [table.row(slot)["id"] for slot in by_name_age] == ["3", "4", "1", "2"]
+    by_three = sorted(slots, key=table.sort_key(["age", "name", "id"]))
+    assert [table.row(slot)["id"] for slot in by_three] == ["4", "2", "1", "3"]
@@ -0,0 +1,199 @@
+"""鍵集分頁：PostgREST or 條件、模擬客戶端的 after() 與列表端點的分頁標頭"""
+import itertools
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.pagination import decode_cursor, encode_cursor
+from api.pets import PETS_QUERY
+from services.supabase_client import MockSupabaseClient, SupabaseClient, _mock_sort_value
+
+_TOKEN = re.compile(r'\(|\)|,|"(?:[^"\\]|\\.)*"|[^(),"]+')
+
+
+def parse_logic(text: str) -> tuple:
+    """將 PostgREST 的 (a.gt."x",and(...)) 解析為 ("or", [...]) 樹"""
+    tokens = _TOKEN.findall(text)
+    position = 0
+
+    def group(operator: str) -> tuple:
+        nonlocal position
+        assert tokens[position] == "("
+        position += 1
+        items = []
+        while True:
+            token = tokens[position]
+            if token in ("and", "or"):
+                position += 1
+                items.append(group(token))
+            else:
+                condition = token
+                position += 1
+                if tokens[position].startswith('"'):
+                    condition += tokens[position]
+                    position += 1
+                items.append(condition)
+            separator = tokens[position]
+            position += 1
+            if separator == ")":
+                return operator, items
+
+    return group("or")
+
+
+def evaluate(node: object, row: dict) -> bool:
+    """以 PostgreSQL 語意評估條件（與 NULL 比較的結果為不成立）"""
+    if isinstance(node, tuple):
+        operator, items = node
+        results = (evaluate(item, row) for item in items)
+        return all(results) if operator == "and" else any(results)
+    column, rest = node.split(".", 1)
+    value = row.get(column)
+    if rest == "is.null":
+        return value is None
+    if rest == "not.is.null":
+        return value is not None
+    operator, literal = rest.split(".", 1)
+    literal = re.sub(r"\\(.)", r"\1", literal[1:-1])
+    if value is None:
+        return False
+    return {"eq": value == literal, "gt": value > literal, "lt": value < literal}[operator]
+
+
+def postgres_order(rows: list, orders: list) -> list:
+    """PostgreSQL 預設排序（NULL 視為最大值）"""
+    ordered = list(rows)
+    for column, desc in reversed(orders):
+        ordered.sort(key=lambda row: _mock_sort_value(row.get(column)), reverse=desc)
+    return ordered
+
+
+ROWS = [
+    {"id": f"{i:02d}", "created_at": created_at, "name": name}
+    for i, (created_at, name) in enumerate([
+        ("2024-01-01", "a,b"), ("2024-01-02", 'say "hi"'), ("2024-01-02", None), (None, "x"),
+        ("2024-01-03", "x"), (None, None), ("2024-01-01", "a\\b"), ("2024-01-03", "(y)"),
+    ])
+]
+
+
+@pytest.fixture
+def sync_client():
+    client = SupabaseClient("http://postgrest.test", "test-key")
+    yield client
+    client.close()
+
+
+@pytest.mark.parametrize("orders", [
+    [("created_at", True), ("id", True)],
+    [("created_at", False), ("id", False)],
+    [("name", False), ("created_at", True), ("id", False)],
+    [("name", True), ("id", True)],
+])
+def test_keyset_filter_selects_rows_after_cursor(sync_client, orders):
+    expected_order = postgres_order(ROWS, orders)
+    for position, cursor in enumerate(expected_order):
+        query = sync_client.table("pets")
+        for column, desc in orders:
+            query = query.order(column, desc=desc)
+        query = query.after(*(cursor.get(column) for column, _ in orders))
+        tree = parse_logic(query._select_request()[0]["or"])
+        selected = [row for row in expected_order if evaluate(tree, row)]
+        assert selected == expected_order[position + 1:], (cursor, query._keyset_filter())
+
+
+def test_keyset_filter_quotes_and_nulls(sync_client):
+    query = sync_client.table("pets").order("name").order("id").after('a,"b"', "7")
+    assert query._keyset_filter() == r'(name.gt."a,\"b\"",name.is.null,and(name.eq."a,\"b\"",id.gt."7"))'
+
+    query = sync_client.table("pets").order("name", desc=True).order("id", desc=True).after(None, "7")
+    assert query._keyset_filter() == '(name.not.is.null,and(name.is.null,id.lt."7"))'
+    assert "None" not in query._keyset_filter()
+
+    # 升冪排序中 NULL 已在最後，只有同為 NULL 且 id 較大者
+    query = sync_client.table("pets").order("name").order("id").after(None, "7")
+    assert query._keyset_filter() == '(and(name.is.null,id.gt."7"))'
+    query = sync_client.table("pets").order("name").after(None)
+    assert query._keyset_filter() == "(id.is.null)"
+
+    with pytest.raises(ValueError):
+        sync_client.table("pets").order("id").after("1", "2")._keyset_filter()
+
+
+@pytest.mark.parametrize("orders", [
+    [("created_at", True), ("id", True)],
+    [("name", False), ("id", False)],
+])
+def test_mock_pages_match_postgres_order(orders):
+    client = MockSupabaseClient()
+    for row in ROWS:
+        client.table("pagination").insert(dict(row)).execute()
+
+    query = client.table("pagination").select("*")
+    for column, desc in orders:
+        query = query.order(column, desc=desc)
+    pages = list(query.iter_pages(page_size=3))
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert list(itertools.chain.from_iterable(pages)) == postgres_order(ROWS, orders)
+
+
+def test_cursor_round_trip():
+    keyset = ["2024-01-02T00:00:00+00:00", None, "中文"]
+    assert decode_cursor(encode_cursor(keyset)) == keyset
+    assert encode_cursor(None) is None
+
+
+def test_prepared_next_page_is_not_counted(sync_client):
+    first = PETS_QUERY.bind(sync_client, limit=2, location="台北市")
+    assert first._select_request()[1]["Prefer"] == "count=estimated"
+    following = PETS_QUERY.bind(sync_client, limit=2, after=["2024-01-01", "1"], location="台北市")
+    params, headers = following._select_request()
+    assert "count" not in headers["Prefer"]
+    assert params["or"].startswith('(created_at.lt."2024-01-01"')
+
+
+@pytest.mark.parametrize("path", ["/api/stories", "/api/pets"])
+def test_total_count_only_on_first_page(path):
+    import main
+
+    with TestClient(main.app) as client:
+        first = client.get(path, params={"limit": 1})
+        assert first.status_code == 200
+        total = int(first.headers["X-Total-Count"])
+        cursor = first.headers["X-Next-Cursor"]
+
+        seen = [item["id"] for item in first.json()]
+        while cursor:
+            page = client.get(path, params={"limit": 1, "cursor": cursor})
+            assert page.status_code == 200
+            assert "X-Total-Count" not in page.headers
+            seen += [item["id"] for item in page.json()]
+            cursor = page.headers.get("X-Next-Cursor")
+        assert len(seen) == len(set(seen)) == total
+
+
+def test_distance_sort_orders_all_pages():
+    import main
+
+    with TestClient(main.app) as client:
+        params = {"limit": 2, "sort": "距離由近到遠"}
+        first = client.get("/api/pets", params=params)
+        assert first.status_code == 200
+        total = int(first.headers["X-Total-Count"])
+        cursor = first.headers["X-Next-Cursor"]
+        distances = [pet["distance"] for pet in first.json()]
+        while cursor:
+            page = client.get("/api/pets", params={**params, "cursor": cursor})
+            assert "X-Total-Count" not in page.headers
+            distances += [pet["distance"] for pet in page.json()]
+            cursor = page.headers.get("X-Next-Cursor")
+        assert len(distances) == total
+        values = [float(distance.split()[0]) for distance in distances]
+        assert values == sorted(values)
+
+        # 篩選後排序；預設排序的游標不能用於距離排序
+        cats = client.get("/api/pets", params={"sort": "距離由近到遠", "pet_type": "貓咪"}).json()
+        assert cats and {pet["pet_type"] for pet in cats} == {"貓咪"}
+        keyset_cursor = client.get("/api/pets", params={"limit": 1}).headers["X-Next-Cursor"]
+        assert client.get("/api/pets", params={**params, "cursor": keyset_cursor}).status_code == 400
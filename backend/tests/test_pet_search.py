@@ -0,0 +1,147 @@
+"""寵物搜尋索引：在工作執行緒中建立、建立期間的寫入與完成後一次替換"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import pets_router
+from services import pet_search, write_events
+from services.search_index import SearchIndex
+from services.supabase_client import QueryError
+
+
+class PagedClient:
+    """依序返回固定頁面的客戶端；讀完第一頁後等待 resume 才繼續，fail_at 頁起讀取失敗"""
+
+    def __init__(self, pages: list[list[dict]], fail_at: int = -1, wait: bool = True):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.first_page = asyncio.Event()
+        self.resume = asyncio.Event()
+        if not wait:
+            self.resume.set()
+        self.reads = 0
+
+    def table(self, name: str):
+        return self
+
+    def select(self, columns: str):
+        return self
+
+    async def iter_pages(self, page_size: int):
+        self.reads += 1
+        for i, page in enumerate(self.pages):
+            if i == self.fail_at:
+                raise QueryError("pets 分頁讀取失敗: HTTP 503")
+            yield page
+            if i == 0:
+                self.first_page.set()
+                await self.resume.wait()
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(pet_search, "_index", None)
+    monkeypatch.setattr(pet_search, "_built_at", 0.0)
+    monkeypatch.setattr(pet_search, "_building", None)
+    monkeypatch.setattr(pet_search, "_pending", [])
+    monkeypatch.setattr(pet_search, "_failed_at", None)
+    yield
+    write_events.unsubscribe("pets", pet_search._on_write)
+
+
+@pytest.mark.anyio
+async def test_index_is_built_off_the_loop_and_swapped_once(fresh_state, monkeypatch):
+    loop_thread = threading.get_ident()
+    build_threads = set()
+    add_many = SearchIndex.add_many
+
+    old = SearchIndex(pet_search.SEARCH_FIELDS)
+    old.add({"id": "old", "name": "舊資料"})
+    monkeypatch.setattr(pet_search, "_index", old)
+
+    def tracked(self, rows):
+        if self is not old:
+            build_threads.add(threading.get_ident())
+        return add_many(self, rows)
+
+    monkeypatch.setattr(SearchIndex, "add_many", tracked)
+
+    client = PagedClient([[{"id": "1", "name": "黃金獵犬"}], [{"id": "2", "name": "柴犬"}]])
+    monkeypatch.setattr(pet_search.settings, "SEARCH_INDEX_REFRESH", 1)
+    pet_search.warm_up(client)
+    await client.first_page.wait()
+    # 建立期間沿用舊索引，寫入同時套用到舊索引並留待新索引
+    write_events.notify("pets", "insert", [{"id": "3", "name": "黃金鼠"}])
+    assert await pet_search.get_index(client) is old
+    assert [doc_id for doc_id, _ in old.search("黃金")] == ["3"]
+
+    client.resume.set()
+    await pet_search._building
+    index = await pet_search.get_index(client)
+    assert index is not old
+    assert sorted(doc_id for doc_id, _ in index.search("黃金")) == ["1", "3"]
+    assert "2" in index and "old" not in index
+    assert build_threads and loop_thread not in build_threads
+    assert pet_search._pending == []
+
+
+@pytest.mark.anyio
+async def test_close_cancels_the_build(fresh_state):
+    client = PagedClient([[{"id": "1", "name": "柴犬"}], [{"id": "2", "name": "柴犬"}]])
+    pet_search.warm_up(client)
+    await client.first_page.wait()
+    await pet_search.close()
+    assert pet_search._building is None
+    assert pet_search._index is None
+
+
+PAGES = [[{"id": "1", "name": "黃金獵犬"}], [{"id": "2", "name": "柴犬"}]]
+
+
+@pytest.mark.anyio
+async def test_failed_rebuild_keeps_the_previous_index(fresh_state, monkeypatch):
+    old = SearchIndex(pet_search.SEARCH_FIELDS)
+    old.add({"id": "old", "name": "柴犬"})
+    monkeypatch.setattr(pet_search, "_index", old)
+    monkeypatch.setattr(pet_search.settings, "SEARCH_INDEX_REFRESH", 1)
+
+    client = PagedClient(PAGES, fail_at=1, wait=False)
+    pet_search.warm_up(client)
+    write_events.notify("pets", "insert", [{"id": "3", "name": "柴犬"}])
+    await asyncio.gather(pet_search._building, return_exceptions=True)
+    # 只讀到部分資料的索引不會替換舊索引
+    assert pet_search._index is old and "3" in old
+    assert pet_search._pending == []
+    # 重試間隔內沿用舊索引，不重新讀取
+    assert await pet_search.get_index(client) is old
+    assert pet_search._building is None and client.reads == 1
+
+
+@pytest.mark.anyio
+async def test_first_build_failure_is_unavailable_then_retried(fresh_state, monkeypatch):
+    client = PagedClient(PAGES, fail_at=0, wait=False)
+    with pytest.raises(pet_search.IndexUnavailable):
+        await pet_search.get_index(client)
+    with pytest.raises(pet_search.IndexUnavailable) as info:
+        await pet_search.get_index(client)
+    assert client.reads == 1 and 1 <= info.value.retry_after <= pet_search._RETRY_DELAY
+
+    monkeypatch.setattr(pet_search, "_RETRY_DELAY", 0.0)
+    client.fail_at = -1
+    index = await pet_search.get_index(client)
+    assert len(index) == 2 and pet_search._failed_at is None
+
+
+def test_search_endpoint_returns_503_while_unavailable(monkeypatch):
+    async def unavailable(client):
+        raise pet_search.IndexUnavailable("寵物搜尋索引建立失敗，稍後重試", 12.5)
+
+    monkeypatch.setattr(pet_search, "get_index", unavailable)
+    app = FastAPI()
+    app.include_router(pets_router, prefix="/api")
+    response = TestClient(app).get("/api/pets/search", params={"q": "柴犬"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "13"
@@ -0,0 +1,122 @@
+"""查詢建構器與 PreparedQuery：組出的請求參數、bind() 後的鏈式呼叫與模擬客戶端"""
+import httpx
+import pytest
+
+from services.supabase_client import MockSupabaseClient, PreparedQuery, SupabaseClient
+
+PETS_QUERY = PreparedQuery(
+    "pets", "id,name,created_at", filters=("location", "size"),
+    order=(("created_at", True), ("id", True)), limit=20, count="estimated",
+)
+
+
+@pytest.fixture
+def sync_client():
+    client = SupabaseClient("http://postgrest.test", "test-key")
+    yield client
+    client.close()
+
+
+def test_builder_request(sync_client):
+    params, headers = (sync_client.table("pets").select("id,name", count="exact")
+                       .eq("location", "台北市").in_("size", ["大型", "中型"])
+                       .order("created_at", desc=True).order("id").range(10, 19)._select_request())
+    assert params == {
+        "select": "id,name",
+        "location": "eq.台北市",
+        "size": "in.(大型,中型)",
+        "order": "created_at.desc,id.asc",
+        "limit": "10",
+        "offset": "10",
+    }
+    assert headers["Prefer"] == "count=exact"
+    assert headers["apikey"] == "test-key"
+
+
+def test_bind_matches_builder(sync_client):
+    bound = PETS_QUERY.bind(sync_client, location="台北市", size=None)
+    built = (sync_client.table("pets").select("id,name,created_at", count="estimated")
+             .eq("location", "台北市").order("created_at", desc=True).order("id", desc=True).limit(20))
+    assert bound._select_request() == built._select_request()
+    assert bound._select_key() == built._select_key()
+
+
+@pytest.mark.parametrize("chain, expected", [
+    (lambda q: q.limit(5), {"limit": "5"}),
+    (lambda q: q.eq("gender", "母"), {"gender": "eq.母"}),
+    (lambda q: q.order("name"), {"order": "created_at.desc,id.desc,name.asc"}),
+    (lambda q: q.select("id"), {"select": "id"}),
+    (lambda q: q.after("2024-01-01", "3"), {"or": '(created_at.lt."2024-01-01",and(created_at.eq."2024-01-01",id.lt."3"))'}),
+])
+def test_builder_calls_after_bind_take_effect(sync_client, chain, expected):
+    params, _ = chain(PETS_QUERY.bind(sync_client, location="台北市"))._select_request()
+    for key, value in expected.items():
+        assert params[key] == value
+    assert params["location"] == "eq.台北市"
+
+
+def test_bind_does_not_leak_between_calls(sync_client):
+    PETS_QUERY.bind(sync_client, location="台北市").eq("size", "大型").limit(1)._select_request()
+    params, _ = PETS_QUERY.bind(sync_client, location="新北市")._select_request()
+    assert params["location"] == "eq.新北市"
+    assert "size" not in params and params["limit"] == "20"
+
+
+def test_unknown_filter_raises(sync_client):
+    with pytest.raises(ValueError):
+        PETS_QUERY.bind(sync_client, color="黑")
+    with pytest.raises(ValueError):
+        PETS_QUERY.bind(MockSupabaseClient(), color="黑")
+
+
+@pytest.mark.anyio
+async def test_prepared_query_iter_pages(postgrest):
+    rows = [{"id": str(i), "name": f"pet{i}", "created_at": f"2024-01-0{i}"} for i in range(5, 0, -1)]
+
+    def pages(request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return None
+        size = int(request.url.params["limit"])
+        seen = sum(len(page) for page in served)
+        served.append(rows[seen:seen + size])
+        return httpx.Response(200, json=served[-1])
+
+    served: list = []
+    postgrest.handler = pages
+    client = postgrest.client()
+    query = PETS_QUERY.bind(client, location="台北市")
+    result = [page async for page in query.iter_pages(page_size=2)]
+
+    assert result == [rows[0:2], rows[2:4], rows[4:5]]
+    requests = postgrest.gets("pets")
+    assert [r.url.params["limit"] for r in requests] == ["2", "2", "2"]
+    assert all(r.url.params["location"] == "eq.台北市" for r in requests)
+    assert "or" not in requests[0].url.params
+    assert requests[1].url.params["or"] == '(created_at.lt."2024-01-04",and(created_at.eq."2024-01-04",id.lt."4"))'
+    # 分頁不計算總數
+    assert all("count" not in r.headers.get("Prefer", "") for r in requests)
+    await client.aclose()
+
+
+def test_bind_on_mock_client_uses_builder():
+    client = MockSupabaseClient()
+    for i, location in enumerate(["台北市", "台中市", "台北市"]):
+        client.table("bound").insert({"id": str(i), "location": location, "size": "小型",
+                                      "created_at": f"2024-01-0{i + 1}"}).execute()
+    query = PreparedQuery("bound", "*", filters=("location",), order=(("created_at", True),), count="exact")
+    result = query.bind(client, location="台北市").execute()
+    assert [row["id"] for row in result.data] == ["2", "0"]
+    assert result.count == 2
+    assert [row["id"] for row in query.bind(client, limit=1, after=["2024-01-03"], location="台北市").execute().data] == ["0"]
+
+
+def test_count_keeps_inner_embeds(sync_client):
+    query = (sync_client.table("favorites").select("id,created_at,pet:pets!inner(id,name),users(name)")
+             .eq("user_id", "u1").eq("pets.location", "台北市").count())
+    params, headers = query._count_request()
+    # !inner 嵌入會排除沒有關聯的列，嵌入資源上的過濾條件也需要它出現在 select 中
+    assert params == {"select": "pet:pets!inner(id,name)", "user_id": "eq.u1", "pets.location": "eq.台北市"}
+    assert headers["Prefer"] == "count=exact"
+
+    plain = sync_client.table("favorites").select("id,pets(name)").eq("user_id", "u1").count()
+    assert plain._count_request()[0] == {"user_id": "eq.u1"}
@@ -0,0 +1,122 @@
+"""查詢快取：TTL、LRU、寫入版本與客戶端的讀穿行為"""
+import httpx
+import pytest
+
+from services.query_cache import QueryCache
+
+PETS = [{"id": "1", "name": "Bella", "tags": ["活潑"]}, {"id": "2", "name": "Milo", "tags": []}]
+
+
+def test_hit_miss_and_stats():
+    cache = QueryCache()
+    assert cache.get("k") is None
+    cache.set("pets", "k", "value", 10, cache.generation("pets"))
+    assert cache.get("k") == "value"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 10)
+
+
+def test_expired_entries_are_misses():
+    cache = QueryCache(ttl=0)
+    cache.set("pets", "k", "value", 10, 0)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = QueryCache(max_entries=2, max_bytes=100)
+    cache.set("pets", "a", 1, 10, 0)
+    cache.set("pets", "b", 2, 10, 0)
+    cache.get("a")
+    cache.set("pets", "c", 3, 10, 0)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("pets", "d", 4, 95, 0)
+    assert cache.stats()["bytes"] == 95
+    assert cache.get("d") == 4
+    # 超過上限的單一項目不快取
+    cache.set("pets", "e", 5, 101, 0)
+    assert cache.get("e") is None
+
+
+def test_invalidate_table_only_clears_that_table():
+    cache = QueryCache()
+    cache.set("pets", "p", 1, 10, 0)
+    cache.set("stories", "s", 2, 10, 0)
+    cache.invalidate_table("pets")
+    assert cache.get("p") is None
+    assert cache.get("s") == 2
+    assert cache.generation("pets") == 1
+    assert cache.generation("stories") == 0
+    assert cache.stats()["bytes"] == 10
+
+
+def test_stale_generation_is_not_stored():
+    cache = QueryCache()
+    generation = cache.generation("pets")
+    # 查詢進行中時資料表被寫入：寫入前的結果不得進入快取
+    cache.invalidate_table("pets")
+    cache.set("pets", "k", "stale", 10, generation)
+    assert cache.get("k") is None
+    cache.set("pets", "k", "fresh", 10, cache.generation("pets"))
+    assert cache.get("k") == "fresh"
+
+
+def test_clear_bumps_generations():
+    cache = QueryCache()
+    generation = cache.generation("pets")
+    cache.set("pets", "k", 1, 10, generation)
+    cache.clear()
+    assert cache.get("k") is None
+    cache.set("pets", "k", 1, 10, generation)
+    assert cache.get("k") is None
+
+
+@pytest.mark.anyio
+async def test_client_reads_through_and_invalidates_on_write(postgrest):
+    postgrest.rows["pets"] = PETS
+    client = postgrest.client(cache=QueryCache())
+
+    first = await client.table("pets").select("*").cached().execute()
+    second = await client.table("pets").select("*").cached().execute()
+    assert first.data == second.data == PETS
+    assert len(postgrest.gets("pets")) == 1
+
+    await client.table("pets").insert({"id": "3", "name": "Rocky"}).execute()
+    await client.table("pets").select("*").cached().execute()
+    assert len(postgrest.gets("pets")) == 2
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_cached_results_are_independent_copies(postgrest):
+    postgrest.rows["pets"] = PETS
+    client = postgrest.client(cache=QueryCache())
+
+    first = await client.table("pets").select("*").cached().execute()
+    first.data[0]["name"] = "changed"
+    first.data[0]["tags"].append("changed")
+    first.data.pop()
+
+    second = await client.table("pets").select("*").cached().execute()
+    assert second.data == PETS
+    assert len(postgrest.gets("pets")) == 1
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_cache_budget_counts_stored_bytes(postgrest):
+    postgrest.rows["pets"] = PETS
+    cache = QueryCache()
+    client = postgrest.client(cache=cache)
+
+    await client.table("pets").select("*", count="exact").single().cached().execute()
+    assert cache.stats()["bytes"] == len(httpx.Response(200, json=PETS).content)
+    result = await client.table("pets").select("*", count="exact").single().cached().execute()
+    # 命中時同樣套用 single() 與總數
+    assert result.data == PETS[0]
+    assert result.count == 2
+    assert len(postgrest.gets("pets")) == 1
+    await client.aclose()
@@ -0,0 +1,152 @@
+"""全文檢索索引：切詞、BM25 排序與多詞查詢的交集（與逐篇計分的結果比對）"""
+import math
+import random
+
+import pytest
+
+from services import search_index
+from services.search_index import SearchIndex, query_terms, tokenize
+
+
+def test_tokenize_cjk_and_latin():
+    assert tokenize("黃金獵犬") == ["黃", "金", "獵", "犬", "黃金", "金獵", "獵犬"]
+    # 全形英數經 NFKC 轉為半形，拉丁字母轉為小寫
+    assert tokenize("ＡＢＣ Dog 12歲") == ["abc", "dog", "12", "歲"]
+    assert tokenize("柴犬、Shiba-Inu!") == ["柴", "犬", "柴犬", "shiba", "inu"]
+    assert tokenize("!!!") == []
+
+
+def test_query_terms_use_bigrams_and_dedupe():
+    assert query_terms("黃金 適合新手") == ["黃金", "適合", "合新", "新手"]
+    # 單一字才以單字查詢
+    assert query_terms("狗 Dog dog 狗") == ["狗", "dog"]
+    assert query_terms("新手新手") == ["新手", "手新"]
+    assert query_terms("  ") == []
+
+
+def make_index(rows) -> SearchIndex:
+    index = SearchIndex(["name", "tags"])
+    index.add_many(rows)
+    return index
+
+
+def ids(results) -> list[str]:
+    return [doc_id for doc_id, _ in results]
+
+
+def test_rarer_terms_and_shorter_documents_rank_higher():
+    index = make_index([
+        {"id": "short", "name": "親人 貓咪"},
+        {"id": "long", "name": "親人 貓咪 喜歡曬太陽也喜歡玩逗貓棒"},
+        {"id": "dog", "name": "親人 狗狗"},
+        {"id": "other", "name": "安靜 狗狗"},
+    ])
+    assert ids(index.search("貓咪")) == ["short", "long"]
+    # 「貓咪」比「狗狗」少見
+    assert ids(index.search("親人 貓咪"))[0] == "short"
+    assert index.search("貓咪 狗狗") == []
+    assert index.search("不存在") == []
+    assert index.search("", limit=5) == [] and index.search("貓咪", limit=0) == []
+
+
+def test_ties_put_newer_documents_first_and_paging():
+    index = make_index([{"id": str(i), "name": "柴犬", "tags": ["親人"]} for i in range(10)])
+    results = index.search("柴犬 親人", limit=4)
+    assert ids(results) == ["9", "8", "7", "6"]
+    assert len({score for _, score in results}) == 1
+    assert ids(index.search("柴犬 親人", limit=4, offset=8)) == ["1", "0"]
+
+
+def test_updates_and_removals():
+    index = make_index([{"id": "1", "name": "黑貓"}, {"id": 2, "name": "白貓"}])
+    assert "2" in index and len(index) == 2
+    index.add({"id": "1", "name": "黑狗"})
+    assert ids(index.search("黑貓")) == []
+    assert ids(index.search("黑狗")) == ["1"]
+    assert index.remove("2") and not index.remove("2")
+    assert index.search("白貓") == [] and len(index) == 1
+
+
+def brute_force(index: SearchIndex, query: str, limit: int) -> list[tuple[str, float]]:
+    """逐篇計分的參考實作：包含所有詞的文件依 (分數, 文件編號) 由高到低"""
+    live = max(1, len(index))
+    scores: dict[int, float] = {}
+    for position, term in enumerate(query_terms(query)):
+        entry = index._postings.get(term)
+        if entry is None:
+            return []
+        df = min(len(entry.docs), live)
+        idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+        found = {docno: idf * index._weights[level] for docno, level in zip(entry.docs, entry.levels)
+                 if index._ids[docno] is not None}
+        if position == 0:
+            scores = found
+        else:
+            scores = {docno: score + found[docno] for docno, score in scores.items() if docno in found}
+    ranked = sorted(((score, docno) for docno, score in scores.items()), reverse=True)[:limit]
+    return [(index._ids[docno], round(score, 4)) for score, docno in ranked]
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """縮小確認候選的上限並記錄計分與求交集的次數"""
+    monkeypatch.setattr(search_index, "_PROBE_BUDGET", 16)
+    calls = {"score": 0, "intersect": 0}
+    score, intersect = SearchIndex._score, SearchIndex._intersect
+
+    def counted_score(self, *args):
+        calls["score"] += 1
+        return score(self, *args)
+
+    def counted_intersect(lead, others):
+        calls["intersect"] += 1
+        return intersect(lead, others)
+
+    monkeypatch.setattr(SearchIndex, "_score", counted_score)
+    monkeypatch.setattr(SearchIndex, "_intersect", staticmethod(counted_intersect))
+    return calls
+
+
+def test_rare_term_with_common_phrase_scores_only_the_intersection(counted):
+    # 「黃金」出現在 1/4 的文件，「適合新手」在 1/10；文件長度不一使等級分散，分數上限無法提前停止
+    rng = random.Random(7)
+    rows = []
+    for i in range(2000):
+        words = ["狗狗"] + ["活潑"] * rng.randint(0, 6)
+        if i % 4 == 0:
+            words.append("黃金")
+        if i % 10 == 0:
+            words.append("適合新手")
+        rows.append({"id": str(i), "name": " ".join(words)})
+    index = make_index(rows)
+    for doc_id in ("0", "20", "40"):
+        index.remove(doc_id)
+
+    query = "黃金 適合新手"
+    assert index.search(query, limit=20) == brute_force(index, query, 20)
+    assert counted["intersect"] == 1
+    matches = sum(1 for i in range(0, 2000, 20) if i not in (0, 20, 40))
+    assert counted["score"] <= search_index._PROBE_BUDGET + matches
+
+    assert index.search(query, limit=5, offset=10) == brute_force(index, query, 15)[10:]
+
+
+def test_disjoint_terms_stop_after_the_probe_budget(counted):
+    rows = [{"id": str(i), "name": "黃金" if i % 2 else "新手"} for i in range(500)]
+    index = make_index(rows)
+    assert index.search("黃金 新手") == []
+    assert counted["intersect"] == 1
+    assert counted["score"] <= search_index._PROBE_BUDGET
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_queries_match_brute_force(seed):
+    rng = random.Random(seed)
+    words = ["黃金", "獵犬", "適合新手", "親人", "安靜", "貓咪", "狗狗", "活潑", "Shiba", "台北市"]
+    rows = [{"id": str(i), "name": " ".join(rng.choices(words, k=rng.randint(1, 6)))} for i in range(600)]
+    index = make_index(rows)
+    for doc_id in rng.sample(range(600), 60):
+        index.remove(str(doc_id))
+    for _ in range(30):
+        query = " ".join(rng.sample(words, rng.randint(1, 3)))
+        assert index.search(query, limit=10) == brute_force(index, query, 10), query
@@ -0,0 +1,192 @@
+"""SQLite 後端：與模擬客戶端的查詢結果比對、寫入錯誤處理與非同步執行"""
+import asyncio
+import threading
+
+import pytest
+
+from services import request_stats, supabase_client, write_events
+from services.sqlite_client import AsyncSQLiteClient, SQLiteClient
+from services.supabase_client import MockSupabaseClient
+
+LOCATIONS = ["台北市", "新北市", "台中市"]
+
+PETS = [
+    {"id": f"p{i:02d}", "name": f"pet{i}", "location": LOCATIONS[i % 3], "pet_type": "狗狗" if i % 4 else "貓咪",
+     "created_at": f"2024-01-{i // 3 + 1:02d}", "tags": ["親人"] if i % 5 == 0 else []}
+    for i in range(30)
+]
+USERS = [{"id": f"u{i}", "name": f"user{i}", "created_at": "2024-01-01"} for i in range(3)]
+FAVORITES = [
+    {"id": f"f{i:02d}", "user_id": f"u{i % 3}", "pet_id": f"p{i * 7 % 35:02d}", "created_at": f"2024-02-{i + 1:02d}"}
+    for i in range(20)
+]
+
+
+def load(client) -> None:
+    for name, rows in (("pets", PETS), ("users", USERS), ("favorites", FAVORITES)):
+        client.table(name).insert([dict(row) for row in rows]).execute()
+
+
+@pytest.fixture
+def clients():
+    mock = MockSupabaseClient()
+    for name, table in mock._data.items():
+        ids = [row["id"] for row in table]
+        if ids:
+            mock.table(name).delete().in_("id", ids).execute()
+    sqlite = SQLiteClient(":memory:", seed=False)
+    load(mock)
+    load(sqlite)
+    yield mock, sqlite
+    sqlite.close()
+
+
+QUERIES = {
+    "eq": lambda c: c.table("pets").select("*").eq("location", "台北市"),
+    "in_order_range": lambda c: (c.table("pets").select("id,name,created_at", count="exact")
+                                 .in_("pet_type", ["貓咪"]).order("created_at", desc=True).order("id", desc=True)
+                                 .range(1, 4)),
+    "two_filters": lambda c: c.table("pets").select("id").eq("location", "台中市").eq("pet_type", "狗狗").order("id"),
+    "list_value": lambda c: c.table("pets").select("id").eq("tags", ["親人"]).order("id"),
+    "after": lambda c: (c.table("pets").select("id,created_at").order("created_at", desc=True)
+                        .order("id", desc=True).after("2024-01-05", "p13").limit(5)),
+    "single": lambda c: c.table("pets").select("name,tags").eq("id", "p07").single(),
+    "missing_single": lambda c: c.table("pets").select("*").eq("id", "nope").single(),
+    "head_count": lambda c: c.table("pets").eq("location", "新北市").count(),
+    "embed": lambda c: c.table("favorites").select("id,pet:pets(id,name)").eq("user_id", "u1").order("created_at"),
+    "inner_flatten": lambda c: (c.table("favorites").select("pets!inner(id,location)", count="exact")
+                                .eq("user_id", "u2").order("created_at").flatten("pets")),
+    "one_to_many": lambda c: c.table("users").select("id,favorites(pet_id)").order("id"),
+    "unknown_table": lambda c: c.table("nothing").select("*"),
+}
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_select_matches_mock(clients, name):
+    mock, sqlite = clients
+    expected = QUERIES[name](mock).execute()
+    actual = QUERIES[name](sqlite).execute()
+    assert actual.data == expected.data
+    assert actual.count == expected.count
+
+
+def test_pages_match_mock(clients):
+    mock, sqlite = clients
+    pages = [list(client.table("pets").select("id,created_at").order("created_at", desc=True).iter_pages(page_size=7))
+             for client in clients]
+    assert pages[0] == pages[1]
+    assert [len(page) for page in pages[1]] == [7, 7, 7, 7, 2]
+
+
+def test_writes_match_mock(clients):
+    for client in clients:
+        client.table("pets").update({"location": "高雄市"}).eq("pet_type", "貓咪").execute()
+        client.table("pets").upsert([{"id": "p01", "name": "renamed"}, {"id": "p99", "name": "new", "created_at": "2025-01-01"}],
+                                    on_conflict="id").execute()
+        client.table("pets").upsert({"id": "p02", "name": "ignored"}, on_conflict="id", ignore_duplicates=True).execute()
+        client.table("pets").delete().in_("id", ["p03", "p04"]).execute()
+    mock, sqlite = clients
+    query = lambda c: c.table("pets").select("id,name,location").order("id")
+    assert query(sqlite).execute().data == query(mock).execute().data
+
+
+def test_duplicate_id_returns_empty_result(clients, capsys):
+    _, sqlite = clients
+    result = sqlite.table("pets").insert([{"id": "new", "name": "a"}, {"id": "p01", "name": "dup"}]).execute()
+    assert (result.data, result.count) == ([], 0)
+    assert "❌" in capsys.readouterr().out
+    # 同一批次在交易中回滾
+    assert sqlite.table("pets").select("id").eq("id", "new").execute().data == []
+    assert sqlite.table("pets").select("name").eq("id", "p01").single().execute().data == {"name": "pet1"}
+
+    result = sqlite.table("pets").update({"id": "p02"}).eq("id", "p01").execute()
+    assert result.data == []
+    assert len(sqlite.table("pets").select("id").execute().data) == len(PETS)
+
+
+@pytest.mark.anyio
+async def test_async_queries_run_off_the_event_loop(clients, monkeypatch):
+    _, sqlite = clients
+    client = AsyncSQLiteClient(sqlite)
+    loop_thread = threading.get_ident()
+    sql_threads, listener_threads = set(), []
+
+    execute = SQLiteClient._execute
+
+    def tracked(self, sql, params=()):
+        sql_threads.add(threading.get_ident())
+        return execute(self, sql, params)
+
+    def listener(operation, rows):
+        listener_threads.append(threading.get_ident())
+
+    monkeypatch.setattr(SQLiteClient, "_execute", tracked)
+    write_events.subscribe("pets", listener)
+    try:
+        results = await asyncio.gather(
+            client.table("pets").select("id").eq("location", "台北市").execute(),
+            client.table("pets").insert({"id": "p50", "name": "async"}).execute(),
+            client.table("pets").insert({"id": "p50", "name": "again"}).execute(),
+        )
+        pages = [page async for page in client.table("pets").select("id").iter_pages(page_size=10)]
+    finally:
+        write_events.unsubscribe("pets", listener)
+
+    assert len(results[0].data) == 10
+    assert sorted(len(result.data) for result in results[1:]) == [0, 1]
+    assert sum(len(page) for page in pages) == len(PETS) + 1
+    assert sql_threads and loop_thread not in sql_threads
+    # 寫入通知在事件迴圈上執行
+    assert listener_threads and set(listener_threads) == {loop_thread}
+
+
+@pytest.mark.anyio
+async def test_async_rpc_records_stats_on_the_event_loop(clients, monkeypatch):
+    _, sqlite = clients
+    client = AsyncSQLiteClient(sqlite)
+    loop_thread = threading.get_ident()
+    call_threads, record_threads = [], []
+    sqlite.register_rpc("count_pets", lambda data, params: call_threads.append(threading.get_ident()) or
+                        [{"count": data["pets"].count([], [], None)}])
+    record = request_stats.RequestStats.record
+
+    def tracked(self, *args):
+        record_threads.append(threading.get_ident())
+        return record(self, *args)
+
+    monkeypatch.setattr(request_stats.RequestStats, "record", tracked)
+    stats = request_stats.RequestStats()
+    token = request_stats._current.set(stats)
+    try:
+        result = await client.rpc("count_pets").execute()
+    finally:
+        request_stats._current.reset(token)
+
+    assert result.data == [{"count": len(PETS)}]
+    assert call_threads and loop_thread not in call_threads
+    assert record_threads == [loop_thread]
+    assert stats.tables["rpc/count_pets"][0] == 1
+
+
+
+def test_mock_stats_estimate_bytes_without_serializing_every_row(clients, monkeypatch):
+    mock, _ = clients
+    dumps = supabase_client.json_codec.dumps
+    serialized = []
+
+    def tracked(value):
+        serialized.append(len(value) if isinstance(value, list) else 1)
+        return dumps(value)
+
+    stats = request_stats.RequestStats()
+    token = request_stats._current.set(stats)
+    try:
+        monkeypatch.setattr(supabase_client.json_codec, "dumps", tracked)
+        result = mock.table("pets").select("*").execute()
+    finally:
+        request_stats._current.reset(token)
+
+    assert len(result.data) == len(PETS)
+    assert sum(serialized) <= supabase_client._MOCK_SIZE_SAMPLE
+    actual = len(dumps(result.data))
+    assert abs(stats.bytes - actual) <= actual * 0.1
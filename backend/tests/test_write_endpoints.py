@@ -0,0 +1,55 @@
+"""寫入端點：上游錯誤與略過的重複資料需分開處理"""
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import applications, applications_router, favorites, favorites_router
+
+APPLICATION = {
+    "pet_id": "1", "housing_type": "公寓", "outdoor_space": "無", "is_renting": False, "has_pets": False,
+    "experience": "x", "full_name": "A", "phone": "1", "email": "a@example.com", "agreed": True,
+}
+
+
+@pytest.fixture
+def api(postgrest, monkeypatch):
+    supabase = postgrest.client()
+    for module in (applications, favorites):
+        monkeypatch.setattr(module, "get_async_client", lambda: supabase)
+    app = FastAPI()
+    app.include_router(favorites_router, prefix="/api")
+    app.include_router(applications_router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
+
+
+def post_returns(postgrest, response: httpx.Response) -> None:
+    postgrest.handler = lambda request: response if request.method in ("POST", "DELETE") else None
+
+
+@pytest.mark.parametrize("path, body", [("/api/favorites", {"pet_id": "1"}), ("/api/applications", APPLICATION)])
+def test_upstream_failure_is_not_reported_as_duplicate(api, postgrest, path, body):
+    post_returns(postgrest, httpx.Response(500, json={"message": "boom"}))
+    response = api.post(path, json=body)
+    assert response.status_code == 502
+    assert "HTTP 500" in response.json()["detail"]
+
+
+def test_duplicates_are_still_reported(api, postgrest):
+    # ignore-duplicates 略過衝突的資料列時返回空列表
+    post_returns(postgrest, httpx.Response(201, json=[]))
+    assert api.post("/api/favorites", json={"pet_id": "1"}).json()["message"] == "已經收藏過了"
+    response = api.post("/api/applications", json=APPLICATION)
+    assert response.status_code == 400
+
+
+def test_transport_error_and_failed_delete(api, postgrest):
+    def unreachable(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    postgrest.handler = unreachable
+    assert api.post("/api/favorites", json={"pet_id": "1"}).status_code == 502
+
+    post_returns(postgrest, httpx.Response(503))
+    assert api.delete("/api/favorites/1").status_code == 502